@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, TableSaloon, Reservation, Menu, Notification, Report, Schedule
+from .models import User, TableSaloon, Reservation, Menu, Notification, Report, Schedule, WaitlistEntry, ReservationSeries, DailyReservationRollup, ReportJob
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -66,8 +66,11 @@ class MenuAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'message')
+    list_display = ('id', 'user', 'message', 'delivery_status', 'attempts', 'coalesced', 'sent_at')
     search_fields = ('user__email', 'message')
+    list_filter = ('type', 'kind', 'delivery_status')
+    # Modifiée uniquement via mark_read, qui tient le compteur de non lues à jour
+    readonly_fields = ('read_at',)
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
@@ -78,3 +81,25 @@ class ReportAdmin(admin.ModelAdmin):
 class ScheduleAdmin(admin.ModelAdmin):
     list_display = ('id', 'start_time', 'end_time')
     search_fields = ()
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'date', 'start', 'end', 'people_count', 'status', 'created_at')
+    search_fields = ('user__email',)
+    list_filter = ('status',)
+
+@admin.register(ReservationSeries)
+class ReservationSeriesAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'table_saloon', 'frequency', 'first_date', 'until', 'count', 'status', 'materialized_until')
+    search_fields = ('user__email',)
+    list_filter = ('status', 'frequency')
+
+@admin.register(DailyReservationRollup)
+class DailyReservationRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'table_saloon', 'status', 'count', 'covers', 'booked_minutes')
+    list_filter = ('status',)
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'report', 'format', 'status', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status', 'format')
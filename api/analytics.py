@@ -0,0 +1,158 @@
+import numpy as np
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour, ExtractIsoWeekDay, ExtractMinute
+
+from api.availability import WEEKDAY_NAMES, weekly_opening_hours
+from api.models import Reservation, TableSaloon
+from api.reportCache import cached_report
+
+# Granularité de la matrice d'occupation
+SLOT_MINUTES = 15
+STATUS_CODES = {status: code for code, (status, _) in enumerate(Reservation._meta.get_field('status').choices)}
+
+
+def load_intervals(first, last):
+    """
+    Load the reservations of [first, last] as compact NumPy arrays in a
+    single query: table index, day offset, start/end minute, status code.
+    """
+    rows = Reservation.objects.filter(
+        date__range=(first, last), table_saloon__isnull=False
+    ).values_list('table_saloon_id', 'date', 'start', 'end', 'status')
+
+    table_ids, days, starts, ends, statuses = [], [], [], [], []
+    for table_id, day, start, end, status in rows.iterator(chunk_size=5000):
+        table_ids.append(table_id)
+        days.append((day - first).days)
+        starts.append(start.hour * 60 + start.minute)
+        ends.append(end.hour * 60 + end.minute)
+        statuses.append(STATUS_CODES[status])
+
+    return {
+        'table_id': np.asarray(table_ids, dtype=np.int64),
+        'day': np.asarray(days, dtype=np.int32),
+        'start': np.asarray(starts, dtype=np.int32),
+        'end': np.asarray(ends, dtype=np.int32),
+        'status': np.asarray(statuses, dtype=np.int8),
+    }
+
+
+def occupancy_matrix(intervals, table_ids, n_days, slot_minutes=SLOT_MINUTES):
+    """
+    Build the boolean (tables × slots) occupancy matrix of active
+    reservations, without a Python loop: +1/-1 markers are scattered with
+    np.add.at then accumulated along the time axis.
+    """
+    slots_per_day = 24 * 60 // slot_minutes
+    active = np.isin(intervals['status'], [STATUS_CODES[s] for s in Reservation.ACTIVE_STATUSES])
+    active &= np.isin(intervals['table_id'], table_ids)
+
+    rows = np.searchsorted(table_ids, intervals['table_id'][active])
+    offset = intervals['day'][active] * slots_per_day
+    first_slot = offset + intervals['start'][active] // slot_minutes
+    # Un créneau entamé compte comme occupé
+    last_slot = offset + -(-intervals['end'][active] // slot_minutes)
+
+    markers = np.zeros((len(table_ids), n_days * slots_per_day + 1), dtype=np.int32)
+    np.add.at(markers, (rows, first_slot), 1)
+    np.add.at(markers, (rows, last_slot), -1)
+    return np.cumsum(markers[:, :-1], axis=1) > 0
+
+
+def compute_period_stats(first, last, slot_minutes=SLOT_MINUTES, peaks=3):
+    """
+    Compute occupancy rate (% of open table-time that is booked), peak hours
+    and number of cancellations of [first, last] in one pass over arrays.
+    """
+    slots_per_day = 24 * 60 // slot_minutes
+    n_days = (last - first).days + 1
+    table_ids = np.sort(np.fromiter(TableSaloon.objects.values_list('id', flat=True), dtype=np.int64))
+    intervals = load_intervals(first, last)
+    occupied = occupancy_matrix(intervals, table_ids, n_days, slot_minutes)
+
+    # Masque des créneaux d'ouverture, jour par jour selon les horaires (Schedule)
+    hours = weekly_opening_hours()
+    slot_minutes_of_day = np.arange(slots_per_day) * slot_minutes
+    weekly_mask = np.array([
+        (slot_minutes_of_day >= opening // 60) & (slot_minutes_of_day < closing // 60)
+        for opening, closing in hours
+    ])
+    weekdays = (first.weekday() + np.arange(n_days)) % 7
+    open_mask = weekly_mask[weekdays].reshape(-1)
+
+    open_capacity = len(table_ids) * np.count_nonzero(open_mask)
+    occupancy_rate = float(np.count_nonzero(occupied[:, open_mask])) / open_capacity if open_capacity else 0.0
+
+    # Activité par heure de la journée, toutes tables et tous jours confondus
+    per_slot = occupied.sum(axis=0).reshape(n_days, slots_per_day).sum(axis=0)
+    per_hour = per_slot.reshape(24, -1).sum(axis=1)
+    peak_hours = [int(hour) for hour in np.argsort(-per_hour, kind='stable')[:peaks] if per_hour[hour] > 0]
+
+    return {
+        'occupancy_rate': round(occupancy_rate * 100, 2),
+        'nb_annulation': int(np.count_nonzero(intervals['status'] == STATUS_CODES[Reservation.STATUS_CANCELED])),
+        'peak_hours': peak_hours,
+        'per_hour': per_hour.tolist(),
+    }
+
+
+def format_peak_hours(peak_hours):
+    """Ex. [19, 20] -> "19h-20h, 20h-21h" (valeur de Report.pics_activity)."""
+    return ", ".join(f"{hour}h-{hour + 1}h" for hour in peak_hours)
+
+
+def refresh_report(report):
+    """Renseigne occupancy_rate, nb_annulation et pics_activity du rapport à partir de sa période."""
+    first, last = report.period_bounds()
+    stats = cached_report('period-stats', first, last, lambda: compute_period_stats(first, last))
+    report.occupancy_rate = stats['occupancy_rate']
+    report.nb_annulation = stats['nb_annulation']
+    report.pics_activity = format_peak_hours(stats['peak_hours'])
+    return stats
+
+
+def demand_heatmap(first, last, table_id=None, table_type=None, resolution='hour'):
+    """
+    Bookings, covers and cancellations of [first, last] by day of week ×
+    start hour (7×24) or quarter-hour (7×96), from a single grouped
+    aggregate computed by the database.
+    """
+    reservations = Reservation.objects.filter(date__range=(first, last))
+    if table_id is not None:
+        reservations = reservations.filter(table_saloon_id=table_id)
+    if table_type:
+        reservations = reservations.filter(table_saloon__type=table_type)
+
+    active = Q(status__in=Reservation.ACTIVE_STATUSES)
+    rows = reservations.annotate(
+        weekday=ExtractIsoWeekDay('date'), hour=ExtractHour('start'), minute=ExtractMinute('start'),
+    ).values('weekday', 'hour', 'minute').annotate(
+        bookings=Count('id', filter=active),
+        covers=Coalesce(Sum('people_count', filter=active), 0),
+        cancellations=Count('id', filter=Q(status=Reservation.STATUS_CANCELED)),
+    ).order_by()
+
+    per_hour = 4 if resolution == 'quarter' else 1
+    shape = (7, 24 * per_hour)
+    matrices = {name: np.zeros(shape, dtype=np.int64) for name in ('bookings', 'covers', 'cancellations')}
+    for row in rows:
+        column = row['hour'] * per_hour + row['minute'] * per_hour // 60
+        for name, matrix in matrices.items():
+            matrix[row['weekday'] - 1, column] += row[name]
+
+    step = 60 // per_hour
+    return {
+        'resolution': resolution,
+        'weekdays': [names[0] for names in WEEKDAY_NAMES],
+        'slots': [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, 24 * 60, step)],
+        **{name: matrix.tolist() for name, matrix in matrices.items()},
+    }
+
+
+def cached_demand_heatmap(first, last, table_id=None, table_type=None, resolution='hour'):
+    """demand_heatmap mise en cache par (période, filtre de tables, résolution, version des données)."""
+    return cached_report(
+        'heatmap', first, last,
+        lambda: demand_heatmap(first, last, table_id, table_type, resolution),
+        table_id=table_id, table_type=table_type, resolution=resolution,
+    )
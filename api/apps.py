@@ -4,5 +4,5 @@ class MyAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
 
-    # def ready(self):
-    #     import api.signals  # Importez vos signaux ici
\ No newline at end of file
+    def ready(self):
+        import api.signals  # noqa: F401
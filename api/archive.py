@@ -0,0 +1,97 @@
+from datetime import date
+
+import numpy as np
+
+from api.models import Reservation, TableSaloon
+
+# Version du format, enregistrée dans l'archive
+ARCHIVE_FORMAT_VERSION = 1
+EPOCH = date(1970, 1, 1)
+STATUS_LABELS = [status for status, _ in Reservation._meta.get_field('status').choices]
+# Colonnes de l'archive (dans l'ordre du values_list) et leur type NumPy
+COLUMN_DTYPES = {
+    'id': np.int64,
+    'date': np.int32,
+    'start': np.int16,
+    'end': np.int16,
+    'people_count': np.int16,
+    'status': np.uint8,
+    'table_saloon_id': np.int32,
+    'user_id': np.int64,
+}
+
+
+def archive_chunks(first, last, chunk_size=20000):
+    """
+    Yield the reservations of [first, last] as dicts of NumPy column arrays,
+    `chunk_size` rows at a time, read through a server-side cursor.
+
+    Columns: id, user_id (int64), date (days since 1970-01-01), start/end
+    (minutes since midnight), people_count, status (index in STATUS_LABELS)
+    and table_saloon_id (-1 when none).
+    """
+    status_codes = {label: code for code, label in enumerate(STATUS_LABELS)}
+    rows = (
+        Reservation.objects.filter(date__range=(first, last))
+        .order_by('date', 'start', 'id')
+        .values_list(*COLUMN_DTYPES)
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield to_columns(chunk, status_codes)
+            chunk = []
+    if chunk:
+        yield to_columns(chunk, status_codes)
+
+
+def to_columns(rows, status_codes):
+    """Convertit un lot de lignes en tableaux par colonne (encodage dictionnaire du statut)."""
+    ids, days, starts, ends, people, statuses, tables, users = zip(*rows)
+    values = {
+        'id': ids,
+        'date': ((day - EPOCH).days for day in days),
+        'start': (t.hour * 60 + t.minute for t in starts),
+        'end': (t.hour * 60 + t.minute for t in ends),
+        'people_count': people,
+        'status': (status_codes[status] for status in statuses),
+        'table_saloon_id': (-1 if table_id is None else table_id for table_id in tables),
+        'user_id': users,
+    }
+    return {
+        name: np.fromiter(values[name], dtype=dtype, count=len(rows))
+        for name, dtype in COLUMN_DTYPES.items()
+    }
+
+
+def write_archive(first, last, output, chunk_size=20000):
+    """
+    Write the reservations of [first, last] to `output` (path or binary
+    file) as a compressed .npz: one array per column plus the dictionaries
+    decoding status codes and table ids. Returns the number of rows.
+
+    Load it with numpy.load(path); dates are np.datetime64 via
+    archive['date'].astype('datetime64[D]').
+    """
+    parts = {name: [] for name in COLUMN_DTYPES}
+    for columns in archive_chunks(first, last, chunk_size):
+        for name, values in columns.items():
+            parts[name].append(values)
+
+    columns = {
+        name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype)
+        for name, dtype in COLUMN_DTYPES.items()
+    }
+    tables = list(TableSaloon.objects.order_by('id').values_list('id', 'name'))
+    np.savez_compressed(
+        output,
+        **columns,
+        status_labels=np.array(STATUS_LABELS),
+        table_ids=np.array([table_id for table_id, _ in tables], dtype=np.int32),
+        table_names=np.array([name for _, name in tables]),
+        period=np.array([first.isoformat(), last.isoformat()]),
+        format_version=np.array(ARCHIVE_FORMAT_VERSION),
+    )
+    return len(columns['id'])
@@ -0,0 +1,178 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import time
+
+from django.db.models import Q
+
+from api.models import Reservation, Schedule, TableSaloon
+
+# Noms acceptés pour Schedule.day, indexés par date.weekday()
+WEEKDAY_NAMES = (
+    ("monday", "lundi"),
+    ("tuesday", "mardi"),
+    ("wednesday", "mercredi"),
+    ("thursday", "jeudi"),
+    ("friday", "vendredi"),
+    ("saturday", "samedi"),
+    ("sunday", "dimanche"),
+)
+DAY_SECONDS = 24 * 3600
+
+
+def to_seconds(value: time) -> int:
+    """Convertit une heure en nombre de secondes depuis minuit."""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def from_seconds(value: int) -> time:
+    """Convertit un nombre de secondes depuis minuit en heure."""
+    if value >= DAY_SECONDS:
+        return time.max.replace(microsecond=0)
+    return time(value // 3600, (value % 3600) // 60, value % 60)
+
+
+class IntervalIndex:
+    """
+    Sorted index of the busy intervals of one table/saloon for one day.
+
+    Overlapping intervals are merged on insertion so the index always holds
+    disjoint, sorted intervals: starts and ends are then both sorted and an
+    overlap test is a single bisect.
+    """
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends))
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True si [start, end) chevauche un intervalle occupé."""
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._ends[i - 1] > start
+
+    def add(self, start: int, end: int):
+        """Ajoute un intervalle occupé en fusionnant avec ses voisins."""
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def enclosing_gap(self, start: int, end: int):
+        """
+        Return the (gap_start, gap_end) free window containing [start, end),
+        bounded by the day, or None if the interval overlaps a busy one.
+        """
+        i = bisect_left(self._starts, end)
+        if i > 0 and self._ends[i - 1] > start:
+            return None
+        gap_start = self._ends[i - 1] if i > 0 else 0
+        gap_end = self._starts[i] if i < len(self._starts) else DAY_SECONDS
+        return gap_start, gap_end
+
+    def free_slots(self, opening: int, closing: int, min_length: int = 0):
+        """
+        Return the free windows of at least `min_length` seconds between
+        `opening` and `closing`, as (start, end) tuples.
+        """
+        slots = []
+        cursor = opening
+        i = bisect_right(self._ends, opening)
+        while cursor < closing:
+            if i < len(self._starts) and self._starts[i] < closing:
+                next_start, next_end = self._starts[i], self._ends[i]
+            else:
+                next_start, next_end = closing, closing
+            if next_start - cursor >= min_length and next_start > cursor:
+                slots.append((cursor, next_start))
+            cursor = max(cursor, next_end)
+            i += 1
+        return slots
+
+
+def build_day_index(date, table_ids=None):
+    """
+    Load every non-canceled reservation of `date` in a single query and
+    return a mapping {table_saloon_id: IntervalIndex}.
+    """
+    reservations = Reservation.objects.filter(
+        date=date,
+        status__in=Reservation.ACTIVE_STATUSES,
+        table_saloon__isnull=False,
+    )
+    if table_ids is not None:
+        reservations = reservations.filter(table_saloon_id__in=table_ids)
+
+    intervals = defaultdict(list)
+    for table_id, start, end in reservations.values_list('table_saloon_id', 'start', 'end'):
+        intervals[table_id].append((to_seconds(start), to_seconds(end)))
+
+    return defaultdict(IntervalIndex, {
+        table_id: IntervalIndex(busy) for table_id, busy in intervals.items()
+    })
+
+
+def rank_tables(date, start, end, people_count, table_type=None):
+    """
+    Return the available tables/saloons free on [start, end) of `date`,
+    best fit first: smallest capacity, then the tightest free window so the
+    evening stays as little fragmented as possible.
+    Two queries whatever the number of tables.
+    """
+    tables = TableSaloon.objects.filter(capacity__gte=people_count, status="available")
+    if table_type:
+        tables = tables.filter(type=table_type)
+    tables = list(tables)
+    index = build_day_index(date, table_ids=[table.id for table in tables])
+
+    start, end = to_seconds(start), to_seconds(end)
+    ranked = []
+    for table in tables:
+        gap = index[table.id].enclosing_gap(start, end)
+        if gap is None:
+            continue
+        slack = (gap[1] - gap[0]) - (end - start)
+        ranked.append(((table.capacity, slack, table.id), table))
+    ranked.sort(key=lambda item: item[0])
+    return [table for _, table in ranked]
+
+
+def weekly_opening_hours():
+    """
+    Return the (opening, closing) bounds in seconds of each weekday (index
+    date.weekday()), reading every Schedule in a single query. Days without
+    a schedule cover the whole day.
+    """
+    schedules = {schedule.day.strip().lower(): schedule for schedule in Schedule.objects.all()}
+    hours = []
+    for names in WEEKDAY_NAMES:
+        schedule = next((schedules[name] for name in names if name in schedules), None)
+        if schedule is None or schedule.end_time <= schedule.start_time:
+            hours.append((0, DAY_SECONDS))
+        else:
+            hours.append((to_seconds(schedule.start_time), to_seconds(schedule.end_time)))
+    return hours
+
+
+def opening_hours(date):
+    """
+    Return the (opening, closing) bounds of `date` in seconds, read from the
+    Schedule of that weekday. Falls back to the whole day when no schedule
+    is defined.
+    """
+    lookup = Q()
+    for name in WEEKDAY_NAMES[date.weekday()]:
+        lookup |= Q(day__iexact=name)
+    schedule = Schedule.objects.filter(lookup).first()
+    if schedule is None or schedule.end_time <= schedule.start_time:
+        return 0, DAY_SECONDS
+    return to_seconds(schedule.start_time), to_seconds(schedule.end_time)
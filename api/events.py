@@ -0,0 +1,189 @@
+import asyncio
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+from itertools import count
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+# Evénements en attente par connexion ; au-delà, le client est invité à se resynchroniser
+SUBSCRIBER_QUEUE_SIZE = 100
+# Commentaire SSE envoyé en l'absence d'événement (garde la connexion ouverte derrière les proxys)
+KEEPALIVE_SECONDS = 15
+RESYNC = ("resync", {})
+
+
+class Subscriber(ABC):
+    """
+    One SSE connection. Events are kept in a bounded queue: when the client
+    cannot keep up, pending deltas are dropped and replaced by a single
+    'resync' event telling it to reload the full state.
+    """
+
+    def __init__(self, date=None):
+        self.date = date
+
+    def accepts(self, name, payload):
+        return self.date is None or payload.get('date') in (None, self.date)
+
+    @abstractmethod
+    def offer(self, event):
+        """Met l'événement en file sans bloquer l'émetteur."""
+
+
+class AsyncSubscriber(Subscriber):
+    """Connexion servie par ASGI : file asyncio alimentée depuis n'importe quel thread."""
+
+    def __init__(self, date=None):
+        super().__init__(date)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Boucle fermée : la connexion est terminée
+            broadcaster.unsubscribe(self)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ThreadSubscriber(Subscriber):
+    """Connexion servie par WSGI : un thread de worker attend sur une file bornée."""
+
+    def __init__(self, date=None):
+        super().__init__(date)
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.lock = threading.Lock()
+
+    def offer(self, event):
+        with self.lock:
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.queue.put_nowait(RESYNC)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broadcaster:
+    """
+    In-process fan-out of availability deltas to the connected SSE clients.
+    Each worker process has its own broadcaster: clients only receive the
+    changes made through the process serving them.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, name, payload):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        event = (name, payload)
+        for subscriber in subscribers:
+            if subscriber.accepts(name, payload):
+                subscriber.offer(event)
+
+
+broadcaster = Broadcaster()
+
+
+def format_event(event, event_id):
+    name, payload = event
+    data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {name}\ndata: {data}\n\n"
+
+
+async def async_event_stream(date=None):
+    """
+    Flux SSE pour ASGI (itérateur asynchrone de StreamingHttpResponse).
+    L'abonnement est créé à la première itération, dans la boucle d'événements
+    du serveur, et non dans le thread de la vue synchrone.
+    """
+    subscriber = broadcaster.subscribe(AsyncSubscriber(date))
+    try:
+        yield "retry: 3000\n\n"
+        event_ids = count(1)
+        while True:
+            event = await subscriber.get(KEEPALIVE_SECONDS)
+            yield ": keep-alive\n\n" if event is None else format_event(event, next(event_ids))
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+def event_stream(date=None):
+    """Flux SSE pour WSGI : occupe un thread de worker pendant toute la connexion."""
+    subscriber = broadcaster.subscribe(ThreadSubscriber(date))
+    try:
+        yield "retry: 3000\n\n"
+        event_ids = count(1)
+        while True:
+            event = subscriber.get(KEEPALIVE_SECONDS)
+            yield ": keep-alive\n\n" if event is None else format_event(event, next(event_ids))
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+# --- Publication (après commit : une modification annulée n'est jamais diffusée) ---
+
+def reservation_payload(reservation):
+    return {
+        'id': reservation.pk,
+        'table': reservation.table_saloon_id,
+        'date': reservation.date.isoformat(),
+        'start': reservation.start.strftime('%H:%M'),
+        'end': reservation.end.strftime('%H:%M'),
+        'status': reservation.status,
+    }
+
+
+def publish_reservations(reservations, deleted=False):
+    """Diffuse l'état de réservations créées/modifiées (ou leur suppression)."""
+    if deleted:
+        payloads = [
+            {'id': r.pk, 'table': r.table_saloon_id, 'date': r.date.isoformat()} for r in reservations
+        ]
+    else:
+        payloads = [reservation_payload(r) for r in reservations]
+    name = 'reservation_deleted' if deleted else 'reservation'
+    transaction.on_commit(lambda: [broadcaster.publish(name, payload) for payload in payloads])
+
+
+def publish_table(table, deleted=False):
+    """Diffuse le statut d'une table/salon (TableSaloon.update_availability, admin, API)."""
+    if deleted:
+        payload = {'id': table.pk, 'status': None}
+    else:
+        payload = {'id': table.pk, 'status': table.status, 'capacity': table.capacity, 'type': table.type}
+    transaction.on_commit(lambda: broadcaster.publish('table', payload))
@@ -0,0 +1,135 @@
+import re
+import time as timer
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from api.models import Reservation, TableSaloon, User
+
+# Créneaux qui ne se chevauchent pas, pour respecter la contrainte d'exclusion
+SLOTS = [(time(12), time(14)), (time(14), time(16)), (time(19), time(21)), (time(21), time(23))]
+# Répartition des statuts : 3 en attente, 1 terminée, 1 annulée
+STATUSES = ["pending", "pending", "pending", "completed", "canceled"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large reservation table and print EXPLAIN ANALYZE timings of the "
+        "reservation hot-path queries without and with the composite indexes. "
+        "Everything runs in a transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help='Number of reservations to seed (default: 200000)')
+        parser.add_argument('--tables', type=int, default=50, help='Number of tables/saloons to seed (default: 50)')
+        parser.add_argument('--users', type=int, default=2000, help='Number of users to seed (default: 2000)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size (default: 5000)')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("✔ Benchmark terminé, données de test annulées (rollback)"))
+
+    def run(self, options):
+        started = timer.perf_counter()
+        users, tables = self.seed(options)
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {options['rows']} réservations créées en {timer.perf_counter() - started:.1f}s"
+        ))
+
+        today = date.today()
+        user_id = users[len(users) // 2].id
+        table_id = tables[0].id
+        queries = {
+            "overlap (write path)": Reservation.objects.filter(
+                table_saloon_id=table_id, date=today, status__in=Reservation.ACTIVE_STATUSES,
+                start__lt=time(15), end__gt=time(13),
+            ),
+            "availability (day index)": Reservation.objects.filter(
+                date=today, status__in=Reservation.ACTIVE_STATUSES, table_saloon_id__in=[t.id for t in tables],
+            ).values_list('table_saloon_id', 'start', 'end'),
+            "today": Reservation.objects.filter(date=today, status__in=Reservation.ACTIVE_STATUSES)[:10],
+            "upcoming": Reservation.objects.filter(date__gte=today, status__in=Reservation.ACTIVE_STATUSES)[:10],
+            "active": Reservation.objects.filter(status__in=Reservation.ACTIVE_STATUSES)[:10],
+            "my_reservations": Reservation.objects.filter(user_id=user_id)[:10],
+            "upcoming (client)": Reservation.objects.filter(
+                user_id=user_id, date__gte=today, status__in=Reservation.ACTIVE_STATUSES,
+            )[:10],
+        }
+
+        indexes = Reservation._meta.indexes
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Reservation, index)
+        before = self.explain_all(queries, "Sans index composites")
+
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Reservation, index)
+        after = self.explain_all(queries, "Avec index composites")
+
+        self.stdout.write(self.style.NOTICE("\n=== Résumé (Execution Time, ms) ==="))
+        for label in queries:
+            self.stdout.write(f"{label:<28} {before[label]:>10.3f} -> {after[label]:>10.3f}")
+
+    def seed(self, options):
+        """Crée utilisateurs, tables et réservations en masse."""
+        User.objects.bulk_create(
+            [User(email=f"bench{i}@benchmark.local", password="!") for i in range(options['users'])],
+            batch_size=options['batch_size'],
+        )
+        users = list(User.objects.filter(email__endswith="@benchmark.local").only('id'))
+        TableSaloon.objects.bulk_create(
+            [TableSaloon(name=f"Bench {i}", capacity=2 + i % 8, type="table") for i in range(options['tables'])]
+        )
+        tables = list(TableSaloon.objects.filter(name__startswith="Bench ").only('id'))
+
+        # Les réservations sont étalées autour d'aujourd'hui (moitié passé, moitié futur)
+        per_day = len(tables) * len(SLOTS)
+        first_day = date.today() - timedelta(days=options['rows'] // per_day // 2)
+        batch = []
+        for i in range(options['rows']):
+            day, rest = divmod(i, per_day)
+            table_index, slot_index = divmod(rest, len(SLOTS))
+            start, end = SLOTS[slot_index]
+            batch.append(Reservation(
+                date=first_day + timedelta(days=day),
+                start=start,
+                end=end,
+                people_count=2,
+                status=STATUSES[i % len(STATUSES)],
+                user_id=users[i % len(users)].id,
+                table_saloon_id=tables[table_index].id,
+            ))
+            if len(batch) >= options['batch_size']:
+                Reservation.objects.bulk_create(batch)
+                batch = []
+        Reservation.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            # Vérifie les clés étrangères différées maintenant, sinon PostgreSQL
+            # refuse de modifier les index de la table dans la même transaction.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"ANALYZE {Reservation._meta.db_table}")
+        return users, tables
+
+    def explain_all(self, queries, title):
+        """Exécute EXPLAIN ANALYZE pour chaque requête et renvoie les temps d'exécution."""
+        self.stdout.write(self.style.NOTICE(f"\n=== {title} ==="))
+        timings = {}
+        for label, queryset in queries.items():
+            plan = queryset.explain(analyze=True)
+            match = re.search(r"Execution Time: ([\d.]+) ms", plan)
+            timings[label] = float(match.group(1)) if match else float('nan')
+            self.stdout.write(f"{label:<28} {timings[label]:>10.3f} ms  {plan.splitlines()[0].strip()}")
+            if self.verbosity >= 2:
+                self.stdout.write(plan)
+        return timings
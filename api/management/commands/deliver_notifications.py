@@ -0,0 +1,37 @@
+import time as timer
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.notificationDelivery import deliver_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending notifications (outbox) in batches. Each batch is claimed "
+        "with FOR UPDATE SKIP LOCKED and sent concurrently with asyncio; failures "
+        "are retried with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Notifications claimed per batch (default: 100)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Deliveries in flight at once (default: 10)')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds between polls when idle (default: 5)')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as no notification is due')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        try:
+            while True:
+                claimed, sent, retried, failed = deliver_batch(options['batch_size'], concurrency)
+                if claimed:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"✔ {sent} envoyée(s), {retried} à relancer, {failed} en échec définitif"
+                    ))
+                    continue
+                if options['once']:
+                    break
+                # Inactif : libère une connexion trop ancienne ou cassée avant d'attendre
+                close_old_connections()
+                timer.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("⚠ Arrêt demandé"))
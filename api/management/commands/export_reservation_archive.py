@@ -0,0 +1,34 @@
+import os
+import time as timer
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from api.archive import write_archive
+
+
+class Command(BaseCommand):
+    help = "Write the reservations of a date range to a compressed columnar archive (.npz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='first', required=True, help='First date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='last', required=True, help='Last date (YYYY-MM-DD)')
+        parser.add_argument('--output', required=True, help='Path of the .npz file to write')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows fetched per chunk (default: 20000)')
+
+    def handle(self, *args, **options):
+        try:
+            first, last = date.fromisoformat(options['first']), date.fromisoformat(options['last'])
+        except ValueError as exc:
+            raise CommandError(f"Date invalide : {exc}")
+        if last < first:
+            raise CommandError("--to doit être postérieure à --from")
+
+        output = options['output']
+        if not output.endswith('.npz'):
+            output += '.npz'
+        started = timer.perf_counter()
+        rows = write_archive(first, last, output, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {rows} réservation(s) archivée(s) dans {output} "
+            f"({os.path.getsize(output) / 1024:.1f} Ko, {timer.perf_counter() - started:.1f}s)"
+        ))
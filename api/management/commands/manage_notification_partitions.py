@@ -0,0 +1,41 @@
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain the monthly partitions of the notification table: create the "
+        "coming months and drop (optionally archive) the partitions past the "
+        "retention period. Meant to run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help='Months to create in advance (default: 3)')
+        parser.add_argument(
+            '--retention-months', type=int, default=settings.NOTIFICATION_RETENTION_MONTHS,
+            help='Months of notifications to keep, 0 to keep everything (default: NOTIFICATION_RETENTION_MONTHS)',
+        )
+        parser.add_argument('--archive-dir', help='Copy each dropped partition to <dir>/<partition>.csv.gz first')
+
+    def handle(self, *args, **options):
+        if options['ahead'] < 0 or options['retention_months'] < 0:
+            raise CommandError("--ahead et --retention-months doivent être positifs")
+
+        for name in partitions.ensure_partitions(options['ahead']):
+            self.stdout.write(self.style.SUCCESS(f"✔ Partition {name} créée"))
+
+        if not options['retention_months']:
+            return
+        current = partitions.month_start(timezone.now().astimezone(dt_timezone.utc))
+        cutoff = partitions.add_months(current, -options['retention_months'])
+        dropped = partitions.drop_partitions_before(cutoff, archive_dir=options['archive_dir'])
+        for name in dropped:
+            action = f"archivée dans {options['archive_dir']} et supprimée" if options['archive_dir'] else "supprimée"
+            self.stdout.write(self.style.WARNING(f"⚠ Partition {name} {action}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {len(dropped)} partition(s) antérieure(s) à {cutoff:%Y-%m} supprimée(s)"
+        ))
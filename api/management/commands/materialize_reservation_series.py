@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from api.models import ReservationSeries
+
+
+class Command(BaseCommand):
+    help = "Create the upcoming occurrences of recurring reservations (rolling window, run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ReservationSeries.WINDOW_DAYS,
+            help=f'Size of the rolling window in days (default: {ReservationSeries.WINDOW_DAYS})'
+        )
+
+    def handle(self, *args, **options):
+        horizon = timezone.localdate() + timedelta(days=options['days'])
+
+        # Séries actives dont la fenêtre n'atteint pas encore l'horizon
+        pending = ReservationSeries.objects.filter(status=ReservationSeries.STATUS_ACTIVE).filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=horizon)
+        ).exclude(until__lt=timezone.localdate())
+
+        total_created = total_skipped = 0
+        for series in pending.iterator():
+            created, skipped = series.materialize(horizon=horizon)
+            total_created += len(created)
+            total_skipped += len(skipped)
+            for day in skipped:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠ Série {series.pk} : occurrence du {day} ignorée (table/salon déjà réservée)"
+                ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {total_created} occurrence(s) créée(s), {total_skipped} ignorée(s) jusqu'au {horizon}"
+        ))
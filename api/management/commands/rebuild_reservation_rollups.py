@@ -0,0 +1,28 @@
+import time as timer
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from api import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily reservation rollup (DailyReservationRollup) from the reservations table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='first', help='First date to rebuild (YYYY-MM-DD, default: all)')
+        parser.add_argument('--to', dest='last', help='Last date to rebuild (YYYY-MM-DD, default: all)')
+
+    def handle(self, *args, **options):
+        try:
+            first = date.fromisoformat(options['first']) if options['first'] else None
+            last = date.fromisoformat(options['last']) if options['last'] else None
+        except ValueError as exc:
+            raise CommandError(f"Date invalide : {exc}")
+        if first and last and last < first:
+            raise CommandError("--to doit être postérieure à --from")
+
+        started = timer.perf_counter()
+        written = rollups.rebuild(first, last)
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {written} ligne(s) d'agrégat reconstruite(s) en {timer.perf_counter() - started:.1f}s"
+        ))
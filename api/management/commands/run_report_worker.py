@@ -0,0 +1,75 @@
+import multiprocessing
+import time as timer
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.models import ReportJob
+from api.reportJobs import STALE_AFTER, claim_jobs, requeue_stale_jobs, run_report_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued report jobs. Jobs are claimed from the database with "
+        "SELECT ... FOR UPDATE SKIP LOCKED (several workers can run side by side) "
+        "and computed in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Size of the process pool (default: 2)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between polls when idle (default: 2)')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as the queue is empty')
+        parser.add_argument(
+            '--stale-minutes', type=int, default=int(STALE_AFTER.total_seconds() // 60),
+            help='Requeue running jobs started more than N minutes ago (default: 60)'
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(timedelta(minutes=options['stale_minutes']))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"⚠ {requeued} job(s) abandonné(s) remis en file"))
+
+        processes = max(1, options['processes'])
+        running = {}
+        # spawn : les processus n'héritent pas des connexions PostgreSQL du parent ;
+        # django.setup() s'exécute avant le chargement de api.reportJobs dans l'enfant.
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as pool:
+            try:
+                while True:
+                    for job_id in claim_jobs(processes - len(running)) if len(running) < processes else []:
+                        running[pool.submit(run_report_job, job_id)] = job_id
+                        self.stdout.write(f"→ Job {job_id} démarré")
+
+                    if not running:
+                        if options['once']:
+                            break
+                        # Inactif : libère une connexion trop ancienne ou cassée avant d'attendre
+                        close_old_connections()
+                        timer.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.report(running.pop(future), future)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING("⚠ Arrêt demandé, attente des jobs en cours..."))
+                for future in wait(running).done:
+                    self.report(running.pop(future), future)
+
+    def report(self, job_id, future):
+        try:
+            status = future.result()
+        except Exception as exc:
+            # Le processus a échoué avant de pouvoir enregistrer l'erreur
+            ReportJob.objects.filter(pk=job_id).update(status=ReportJob.STATUS_FAILED, error=str(exc))
+            status = ReportJob.STATUS_FAILED
+        if status == ReportJob.STATUS_DONE:
+            self.stdout.write(self.style.SUCCESS(f"✔ Job {job_id} terminé"))
+        else:
+            self.stdout.write(self.style.ERROR(f"✘ Job {job_id} en échec"))
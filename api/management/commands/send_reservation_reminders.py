@@ -0,0 +1,96 @@
+import time as timer
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from api.models import Notification, NotificationLedger, Reservation
+from api.unread import record_created
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a reminder notification for every pending reservation of a day "
+        "(tomorrow by default). Idempotent: a reservation is reminded at most once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day of the reservations to remind (YYYY-MM-DD, default: tomorrow)')
+        parser.add_argument('--type', choices=['email', 'sms'], default='email', help='Channel (default: email)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create (default: 5000)')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate() + timedelta(days=1)
+        except ValueError as exc:
+            raise CommandError(f"Date invalide : {exc}")
+
+        started = timer.perf_counter()
+        with transaction.atomic():
+            # Une seule exécution à la fois pour un même jour : la suivante attend
+            # la fin de celle-ci, puis ne voit plus que les réservations non rappelées.
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"reservation_reminders:{day}"])
+            total = self.create_reminders(day, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {total} rappel(s) créé(s) pour le {day} en {timer.perf_counter() - started:.1f}s"
+        ))
+
+    def create_reminders(self, day, options):
+        # Registre indexé (réservation, nature) : la table Notification partitionnée n'a pas cette clé
+        already_reminded = NotificationLedger.objects.filter(
+            reservation=OuterRef('pk'), kind=Notification.KIND_REMINDER
+        )
+        # Une seule requête (jointures user et table_saloon), lue par curseur serveur
+        rows = (
+            Reservation.objects.filter(date=day, status=Reservation.STATUS_PENDING)
+            .exclude(Exists(already_reminded))
+            .values_list('id', 'user_id', 'user__first_name', 'start', 'end', 'table_saloon__name')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        now = timezone.now()
+        total = 0
+        batch = []
+        for reservation_id, user_id, first_name, start, end, table_name in rows:
+            greeting = f"Bonjour {first_name}, " if first_name else "Bonjour, "
+            place = f" ({table_name})" if table_name else ""
+            batch.append(Notification(
+                type=options['type'],
+                kind=Notification.KIND_REMINDER,
+                message=f"{greeting}rappel de votre réservation du {day} de {start:%H:%M} à {end:%H:%M}{place}.",
+                sending_date=now,
+                reservation_id=reservation_id,
+                user_id=user_id,
+            ))
+            if len(batch) >= options['chunk_size']:
+                total += self.flush(batch)
+                batch = []
+        total += self.flush(batch)
+        return total
+
+    @staticmethod
+    def flush(batch):
+        """Insère un lot et renvoie le nombre de rappels réellement créés."""
+        if not batch:
+            return 0
+        # Clé unique (réservation, nature) : les réservations déjà rappelées, quel
+        # que soit l'auteur du rappel, sont écartées et ne reviennent pas du RETURNING
+        table = connection.ops.quote_name(NotificationLedger._meta.db_table)
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (reservation_id, kind, created_at) VALUES {placeholders}
+                ON CONFLICT (reservation_id, kind) DO NOTHING
+                RETURNING reservation_id
+                """,
+                [value for n in batch for value in (n.reservation_id, n.kind, n.sending_date)],
+            )
+            recorded = {row[0] for row in cursor.fetchall()}
+        inserted = Notification.objects.bulk_create([n for n in batch if n.reservation_id in recorded])
+        # bulk_create n'envoie pas post_save : compteurs de non lues mis à jour ici
+        record_created(inserted)
+        return len(inserted)
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.models import CatalogVersion
+
+
+def bump_menu_version():
+    """
+    Increment the menu catalog version with one upsert, in the caller's
+    transaction: ETags and cached bodies change together with the data.
+    """
+    table = connection.ops.quote_name(CatalogVersion._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (name, version, updated_at) VALUES (%s, 1, now())
+            ON CONFLICT (name) DO UPDATE SET version = {table}.version + 1, updated_at = now()
+            """,
+            [CatalogVersion.MENUS],
+        )
+
+
+def menu_catalog_version():
+    """(version, date de dernière modification) du catalogue : une requête par clé primaire."""
+    row = CatalogVersion.objects.filter(name=CatalogVersion.MENUS).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def cached_menu_response(request, key, render, exists=None, timeout=None):
+    """
+    Serve a menu catalog GET from the catalog version alone when possible:
+    - 304 Not Modified when If-None-Match / If-Modified-Since still match;
+    - otherwise the JSON body pre-rendered for this version, from the cache
+      (no query on the menus, no serialization);
+    - on a miss, render() returns the serialized data (it may raise Http404).
+    `exists` (detail views) is checked before any 304 unless a body is cached
+    for the current version: a deleted or unknown menu is a 404, never a 304.
+    `timeout` bounds the lifetime of the cached body (None: until the next
+    version, for a bounded set of keys).
+    Only JSON bodies are cached: other renderers (browsable API) get a
+    regular Response carrying the same validators.
+    """
+    version, updated_at = menu_catalog_version()
+    etag = f'"{key}-v{version}"'
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    json_only = isinstance(request.accepted_renderer, JSONRenderer)
+    cache_key = f"menus:{key}:v{version}"
+    body = cache.get(cache_key) if json_only else None
+    if body is None and exists is not None and not exists():
+        raise Http404
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None and not json_only:
+        response = Response(render())
+    elif response is None:
+        if body is None:
+            body = JSONRenderer().render(render())
+            cache.set(cache_key, body, timeout)
+        response = HttpResponse(body, content_type='application/json')
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Toujours revalider : le 304 évite de retransférer le corps
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,62 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from api.models import Menu
+from api.models.menus import SEARCH_CONFIG, search_vector
+
+
+def filter_menus(params, with_country=True):
+    """
+    Menus matching the validated search parameters (MenuSearchQuerySerializer).
+    `q` matches the full-text document of name + description (GIN index
+    menu_search_idx) or, for typos and partial words, the trigram index of
+    the name.
+    """
+    menus = Menu.objects.all()
+    if with_country and params.get('country'):
+        menus = menus.filter(country=params['country'])
+    if 'min_price' in params:
+        menus = menus.filter(price__gte=params['min_price'])
+    if 'max_price' in params:
+        menus = menus.filter(price__lte=params['max_price'])
+    if 'min_rate' in params:
+        menus = menus.filter(rate__gte=params['min_rate'])
+
+    q = params.get('q', '').strip()
+    if q:
+        menus = menus.alias(document=search_vector()).filter(
+            Q(document=search_query(q)) | Q(name__trigram_word_similar=q)
+        )
+    return menus
+
+
+def search_query(q):
+    return SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def search_menus(params):
+    """
+    Filtered menus, most relevant first: the best of the full-text rank and
+    the trigram similarity of the name, then the best rated.
+    """
+    menus = filter_menus(params).select_related('user')
+    q = params.get('q', '').strip()
+    if not q:
+        return menus.order_by('-rate', 'id')
+    relevance = Greatest(SearchRank(F('document'), search_query(q)), TrigramWordSimilarity(q, 'name'))
+    return menus.annotate(relevance=relevance).order_by('-relevance', '-rate', 'id')
+
+
+def country_facets(params):
+    """
+    Number of matching menus per country, in one grouped query. The country
+    filter itself is ignored so every country of the other criteria is listed.
+    """
+    rows = (
+        filter_menus(params, with_country=False)
+        .values('country')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'country')
+    )
+    return [{'country': row['country'], 'count': row['count']} for row in rows]
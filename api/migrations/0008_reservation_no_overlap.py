@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:58
+
+import api.models.reservations
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_tablesaloon_img'),
+    ]
+
+    operations = [
+        # Nécessaire pour utiliser l'opérateur = sur table_saloon_id dans un index GiST
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status', 'canceled'), _negated=True), expressions=[(models.F('table_saloon'), '='), (api.models.reservations.TsRange(api.models.reservations.DateTimeOf(models.F('date'), models.F('start')), api.models.reservations.DateTimeOf(models.F('date'), models.F('end')), models.Value('[)')), '&&')], name='reservation_no_overlap', violation_error_message='La table/salon est déjà réservée sur cet intervalle.'),
+        ),
+    ]
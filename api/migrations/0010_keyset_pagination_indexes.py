@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_reservation_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['sending_date', 'id'], name='notification_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'start', 'id'], name='reservation_keyset_idx'),
+        ),
+    ]
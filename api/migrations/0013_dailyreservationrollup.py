@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    """Remplit l'agrégat à partir des réservations existantes (voir api.rollups.rebuild)."""
+    Reservation = apps.get_model('api', 'Reservation')
+    DailyReservationRollup = apps.get_model('api', 'DailyReservationRollup')
+    aggregates = Reservation.objects.filter(table_saloon__isnull=False).values(
+        'date', 'table_saloon_id', 'status'
+    ).annotate(
+        n=Count('id'),
+        total_covers=Sum('people_count'),
+        duration=Sum(ExpressionWrapper(F('end') - F('start'), output_field=DurationField())),
+    ).order_by()
+    DailyReservationRollup.objects.bulk_create([
+        DailyReservationRollup(
+            date=row['date'],
+            table_saloon_id=row['table_saloon_id'],
+            status=row['status'],
+            count=row['n'],
+            covers=row['total_covers'],
+            booked_minutes=int(row['duration'].total_seconds()) // 60,
+        )
+        for row in aggregates
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_reservationseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReservationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('covers', models.IntegerField(default=0)),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('table_saloon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='api.tablesaloon')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'table_saloon', 'status'), name='rollup_date_table_status_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
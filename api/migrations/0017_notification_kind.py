@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('reminder', 'Reminder')], default='', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('reservation__isnull', False), models.Q(('kind', ''), _negated=True)), fields=('reservation', 'kind'), name='notification_reservation_kind_uniq'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    """Les notifications existantes sont non lues : initialise les compteurs."""
+    Notification = apps.get_model('api', 'Notification')
+    UnreadNotificationCounter = apps.get_model('api', 'UnreadNotificationCounter')
+    counts = Notification.objects.values('user_id').annotate(n=Count('id')).order_by()
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=row['user_id'], unread=row['n']) for row in counts],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_notification_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadNotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'sending_date', 'id'], name='notification_user_date_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
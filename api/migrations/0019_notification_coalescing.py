@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_notification_read_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationRateBucket',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_bucket', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('tokens', models.FloatField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='coalesced',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
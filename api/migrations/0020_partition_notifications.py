@@ -0,0 +1,110 @@
+from datetime import date, datetime, timezone
+
+from django.db import migrations
+
+TABLE = 'api_notification'
+# Mois créés d'avance ; au-delà, manage_notification_partitions prend le relais
+MONTHS_AHEAD = 3
+
+# Index et clés étrangères recréés sur la table partitionnée, sous les noms générés par Django
+INDEXES = [
+    ('api_notification_reservation_id_3104d179', '(reservation_id)'),
+    ('api_notification_user_id_6cede59e', '(user_id)'),
+    ('notification_keyset_idx', '(sending_date, id)'),
+    ('notification_user_date_idx', '(user_id, sending_date, id)'),
+    (
+        'notification_outbox_idx',
+        "(next_attempt_at) WHERE delivery_status IN ('pending', 'sending')",
+    ),
+]
+FOREIGN_KEYS = [
+    ('api_notification_reservation_id_3104d179_fk_api_reservation_id', 'reservation_id', 'api_reservation'),
+    ('api_notification_user_id_6cede59e_fk_api_user_id', 'user_id', 'api_user'),
+]
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def rebuild_table(schema_editor, partitioned):
+    """
+    Recreate api_notification (partitioned by month of sending_date, or as a
+    plain table for the reverse migration) and copy the rows over.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old")
+        partition_clause = "PARTITION BY RANGE (sending_date)" if partitioned else ""
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {TABLE}_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS) {partition_clause}"
+        )
+        # La valeur de id vient de la séquence de l'ancienne table, recréée plus bas
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT")
+
+        if partitioned:
+            cursor.execute(
+                f"SELECT min(sending_date AT TIME ZONE 'UTC')::date, now() AT TIME ZONE 'UTC' FROM {TABLE}_old"
+            )
+            oldest, now = cursor.fetchone()
+            month = date((oldest or now).year, (oldest or now).month, 1)
+            last = add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+            while month <= last:
+                end = add_months(month, 1)
+                cursor.execute(
+                    f"CREATE TABLE {TABLE}_p{month.year:04d}_{month.month:02d} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+                     datetime(end.year, end.month, 1, tzinfo=timezone.utc)],
+                )
+                month = end
+            # Lignes hors des mois créés (dates très éloignées) : rangées par la commande de maintenance
+            cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_old")
+        cursor.execute(f"DROP TABLE {TABLE}_old")
+
+        if partitioned:
+            # Séquence classique : identité non supportée sur une table partitionnée avant PostgreSQL 17
+            cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+            cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        else:
+            cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), coalesce(max(id), 0) + 1, false) FROM {TABLE}"
+        )
+        # La clé primaire d'une table partitionnée doit contenir la clé de partition
+        primary_key = "(id, sending_date)" if partitioned else "(id)"
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY {primary_key}")
+        for name, columns in INDEXES:
+            cursor.execute(f"CREATE INDEX {name} ON {TABLE} {columns}")
+        for name, column, target in FOREIGN_KEYS:
+            cursor.execute(
+                f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+                f"REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+
+
+def partition(apps, schema_editor):
+    rebuild_table(schema_editor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    rebuild_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_notification_coalescing'),
+    ]
+
+    operations = [
+        # Une contrainte unique d'une table partitionnée doit inclure sending_date :
+        # l'unicité (réservation, nature) est reprise par NotificationLedger (0023).
+        migrations.RemoveConstraint(
+            model_name='notification',
+            name='notification_reservation_kind_uniq',
+        ),
+        migrations.RunPython(partition, unpartition),
+    ]
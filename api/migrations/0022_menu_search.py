@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_catalog_version'),
+    ]
+
+    operations = [
+        # Opérateurs et classes d'index trigrammes (gin_trgm_ops, %)
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='menu',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('description', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), name='menu_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='menu_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['price'], name='menu_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['rate'], name='menu_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['country'], name='menu_country_idx'),
+        ),
+    ]
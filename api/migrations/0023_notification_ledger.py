@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    """Enregistre les rappels déjà créés, pour ne pas les renvoyer."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO api_notificationledger (reservation_id, kind, created_at)
+            SELECT reservation_id, kind, min(sending_date) FROM api_notification
+            WHERE reservation_id IS NOT NULL AND kind <> ''
+            GROUP BY reservation_id, kind
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_menu_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_ledger', to='api.reservation')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('reservation', 'kind'), name='notification_ledger_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
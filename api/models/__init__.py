@@ -4,4 +4,13 @@ from .tableSaloons import TableSaloon
 from .menus import Menu
 from .notifications import Notification
 from .schedules import Schedule
-from .reports import Report
\ No newline at end of file
+from .reports import Report
+from .waitlists import WaitlistEntry
+from .reservationSeries import ReservationSeries
+from .dailyRollups import DailyReservationRollup
+from .reportJobs import ReportJob
+from .dataVersions import ReportDataVersion
+from .notificationCounters import UnreadNotificationCounter
+from .notificationBuckets import NotificationRateBucket
+from .catalogVersions import CatalogVersion
+from .notificationLedger import NotificationLedger
@@ -0,0 +1,18 @@
+from django.db import models
+from django.utils import timezone
+
+
+class CatalogVersion(models.Model):
+    """
+    Version d'un catalogue rarement modifié (les menus), incrémentée à chaque
+    écriture. Elle sert d'ETag / Last-Modified et de clé au cache des corps
+    de réponse pré-rendus (voir api/menuCache.py).
+    """
+    MENUS = "menus"
+
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,25 @@
+from django.db import models
+from .tableSaloons import TableSaloon
+
+
+class DailyReservationRollup(models.Model):
+    """
+    Agrégat journalier des réservations par (date, table/salon, statut),
+    maintenu incrémentalement par les signaux de Reservation (api/signals.py)
+    et reconstruit par la commande rebuild_reservation_rollups.
+    """
+    date = models.DateField()
+    table_saloon = models.ForeignKey(TableSaloon, on_delete=models.CASCADE, related_name="daily_rollups")
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    covers = models.IntegerField(default=0)
+    booked_minutes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Cible de l'upsert (INSERT ... ON CONFLICT) ; sert aussi les lectures par période
+            models.UniqueConstraint(fields=["date", "table_saloon", "status"], name="rollup_date_table_status_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.table_saloon_id} {self.status} : {self.count}"
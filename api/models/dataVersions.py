@@ -0,0 +1,19 @@
+from datetime import date
+
+from django.db import models
+
+
+class ReportDataVersion(models.Model):
+    """
+    Version des données d'une date, incrémentée à chaque écriture sur une
+    réservation de cette date. Les résultats de rapports sont mis en cache
+    sous la somme des versions de leur période (voir api/reportCache.py).
+    """
+    # Ligne réservée à la version du catalogue (tables/salons et horaires)
+    CATALOG_DATE = date.min
+
+    date = models.DateField(unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} v{self.version}"
@@ -1,6 +1,20 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from .users import User
 
+# Langue de la recherche plein texte ; l'index menu_search_idx porte sur cette expression exacte
+SEARCH_CONFIG = "english"
+
+
+def search_vector():
+    """Document de recherche d'un menu : le nom pèse plus que la description."""
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+    )
+
+
 class MenuManager(models.Manager):
     def create_from_json(self, data, user):
         """Crée une entrée de menu à partir des données JSON et d'un utilisateur."""
@@ -30,4 +44,13 @@ class Menu(models.Model):
 
     class Meta:
         verbose_name = "Menu"
-        verbose_name_plural = "Menus"
\ No newline at end of file
+        verbose_name_plural = "Menus"
+        indexes = [
+            # Recherche plein texte (api/menuSearch.py)
+            GinIndex(search_vector(), name="menu_search_idx"),
+            # Recherche approchée sur le nom (fautes de frappe, mots partiels)
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="menu_name_trgm_idx"),
+            models.Index(fields=["price"], name="menu_price_idx"),
+            models.Index(fields=["rate"], name="menu_rate_idx"),
+            models.Index(fields=["country"], name="menu_country_idx"),
+        ]
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.db import models
+from django.utils import timezone
+from .users import User
+
+
+class NotificationRateBucket(models.Model):
+    """
+    Seau à jetons d'un utilisateur : limite le débit d'envoi de ses
+    notifications (voir api/notificationDelivery.py). Une ligne par
+    utilisateur ayant reçu au moins une notification.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="notification_bucket")
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user} : {self.tokens:.1f} jeton(s)"
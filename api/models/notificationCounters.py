@@ -0,0 +1,15 @@
+from django.db import models
+from .users import User
+
+
+class UnreadNotificationCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur, tenu à jour à chaque
+    création, suppression ou lecture (voir api/unread.py) : le badge des
+    clients est lu sans COUNT(*) sur les notifications.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="unread_counter")
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} : {self.unread} non lue(s)"
@@ -0,0 +1,24 @@
+from django.db import models
+from django.utils import timezone
+from .reservations import Reservation
+
+
+class NotificationLedger(models.Model):
+    """
+    Une ligne par (réservation, nature) de notification déjà émise, par
+    exemple le rappel de la veille (voir send_reservation_reminders).
+    La table Notification est partitionnée et ne peut plus porter cette
+    contrainte unique : elle est tenue ici, dans une petite table ordinaire.
+    """
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name="notification_ledger")
+    kind = models.CharField(max_length=20)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Cible de l'INSERT ... ON CONFLICT DO NOTHING ; sert aussi le NOT EXISTS des rappels
+            models.UniqueConstraint(fields=["reservation", "kind"], name="notification_ledger_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} pour la réservation {self.reservation_id}"
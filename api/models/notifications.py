@@ -1,9 +1,27 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from .users import User
 from .reservations import Reservation
 
 class Notification(models.Model):
+    # Etat de livraison (outbox) : la notification est écrite dans la même
+    # transaction que l'événement, puis livrée par deliver_notifications.
+    DELIVERY_PENDING = "pending"
+    DELIVERY_SENDING = "sending"
+    DELIVERY_SENT = "sent"
+    DELIVERY_FAILED = "failed"
+
+    # Nature de la notification (une seule par réservation et par nature, garantie par NotificationLedger)
+    KIND_REMINDER = "reminder"
+
+    # Tentatives avant abandon, et délai de la première relance (doublé à chaque échec)
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_DELAY = timedelta(seconds=30)
+    RETRY_MAX_DELAY = timedelta(hours=1)
+
     type = models.CharField(
         max_length=10,
         choices=[("email", "Email"), ("sms", "SMS")]
@@ -14,9 +32,57 @@ class Notification(models.Model):
         Reservation, on_delete=models.CASCADE, null=True, blank=True, related_name="notifications"
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(
+        max_length=20,
+        choices=[("reminder", "Reminder")],
+        blank=True,
+        default=""
+    )
+    delivery_status = models.CharField(
+        max_length=10,
+        choices=[("pending", "Pending"), ("sending", "Sending"), ("sent", "Sent"), ("failed", "Failed")],
+        default="pending"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Prochaine tentative ; pendant l'envoi, fin du bail du worker qui la traite
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # Lue par le destinataire (None : non lue)
+    read_at = models.DateTimeField(null=True, blank=True)
+    # Notifications fusionnées dans celle-ci pendant la fenêtre de regroupement (api/notify.py)
+    coalesced = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # La table est partitionnée par mois de sending_date (migration 0020,
+        # commande manage_notification_partitions) : sa clé primaire en base
+        # est (id, sending_date) et aucune contrainte unique ne peut l'ignorer.
+        # L'unicité (réservation, nature) est tenue par NotificationLedger.
+        indexes = [
+            # pagination par curseur (sending_date, id), parcouru du plus récent au plus ancien
+            models.Index(fields=["sending_date", "id"], name="notification_keyset_idx"),
+            # fil d'un utilisateur, du plus récent au plus ancien (et pagination par curseur)
+            models.Index(fields=["user", "sending_date", "id"], name="notification_user_date_idx"),
+            # file d'envoi : notifications à livrer par échéance
+            models.Index(
+                fields=["next_attempt_at"],
+                name="notification_outbox_idx",
+                condition=Q(delivery_status__in=["pending", "sending"]),
+            ),
+        ]
+
+    def retry_delay(self):
+        """Délai avant la prochaine tentative (backoff exponentiel, plafonné)."""
+        return min(self.RETRY_BASE_DELAY * 2 ** max(self.attempts - 1, 0), self.RETRY_MAX_DELAY)
 
     def send(self):
-        return True
+        """
+        Deliver the notification now through the backend of its channel and
+        record the outcome. Returns True when it was delivered.
+        Requests should not call it: the outbox worker delivers in batches.
+        """
+        from api.notificationDelivery import deliver_now
+        return deliver_now(self)
 
     def __str__(self):
         return f"Notification ({self.type})"
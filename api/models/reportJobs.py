@@ -0,0 +1,51 @@
+from django.db import models
+from django.db.models import Q
+from .users import User
+from .reports import Report
+
+
+class ReportJob(models.Model):
+    """
+    Génération d'un rapport en arrière-plan : statistiques de la période et
+    fichier d'export, calculés par la commande run_report_worker.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    FORMAT_CSV = "csv"
+    FORMAT_JSON = "json"
+    # Type MIME et extension du fichier produit
+    FORMATS = {
+        FORMAT_CSV: ("text/csv", "csv"),
+        FORMAT_JSON: ("application/x-ndjson", "ndjson"),
+    }
+
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name="jobs")
+    format = models.CharField(
+        max_length=10,
+        choices=[("csv", "CSV"), ("json", "NDJSON")],
+        default="csv"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[("queued", "Queued"), ("running", "Running"), ("done", "Done"), ("failed", "Failed")],
+        default="queued"
+    )
+    progress = models.PositiveSmallIntegerField(default=0)
+    result_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="report_jobs")
+
+    class Meta:
+        indexes = [
+            # File d'attente : jobs en attente par ordre d'arrivée
+            models.Index(fields=["created_at"], name="reportjob_queued_idx", condition=Q(status="queued")),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status}) pour {self.report}"
@@ -1,5 +1,28 @@
+import csv
+from calendar import monthrange
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from .users import User
+from .reservations import Reservation
+
+# Colonnes exportées, lues en une seule requête (jointures user et table_saloon)
+EXPORT_FIELDS = (
+    'id', 'date', 'start', 'end', 'people_count', 'status',
+    'user__email', 'table_saloon_id', 'table_saloon__name',
+)
+EXPORT_HEADER = (
+    'id', 'date', 'start', 'end', 'people_count', 'status',
+    'user_email', 'table_saloon_id', 'table_saloon_name',
+)
+
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire."""
+    def write(self, value):
+        return value
+
 
 class Report(models.Model):
     period = models.CharField(max_length=50)
@@ -8,11 +31,52 @@ class Report(models.Model):
     pics_activity = models.CharField(max_length=200)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="reports")
 
-    def generate_csv(self):
-        return "CSV data"
+    def period_bounds(self):
+        """
+        Return the (first, last) dates covered by `period`, both inclusive.
+        Accepted formats: "YYYY", "YYYY-MM", "YYYY-MM-DD" and
+        "YYYY-MM-DD/YYYY-MM-DD". Raises ValueError otherwise.
+        """
+        value = self.period.strip()
+        if "/" in value:
+            first, last = (date.fromisoformat(part.strip()) for part in value.split("/", 1))
+        elif len(value) == 4:
+            first, last = date(int(value), 1, 1), date(int(value), 12, 31)
+        elif len(value) == 7:
+            year, month = (int(part) for part in value.split("-"))
+            first, last = date(year, month, 1), date(year, month, monthrange(year, month)[1])
+        else:
+            first = last = date.fromisoformat(value)
+        if last < first:
+            raise ValueError(f"Période invalide : {self.period}")
+        return first, last
+
+    def reservations(self):
+        """Réservations (tous statuts) de la période du rapport."""
+        first, last = self.period_bounds()
+        return Reservation.objects.filter(date__range=(first, last))
+
+    def export_rows(self, chunk_size=2000):
+        """Rows of the period, streamed from a server-side cursor."""
+        return (
+            self.reservations()
+            .order_by('date', 'start', 'id')
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+
+    def generate_csv(self, chunk_size=2000):
+        """Génère l'export CSV ligne par ligne (mémoire constante)."""
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_HEADER)
+        for row in self.export_rows(chunk_size):
+            yield writer.writerow(row)
 
-    def generate_json(self):
-        return {"data": "JSON"}
+    def generate_json(self, chunk_size=2000):
+        """Génère l'export en JSON délimité par des retours à la ligne (NDJSON)."""
+        encoder = DjangoJSONEncoder()
+        for row in self.export_rows(chunk_size):
+            yield encoder.encode(dict(zip(EXPORT_HEADER, row))) + "\n"
 
     def __str__(self):
         return f"Report for {self.period}"
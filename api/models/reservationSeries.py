@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from .users import User
+from .tableSaloons import TableSaloon
+from .reservations import Reservation, is_overlap_violation
+
+
+class ReservationSeries(models.Model):
+    """
+    Réservation récurrente (hebdomadaire ou toutes les deux semaines).
+
+    La règle est stockée une seule fois ; les occurrences sont créées en
+    Reservation au fur et à mesure, sur une fenêtre glissante de WINDOW_DAYS
+    (voir materialize() et la commande materialize_reservation_series).
+    """
+    FREQUENCY_STEPS = {"weekly": 7, "biweekly": 14}
+    WINDOW_DAYS = 28
+
+    STATUS_ACTIVE = "active"
+    STATUS_CANCELED = "canceled"
+
+    frequency = models.CharField(
+        max_length=20,
+        choices=[("weekly", "Weekly"), ("biweekly", "Biweekly")],
+        default="weekly"
+    )
+    first_date = models.DateField()
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    start = models.TimeField()
+    end = models.TimeField()
+    people_count = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=20,
+        choices=[("active", "Active"), ("canceled", "Canceled")],
+        default="active"
+    )
+    # Date de la dernière occurrence déjà créée
+    materialized_until = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reservation_series")
+    table_saloon = models.ForeignKey(TableSaloon, on_delete=models.CASCADE, related_name="reservation_series")
+
+    class Meta:
+        verbose_name = "Reservation series"
+        verbose_name_plural = "Reservation series"
+
+    def occurrence_dates(self, after, horizon):
+        """
+        Dates des occurrences strictement après `after` (None : depuis le début)
+        et jusqu'à `horizon` inclus, dans la limite de `until` et `count`.
+        """
+        step = self.FREQUENCY_STEPS[self.frequency]
+        k = 0 if after is None else max(0, (after - self.first_date).days // step + 1)
+        last = min(horizon, self.until) if self.until else horizon
+
+        dates = []
+        while self.count is None or k < self.count:
+            day = self.first_date + timedelta(days=k * step)
+            if day > last:
+                break
+            dates.append(day)
+            k += 1
+        return dates
+
+    def materialize(self, horizon=None):
+        """
+        Create the occurrences of the rolling window up to `horizon` (default:
+        today + WINDOW_DAYS). Conflicts with existing reservations are found
+        with a single overlap query for the whole window and skipped; the
+        others are inserted with one bulk_create.
+        Returns (created reservations, skipped dates).
+        """
+        if self.status != self.STATUS_ACTIVE:
+            return [], []
+        horizon = horizon or timezone.localdate() + timedelta(days=self.WINDOW_DAYS)
+        dates = self.occurrence_dates(after=self.materialized_until, horizon=horizon)
+        if not dates:
+            return [], []
+
+        for attempt in range(2):
+            conflicts = set(Reservation.objects.filter(
+                table_saloon_id=self.table_saloon_id,
+                date__in=dates,
+                status__in=Reservation.ACTIVE_STATUSES,
+                start__lt=self.end,
+                end__gt=self.start,
+            ).values_list('date', flat=True))
+            occurrences = [
+                Reservation(
+                    date=day, start=self.start, end=self.end, people_count=self.people_count,
+                    user_id=self.user_id, table_saloon_id=self.table_saloon_id, series=self,
+                )
+                for day in dates if day not in conflicts
+            ]
+            try:
+                with transaction.atomic():
+                    Reservation.objects.bulk_create(occurrences)
+                    # bulk_create n'envoie pas post_save : agrégat journalier mis à jour ici
+                    from api.rollups import record_created
+                    record_created(occurrences)
+                    self.materialized_until = dates[-1]
+                    self.save(update_fields=['materialized_until'])
+                return occurrences, sorted(conflicts)
+            except IntegrityError as exc:
+                # Une réservation concurrente est arrivée entre la vérification et l'insertion
+                if attempt or not is_overlap_violation(exc):
+                    raise
+
+    def __str__(self):
+        return f"Série {self.frequency} de {self.user} à partir du {self.first_date}"
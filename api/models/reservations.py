@@ -6,12 +6,43 @@ from .tableSaloons import TableSaloon
 
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db.models import F, Func, Q
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
 from datetime import time
 from .users import User
 from .tableSaloons import TableSaloon
 
+
+class TsRange(Func):
+    """TSRANGE(lower, upper, bounds) côté PostgreSQL."""
+    function = "TSRANGE"
+    output_field = DateTimeRangeField()
+
+
+class DateTimeOf(Func):
+    """Combine une date et une heure en timestamp (date + time)."""
+    arg_joiner = " + "
+    template = "(%(expressions)s)"
+    output_field = models.DateTimeField()
+
+
+OVERLAP_CONSTRAINT_NAME = "reservation_no_overlap"
+
+
+def is_overlap_violation(exc):
+    """True si l'IntegrityError provient de la contrainte de non-chevauchement."""
+    diag = getattr(exc.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) == OVERLAP_CONSTRAINT_NAME
+
+
 class Reservation(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_COMPLETED = "completed"
+    STATUS_CANCELED = "canceled"
+    # Statuts qui occupent réellement la table/salon
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_COMPLETED)
+
     date = models.DateField()
     start = models.TimeField()  
     end = models.TimeField()
@@ -23,6 +54,10 @@ class Reservation(models.Model):
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reservations")
     table_saloon = models.ForeignKey(TableSaloon, on_delete=models.SET_NULL, null=True, related_name="reservations")
+    # Série récurrente dont la réservation est une occurrence
+    series = models.ForeignKey(
+        "ReservationSeries", on_delete=models.SET_NULL, null=True, blank=True, related_name="occurrences"
+    )
 
     def clean(self):
         """Validation universelle (admin, shell, API si .full_clean() est appelé)"""
@@ -37,20 +72,50 @@ class Reservation(models.Model):
                 f"de la table/salon ({self.table_saloon.capacity})."
             )
 
-        # Vérifie qu'il n'y a pas de chevauchement de réservation
-        if self.table_saloon and self.date:
-            overlapping = Reservation.objects.filter(
-                table_saloon=self.table_saloon,
-                date=self.date,
-                status__in=["pending", "completed"],  # Ignorer les réservations annulées
-                start__lt=self.end,
-                end__gt=self.start
-            ).exclude(pk=self.pk)  # Exclure la réservation actuelle si mise à jour
-
-            if overlapping.exists():
-                raise ValidationError(
-                    f"La table/salon {self.table_saloon} est déjà réservée sur cet intervalle."
-                )
+        # Le chevauchement est garanti par la contrainte d'exclusion (voir Meta),
+        # vérifiée par full_clean() via validate_constraints().
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Valeurs rechargées : l'état compté dans l'agrégat journalier n'est plus
+        # forcément le bon, il est relu en base à la prochaine écriture.
+        from api.rollups import forget_snapshot
+        forget_snapshot(self, fields)
+
+    class Meta:
+        indexes = [
+            # today / upcoming / active et index en mémoire des disponibilités
+            models.Index(
+                fields=["date", "start"],
+                name="reservation_active_date_idx",
+                condition=Q(status__in=["pending", "completed"]),
+            ),
+            # my_reservations et filtrage par utilisateur des autres listes
+            models.Index(fields=["user", "date"], name="reservation_user_date_idx"),
+            # pagination par curseur (date, start, id)
+            models.Index(fields=["date", "start", "id"], name="reservation_keyset_idx"),
+            # réservations actives d'une table sur une journée
+            models.Index(
+                fields=["table_saloon", "date"],
+                name="reservation_table_date_idx",
+                condition=Q(status__in=["pending", "completed"]),
+            ),
+        ]
+        constraints = [
+            # Une table/salon ne peut pas avoir deux réservations actives qui se chevauchent.
+            ExclusionConstraint(
+                name=OVERLAP_CONSTRAINT_NAME,
+                expressions=[
+                    (F("table_saloon"), RangeOperators.EQUAL),
+                    (
+                        TsRange(DateTimeOf(F("date"), F("start")), DateTimeOf(F("date"), F("end")), models.Value("[)")),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                condition=~Q(status="canceled"),
+                violation_error_message="La table/salon est déjà réservée sur cet intervalle.",
+            ),
+        ]
 
     def __str__(self):
         # Utiliser username comme fallback si first_name/last_name sont vides
@@ -0,0 +1,51 @@
+from django.db import models
+from django.db.models import Q
+from .users import User
+from .tableSaloons import TableSaloon
+from .reservations import Reservation
+
+
+class WaitlistEntry(models.Model):
+    """Demande en attente d'un créneau complet, promue en réservation dès qu'il se libère."""
+    STATUS_WAITING = "waiting"
+    STATUS_PROMOTED = "promoted"
+    STATUS_CANCELED = "canceled"
+
+    date = models.DateField()
+    start = models.TimeField()
+    end = models.TimeField()
+    people_count = models.PositiveIntegerField()
+    table_type = models.CharField(
+        max_length=20,
+        choices=[("table", "Table"), ("saloon", "Saloon")],
+        blank=True
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[("waiting", "Waiting"), ("promoted", "Promoted"), ("canceled", "Canceled")],
+        default="waiting"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="waitlist_entries")
+    # Table souhaitée (facultative) : sinon toute table/salon de capacité suffisante convient
+    table_saloon = models.ForeignKey(
+        TableSaloon, on_delete=models.SET_NULL, null=True, blank=True, related_name="waitlist_entries"
+    )
+    reservation = models.OneToOneField(
+        Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name="waitlist_entry"
+    )
+
+    class Meta:
+        verbose_name = "Waitlist entry"
+        verbose_name_plural = "Waitlist entries"
+        indexes = [
+            # Recherche des demandes en attente pour une date, par ordre d'arrivée
+            models.Index(
+                fields=["date", "start", "created_at"],
+                name="waitlist_waiting_idx",
+                condition=Q(status="waiting"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Waitlist {self.user} le {self.date} de {self.start} à {self.end}"
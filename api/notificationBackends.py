@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationBackend(ABC):
+    """
+    Delivery backend of one channel. `send()` is blocking and raises on
+    failure; the outbox worker awaits `asend()`, which runs it in a thread
+    unless a backend provides a native coroutine.
+    """
+
+    @abstractmethod
+    def send(self, notification):
+        """Délivre la notification ; lève une exception en cas d'échec."""
+
+    async def asend(self, notification):
+        await asyncio.to_thread(self.send, notification)
+
+
+class EmailBackend(NotificationBackend):
+    """Envoi par email via l'EMAIL_BACKEND de Django (SMTP en production, locmem en test)."""
+    subject = "ReserveNow"
+
+    def send(self, notification):
+        send_mail(
+            self.subject,
+            notification.message,
+            settings.DEFAULT_FROM_EMAIL,
+            [notification.user.email],
+            fail_silently=False,
+        )
+
+
+class LoggingSmsBackend(NotificationBackend):
+    """
+    SMS stand-in: no SMS provider is configured, messages are logged.
+    Replace it in NOTIFICATION_BACKENDS with a provider backend.
+    """
+
+    def send(self, notification):
+        logger.info("SMS pour %s : %s", notification.user.email, notification.message)
+
+
+def get_backend(channel):
+    """Instancie le backend configuré pour le canal (settings.NOTIFICATION_BACKENDS)."""
+    return import_string(settings.NOTIFICATION_BACKENDS[channel])()
@@ -0,0 +1,161 @@
+import asyncio
+import random
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Notification, NotificationRateBucket
+from api.notificationBackends import get_backend
+
+# Durée pendant laquelle une notification réclamée reste réservée à son worker
+LEASE = timedelta(minutes=5)
+
+
+def take_tokens(requested, now):
+    """
+    Per-user token bucket: each user holds up to NOTIFICATION_RATE_BURST
+    tokens, refilled at NOTIFICATION_RATE_PER_HOUR. Takes at most
+    requested[user_id] tokens from each bucket (rows locked in user order,
+    so concurrent workers cannot spend the same tokens) and returns
+    {user_id: (granted, seconds until the next token)}.
+    """
+    burst = settings.NOTIFICATION_RATE_BURST
+    per_second = settings.NOTIFICATION_RATE_PER_HOUR / 3600
+    NotificationRateBucket.objects.bulk_create(
+        [NotificationRateBucket(user_id=user_id, tokens=burst, updated_at=now) for user_id in requested],
+        ignore_conflicts=True,
+    )
+    buckets = list(
+        NotificationRateBucket.objects.select_for_update().filter(user_id__in=requested).order_by('user_id')
+    )
+    grants = {}
+    for bucket in buckets:
+        elapsed = max((now - bucket.updated_at).total_seconds(), 0)
+        tokens = min(burst, bucket.tokens + elapsed * per_second)
+        granted = min(requested[bucket.user_id], int(tokens))
+        bucket.tokens, bucket.updated_at = tokens - granted, now
+        grants[bucket.user_id] = (granted, max(1 - bucket.tokens, 0) / per_second)
+    NotificationRateBucket.objects.bulk_update(buckets, ['tokens', 'updated_at'])
+    return grants
+
+
+def claim_batch(limit):
+    """
+    Claim up to `limit` due notifications with FOR UPDATE SKIP LOCKED and
+    mark them 'sending' under a lease: concurrent workers never deliver the
+    same row, and rows of a crashed worker become due again when the lease
+    expires. Notifications over their user's send rate are left pending and
+    rescheduled for when a token is available (no attempt is counted).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        notifications = list(
+            Notification.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .filter(
+                delivery_status__in=[Notification.DELIVERY_PENDING, Notification.DELIVERY_SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by('next_attempt_at')[:limit]
+        )
+        if notifications and settings.NOTIFICATION_RATE_PER_HOUR:
+            notifications = throttle(notifications, now)
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            delivery_status=Notification.DELIVERY_SENDING, next_attempt_at=now + LEASE
+        )
+    return notifications
+
+
+def throttle(notifications, now):
+    """Garde les notifications autorisées par take_tokens et reporte les autres."""
+    grants = take_tokens(Counter(n.user_id for n in notifications), now)
+    allowed, deferred = [], defaultdict(list)
+    for notification in notifications:
+        granted, wait = grants[notification.user_id]
+        if granted:
+            grants[notification.user_id] = (granted - 1, wait)
+            allowed.append(notification)
+        else:
+            deferred[notification.user_id].append(notification.pk)
+    for user_id, ids in deferred.items():
+        Notification.objects.filter(pk__in=ids).update(
+            delivery_status=Notification.DELIVERY_PENDING,
+            next_attempt_at=now + timedelta(seconds=grants[user_id][1]),
+        )
+    return allowed
+
+
+async def deliver_all(notifications, concurrency):
+    """
+    Deliver the notifications concurrently, at most `concurrency` at a time.
+    Returns one exception (or None on success) per notification.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    backends = {}
+
+    async def deliver(notification):
+        async with semaphore:
+            try:
+                backend = backends.get(notification.type)
+                if backend is None:
+                    backend = backends[notification.type] = get_backend(notification.type)
+                await backend.asend(notification)
+            except Exception as exc:
+                return exc
+            return None
+
+    return await asyncio.gather(*(deliver(notification) for notification in notifications))
+
+
+def record_results(notifications, errors):
+    """
+    Store the outcome of a batch: delivered rows are marked sent; failed ones
+    are rescheduled with exponential backoff, or marked failed after
+    MAX_ATTEMPTS. Returns (sent, retried, failed) counts.
+    """
+    now = timezone.now()
+    sent_ids = [n.pk for n, error in zip(notifications, errors) if error is None]
+    Notification.objects.filter(pk__in=sent_ids).update(
+        delivery_status=Notification.DELIVERY_SENT, sent_at=now, last_error=""
+    )
+
+    retried = failed = 0
+    for notification, error in zip(notifications, errors):
+        if error is None:
+            notification.delivery_status, notification.sent_at, notification.last_error = Notification.DELIVERY_SENT, now, ""
+            continue
+        notification.attempts += 1
+        notification.last_error = f"{type(error).__name__}: {error}"[:1000]
+        if notification.attempts >= Notification.MAX_ATTEMPTS:
+            notification.delivery_status = Notification.DELIVERY_FAILED
+            failed += 1
+        else:
+            notification.delivery_status = Notification.DELIVERY_PENDING
+            # Léger aléa pour ne pas relancer tous les échecs au même instant
+            notification.next_attempt_at = now + notification.retry_delay() * random.uniform(1, 1.2)
+            retried += 1
+        notification.save(update_fields=['attempts', 'last_error', 'delivery_status', 'next_attempt_at'])
+    return len(sent_ids), retried, failed
+
+
+def deliver_batch(limit=100, concurrency=10):
+    """Réclame, livre et enregistre un lot. Renvoie (réclamées, envoyées, relancées, abandonnées)."""
+    notifications = claim_batch(limit)
+    if not notifications:
+        return 0, 0, 0, 0
+    errors = asyncio.run(deliver_all(notifications, concurrency))
+    return (len(notifications), *record_results(notifications, errors))
+
+
+def deliver_now(notification):
+    """
+    Livraison immédiate d'une seule notification (Notification.send), sans
+    fenêtre de regroupement ni limite de débit.
+    """
+    notification.user  # chargé ici : le backend s'exécute dans un autre thread
+    errors = asyncio.run(deliver_all([notification], 1))
+    record_results([notification], errors)
+    return errors[0] is None
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import Notification
+
+
+def notify(user, type, message, reservation=None):
+    """
+    Create a notification for `user`, or merge it into a pending one.
+
+    A notification on the same (user, reservation, type) that is still
+    waiting in its coalescing window and has not been picked up by the
+    outbox worker is updated with the latest message instead of producing a
+    second send. New notifications are held for the window
+    (NOTIFICATION_COALESCE_SECONDS) before delivery, so the delay is bounded
+    by the window of the first one. Returns the created or merged
+    notification.
+    """
+    now = timezone.now()
+    window = timedelta(seconds=settings.NOTIFICATION_COALESCE_SECONDS)
+    if not window:
+        return Notification.objects.create(type=type, message=message, user=user, reservation=reservation)
+
+    with transaction.atomic():
+        # Sérialise les créations concurrentes pour une même clé jusqu'au commit
+        key = f"notification:{user.pk}:{reservation.pk if reservation else ''}:{type}"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [key])
+
+        pending = (
+            Notification.objects.select_for_update()
+            .filter(
+                user=user,
+                reservation=reservation,
+                type=type,
+                kind="",
+                delivery_status=Notification.DELIVERY_PENDING,
+                attempts=0,
+                read_at__isnull=True,
+                next_attempt_at__gt=now,
+                sending_date__gte=now - window,
+            )
+            .order_by('-sending_date')
+            .first()
+        )
+        if pending is not None:
+            pending.message = message
+            pending.coalesced += 1
+            pending.save(update_fields=['message', 'coalesced'])
+            return pending
+
+        return Notification.objects.create(
+            type=type,
+            message=message,
+            user=user,
+            reservation=reservation,
+            sending_date=now,
+            next_attempt_at=now + window,
+        )
@@ -0,0 +1,135 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default, with an opt-in keyset (cursor) mode.
+
+    The keyset mode is selected per request with `?pagination=cursor` or by
+    following a `cursor` link. Rows are ordered by `ordering` (which must end
+    with a unique field; all ascending, or all descending with '-') and each
+    page starts with a row-value comparison `(a, b, id) > (...)` (`<` when
+    descending) served by a matching index: no OFFSET scan and no COUNT(*).
+    Existing clients keep the limit/offset responses.
+    """
+    ordering = ()
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    max_cursor_limit = 100
+    invalid_cursor_message = "Cursor invalide."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    # --- Mode curseur ---
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = min(self.get_limit(request), self.max_cursor_limit)
+        names = [name.lstrip('-') for name in self.ordering]
+        fields = [queryset.model._meta.get_field(name) for name in names]
+
+        position, reverse = self.decode_cursor(request, fields)
+        # Parcours par clés décroissantes : ordre descendant, ou page précédente d'un ordre ascendant
+        backwards = reverse != self.ordering[0].startswith('-')
+        queryset = queryset.order_by(*[('-' if backwards else '') + name for name in names])
+        if position is not None:
+            queryset = queryset.filter(self.keyset_condition(queryset.model, fields, position, backwards))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # En remontant, il y a forcément des lignes après la page courante
+        has_next = position is not None if reverse else has_more
+        has_previous = has_more if reverse else position is not None
+        self.next_position = self.row_position(rows[-1], fields) if rows and has_next else None
+        self.previous_position = self.row_position(rows[0], fields) if rows and has_previous else None
+        return rows
+
+    def keyset_condition(self, model, fields, position, backwards):
+        qn = connection.ops.quote_name
+        table = qn(model._meta.db_table)
+        columns = ', '.join(f'{table}.{qn(field.column)}' for field in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        operator = '<' if backwards else '>'
+        return RawSQL(f'({columns}) {operator} ({placeholders})', position, output_field=BooleanField())
+
+    @staticmethod
+    def row_position(row, fields):
+        return [getattr(row, field.attname) for field in fields]
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            'p': [value.isoformat() if hasattr(value, 'isoformat') else value for value in position],
+            'r': int(reverse),
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        url = remove_query_param(self.base_url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, fields):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = payload['p']
+            if len(values) != len(fields):
+                raise ValueError
+            # clean() et non to_python() : un entier hors bornes est refusé ici, pas par la base
+            position = [field.clean(value, None) for field, value in zip(fields, values)]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise ParseError(self.invalid_cursor_message)
+
+
+class ReservationPagination(KeysetPagination):
+    ordering = ('date', 'start', 'id')
+
+
+class NotificationPagination(KeysetPagination):
+    # Fil du plus récent au plus ancien, comme en mode limit/offset
+    ordering = ('-sending_date', '-id')
@@ -0,0 +1,124 @@
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import Notification
+from api.unread import adjust_unread
+
+# La table Notification est partitionnée par mois de sending_date (migration 0020)
+PARENT_TABLE = Notification._meta.db_table
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def month_bounds(month):
+    """Bornes [début, fin) du mois en UTC, comme valeurs de partition."""
+    return (
+        datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc),
+        datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=dt_timezone.utc),
+    )
+
+
+def monthly_partitions():
+    """Return {month: partition name} for the monthly partitions attached to the table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [PARENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(month):
+    """
+    Create and attach the partition of `month`. Rows of that month that
+    landed in the default partition are moved into it first, otherwise
+    PostgreSQL refuses the ATTACH.
+    """
+    qn = connection.ops.quote_name
+    name, parent, default = qn(partition_name(month)), qn(PARENT_TABLE), qn(DEFAULT_PARTITION)
+    start, end = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE sending_date >= %s AND sending_date < %s RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return partition_name(month)
+
+
+def ensure_partitions(ahead=3):
+    """
+    Create the missing monthly partitions from the current month to `ahead`
+    months later, plus those of the months that have rows in the default
+    partition. Returns the names of the created partitions.
+    """
+    current = month_start(timezone.now().astimezone(dt_timezone.utc))
+    months = {add_months(current, offset) for offset in range(ahead + 1)}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', sending_date AT TIME ZONE 'UTC')::date "
+            f"FROM {connection.ops.quote_name(DEFAULT_PARTITION)}"
+        )
+        months.update(row[0] for row in cursor.fetchall())
+
+    existing = monthly_partitions()
+    return [create_partition(month) for month in sorted(months) if month not in existing]
+
+
+def drop_partitions_before(month, archive_dir=None):
+    """
+    Detach and drop every monthly partition older than `month`, whole, with
+    no row-by-row DELETE. With `archive_dir`, each partition is first copied
+    to <archive_dir>/<partition>.csv.gz. The unread counters of the owners
+    of dropped unread notifications are decremented.
+    Returns the names of the dropped partitions.
+    """
+    qn = connection.ops.quote_name
+    dropped = []
+    for partition_month, name in sorted(monthly_partitions().items()):
+        if partition_month >= month:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(name)}")
+            if archive_dir:
+                os.makedirs(archive_dir, exist_ok=True)
+                with gzip.open(os.path.join(archive_dir, f"{name}.csv.gz"), 'wb') as archive:
+                    cursor.copy_expert(f"COPY {qn(name)} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+            cursor.execute(f"SELECT user_id, count(*) FROM {qn(name)} WHERE read_at IS NULL GROUP BY user_id")
+            adjust_unread({user_id: -unread for user_id, unread in cursor.fetchall()})
+            cursor.execute(f"DROP TABLE {qn(name)}")
+        dropped.append(name)
+    return dropped
@@ -1,18 +1,12 @@
 from rest_framework.permissions import BasePermission
+from api.roles import is_manager, is_manager_or_superuser
 
 class IsManagerOrAdmin(BasePermission):
     """
     Autorise uniquement les Managers, Admins ou superusers.
     """
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and (
-                request.user.is_superuser
-                or request.user.groups.filter(name__in=['Manager']).exists()
-            )
-        )
+        return is_manager_or_superuser(request)
 
 # --- Permissions personnalisées pour les managers ---
 class IsManagerOrSuperUser(BasePermission):
@@ -20,10 +14,7 @@ class IsManagerOrSuperUser(BasePermission):
     Permission personnalisée pour autoriser les managers et superusers.
     """
     def has_permission(self, request, view):
-        return request.user and (
-            request.user.is_superuser or 
-            request.user.groups.filter(name='Manager').exists()
-        )
+        return bool(request.user) and (request.user.is_superuser or is_manager(request))
 
 
 class IsSuperUser(BasePermission):
@@ -39,5 +30,5 @@ class IsManager(BasePermission):
     Permission réservée uniquement aux managers.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='Manager').exists()
+        return bool(request.user) and is_manager(request)
 
@@ -0,0 +1,18 @@
+from rest_framework.renderers import BaseRenderer
+
+from api.events import format_event
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept `Accept: text/event-stream` (EventSource).
+    The stream itself is a StreamingHttpResponse; only errors go through here.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return format_event(('error', data), 0).encode(self.charset)
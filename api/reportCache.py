@@ -0,0 +1,59 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q, Sum
+
+from api.models import ReportDataVersion
+
+
+def bump_versions(dates):
+    """
+    Increment the data version of `dates` with one upsert, in the caller's
+    transaction: the new version becomes visible together with the data.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    table = connection.ops.quote_name(ReportDataVersion._meta.db_table)
+    placeholders = ', '.join(['(%s, 1)'] * len(dates))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (date, version) VALUES {placeholders}
+            ON CONFLICT (date) DO UPDATE SET version = {table}.version + 1
+            """,
+            dates,
+        )
+
+
+def bump_catalog_version():
+    """Tables/salons ou horaires modifiés : invalide tous les rapports."""
+    bump_versions([ReportDataVersion.CATALOG_DATE])
+
+
+def period_version(first, last):
+    """
+    Version of the data of [first, last]: the sum of the per-date versions
+    (each bump increases it) plus the catalog version. One indexed query.
+    """
+    return ReportDataVersion.objects.filter(
+        Q(date__range=(first, last)) | Q(date=ReportDataVersion.CATALOG_DATE)
+    ).aggregate(total=Sum('version'))['total'] or 0
+
+
+def cached_report(name, first, last, compute, **params):
+    """
+    Return compute() cached under (name, period, params, data version).
+    Entries never expire: a write on a date of the period changes the key,
+    so historical periods stay cached and only touched ones are recomputed.
+    """
+    fingerprint = hashlib.md5(json.dumps(params, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+    key = f"report:{name}:{first}:{last}:{fingerprint}:{period_version(first, last)}"
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, None)
+    return result
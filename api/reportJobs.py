@@ -0,0 +1,80 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from api.analytics import refresh_report
+from api.models import ReportJob
+
+# Fréquence (en lignes) des mises à jour de l'avancement
+PROGRESS_EVERY = 5000
+# Un job 'running' plus ancien est considéré comme abandonné
+STALE_AFTER = timedelta(hours=1)
+
+
+def claim_jobs(limit):
+    """
+    Claim up to `limit` queued jobs, oldest first. Rows are locked with
+    FOR UPDATE SKIP LOCKED so several workers never take the same job.
+    """
+    with transaction.atomic():
+        jobs = list(
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ReportJob.STATUS_QUEUED)
+            .order_by('created_at')[:limit]
+        )
+        ReportJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ReportJob.STATUS_RUNNING, started_at=timezone.now(), progress=0
+        )
+    return [job.pk for job in jobs]
+
+
+def requeue_stale_jobs(older_than):
+    """Remet en file les jobs 'running' abandonnés (worker arrêté brutalement)."""
+    return ReportJob.objects.filter(
+        status=ReportJob.STATUS_RUNNING, started_at__lt=timezone.now() - older_than
+    ).update(status=ReportJob.STATUS_QUEUED, started_at=None, progress=0)
+
+
+def result_path(job):
+    _, extension = ReportJob.FORMATS[job.format]
+    return os.path.join(settings.REPORT_JOBS_DIR, f"report-{job.report_id}-job-{job.pk}.{extension}")
+
+
+def run_report_job(job_id):
+    """
+    Compute one claimed job: report statistics, then the export file written
+    to a temporary path and renamed once complete. Runs in a pool process.
+    Returns the final status.
+    """
+    close_old_connections()
+    job = ReportJob.objects.select_related('report').get(pk=job_id)
+    report = job.report
+    try:
+        refresh_report(report)
+        report.save(update_fields=['occupancy_rate', 'nb_annulation', 'pics_activity'])
+
+        total = report.reservations().count()
+        path = result_path(job)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        generate = report.generate_csv() if job.format == ReportJob.FORMAT_CSV else report.generate_json()
+        rows = 0
+        with open(path + ".part", "w", encoding="utf-8", newline="") as output:
+            for line in generate:
+                output.write(line)
+                rows += 1
+                if rows % PROGRESS_EVERY == 0 and total:
+                    ReportJob.objects.filter(pk=job.pk).update(progress=min(99, 100 * rows // total))
+        os.replace(path + ".part", path)
+    except Exception as exc:
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=ReportJob.STATUS_FAILED, error=f"{type(exc).__name__}: {exc}", finished_at=timezone.now()
+        )
+        return ReportJob.STATUS_FAILED
+
+    ReportJob.objects.filter(pk=job.pk).update(
+        status=ReportJob.STATUS_DONE, progress=100, result_path=path, finished_at=timezone.now()
+    )
+    return ReportJob.STATUS_DONE
@@ -0,0 +1,52 @@
+from django.conf import settings
+
+MANAGER_GROUP = "Manager"
+# Claim ajouté au token par CustomTokenObtainPairSerializer.get_token
+ROLES_CLAIM = "roles"
+
+
+def get_roles(request):
+    """
+    Return the group names of the current user as a frozenset, resolved at
+    most once per request and cached on the underlying HttpRequest.
+
+    When ROLES_FROM_TOKEN is enabled and the access token carries a `roles`
+    claim, no query is made at all.
+    """
+    http_request = getattr(request, '_request', request)
+    roles = getattr(http_request, '_cached_roles', None)
+    if roles is None:
+        roles = _resolve_roles(request)
+        http_request._cached_roles = roles
+    return roles
+
+
+def _resolve_roles(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    token = getattr(request, 'auth', None)
+    if getattr(settings, 'ROLES_FROM_TOKEN', False) and hasattr(token, 'get'):
+        claim = token.get(ROLES_CLAIM)
+        if claim is not None:
+            return frozenset(claim)
+
+    return frozenset(user.groups.values_list('name', flat=True))
+
+
+def is_manager(request):
+    """L'utilisateur courant appartient-il au groupe Manager ?"""
+    return MANAGER_GROUP in get_roles(request)
+
+
+def is_manager_or_superuser(request):
+    """Superuser ou Manager (le superuser ne déclenche aucune résolution de groupes)."""
+    user = request.user
+    return bool(user and user.is_authenticated and (user.is_superuser or is_manager(request)))
+
+
+def has_full_access(request):
+    """Staff, superuser ou Manager : accès à toutes les réservations."""
+    user = request.user
+    return bool(user and user.is_authenticated and (user.is_staff or user.is_superuser or is_manager(request)))
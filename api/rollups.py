@@ -0,0 +1,234 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+
+from api.availability import to_seconds, weekly_opening_hours
+from api.events import publish_reservations
+from api.models import DailyReservationRollup, Reservation, TableSaloon
+from api.reportCache import bump_versions
+
+# Attribut posé sur chaque instance chargée : état déjà compté dans l'agrégat
+STATE_ATTR = '_rollup_state'
+STATE_FIELDS = ('date', 'table_saloon', 'status', 'people_count', 'start', 'end')
+STATE_ATTNAMES = ('date', 'table_saloon_id', 'status', 'people_count', 'start', 'end')
+
+
+def reservation_state(reservation):
+    """
+    Return the ((date, table_saloon_id, status), covers, minutes) contribution
+    of a reservation to the rollup, or None when it has no table/saloon.
+    """
+    if reservation.table_saloon_id is None:
+        return None
+    minutes = (to_seconds(reservation.end) - to_seconds(reservation.start)) // 60
+    key = (reservation.date, reservation.table_saloon_id, reservation.status)
+    return key, reservation.people_count, minutes
+
+
+def snapshot(reservation):
+    """Mémorise la contribution actuelle de l'instance (sans requête si des champs sont différés)."""
+    if reservation.get_deferred_fields().intersection(STATE_ATTNAMES):
+        reservation.__dict__.pop(STATE_ATTR, None)
+    else:
+        setattr(reservation, STATE_ATTR, reservation_state(reservation))
+
+
+def forget_snapshot(reservation, fields=None):
+    """Oublie la contribution mémorisée si des champs qui la composent ont été rechargés."""
+    if fields is None or set(fields).intersection(STATE_FIELDS + STATE_ATTNAMES):
+        reservation.__dict__.pop(STATE_ATTR, None)
+
+
+def ensure_snapshot(reservation):
+    """
+    Avant save()/delete() : si l'instance n'a pas pu être mémorisée au
+    chargement (champs différés), relit sa contribution en base.
+    """
+    if STATE_ATTR in reservation.__dict__ or reservation._state.adding or reservation.pk is None:
+        return
+    row = Reservation.objects.filter(pk=reservation.pk).only(*STATE_FIELDS).first()
+    setattr(reservation, STATE_ATTR, reservation_state(row) if row is not None else None)
+
+
+def record_saved(reservation, created):
+    """Déplace la contribution de la réservation après un save()."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    if not created:
+        add_delta(deltas, getattr(reservation, STATE_ATTR, None), -1)
+    add_delta(deltas, reservation_state(reservation), +1)
+    apply_deltas(deltas)
+    bump_versions(changed_dates(reservation))
+    setattr(reservation, STATE_ATTR, reservation_state(reservation))
+
+
+def record_deleted(reservation):
+    """Retire la contribution d'une réservation supprimée."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    add_delta(deltas, getattr(reservation, STATE_ATTR, None), -1)
+    apply_deltas(deltas)
+    bump_versions(changed_dates(reservation))
+
+
+def changed_dates(reservation):
+    """Date actuelle de la réservation et, si elle a été déplacée, sa date précédente."""
+    dates = {reservation.date}
+    state = getattr(reservation, STATE_ATTR, None)
+    if state is not None:
+        dates.add(state[0][0])
+    return dates
+
+
+def add_delta(deltas, state, sign):
+    if state is None:
+        return
+    key, covers, minutes = state
+    deltas[key][0] += sign
+    deltas[key][1] += sign * covers
+    deltas[key][2] += sign * minutes
+
+
+def apply_deltas(deltas):
+    """
+    Apply {(date, table_saloon_id, status): [count, covers, minutes]} deltas
+    with a single INSERT ... ON CONFLICT DO UPDATE, atomic under concurrent
+    writers.
+    """
+    rows = [(*key, *values) for key, values in deltas.items() if any(values)]
+    if not rows:
+        return
+    table = connection.ops.quote_name(DailyReservationRollup._meta.db_table)
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (date, table_saloon_id, status, count, covers, booked_minutes)
+            VALUES {placeholders}
+            ON CONFLICT (date, table_saloon_id, status) DO UPDATE SET
+                count = {table}.count + EXCLUDED.count,
+                covers = {table}.covers + EXCLUDED.covers,
+                booked_minutes = {table}.booked_minutes + EXCLUDED.booked_minutes
+            """,
+            [value for row in rows for value in row],
+        )
+
+
+def record_created(reservations):
+    """
+    À appeler après un bulk_create (qui n'envoie pas de signaux) : agrégat,
+    versions des données et flux SSE.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for reservation in reservations:
+        add_delta(deltas, reservation_state(reservation), +1)
+        setattr(reservation, STATE_ATTR, reservation_state(reservation))
+    apply_deltas(deltas)
+    bump_versions(reservation.date for reservation in reservations)
+    publish_reservations(reservations)
+
+
+def record_status_change(queryset, status):
+    """
+    Update `queryset` to `status` (queryset.update() sends no signal) and
+    move the matching rollup counters accordingly, in one transaction.
+    Returns the number of updated reservations.
+    """
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().only(*STATE_FIELDS))
+        deltas = defaultdict(lambda: [0, 0, 0])
+        for reservation in rows:
+            add_delta(deltas, reservation_state(reservation), -1)
+            reservation.status = status
+            add_delta(deltas, reservation_state(reservation), +1)
+        updated = Reservation.objects.filter(pk__in=[row.pk for row in rows]).update(status=status)
+        apply_deltas(deltas)
+        bump_versions(row.date for row in rows)
+        publish_reservations(rows)
+    return updated
+
+
+def rebuild(first=None, last=None):
+    """
+    Recompute the rollup rows of [first, last] (every date when omitted)
+    from Reservation with one grouped query. The rollup table is locked
+    against concurrent signal updates while it is rebuilt.
+    Returns the number of rollup rows written.
+    """
+    reservations = Reservation.objects.filter(table_saloon__isnull=False)
+    rollups = DailyReservationRollup.objects.all()
+    if first is not None:
+        reservations = reservations.filter(date__gte=first)
+        rollups = rollups.filter(date__gte=first)
+    if last is not None:
+        reservations = reservations.filter(date__lte=last)
+        rollups = rollups.filter(date__lte=last)
+
+    aggregates = reservations.values('date', 'table_saloon_id', 'status').annotate(
+        n=Count('id'),
+        total_covers=Sum('people_count'),
+        duration=Sum(ExpressionWrapper(F('end') - F('start'), output_field=DurationField())),
+    ).order_by()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {connection.ops.quote_name(DailyReservationRollup._meta.db_table)} IN EXCLUSIVE MODE"
+            )
+        rollups.delete()
+        created = DailyReservationRollup.objects.bulk_create([
+            DailyReservationRollup(
+                date=row['date'],
+                table_saloon_id=row['table_saloon_id'],
+                status=row['status'],
+                count=row['n'],
+                covers=row['total_covers'],
+                booked_minutes=int(row['duration'].total_seconds()) // 60,
+            )
+            for row in aggregates
+        ], batch_size=2000)
+    return len(created)
+
+
+def period_summary(first, last):
+    """
+    Per-day covers, cancellations and occupancy of [first, last], read from
+    the rollup (a few rows per day) instead of scanning Reservation.
+    """
+    rows = DailyReservationRollup.objects.filter(date__range=(first, last)).values_list(
+        'date', 'status', 'count', 'covers', 'booked_minutes'
+    )
+    days = defaultdict(lambda: {'reservations': 0, 'covers': 0, 'cancellations': 0, 'booked_minutes': 0})
+    for day, status, count, covers, minutes in rows:
+        summary = days[day]
+        if status == Reservation.STATUS_CANCELED:
+            summary['cancellations'] += count
+        else:
+            summary['reservations'] += count
+            summary['covers'] += covers
+            summary['booked_minutes'] += minutes
+
+    n_tables = TableSaloon.objects.count()
+    hours = weekly_opening_hours()
+    per_day = []
+    open_minutes = booked_minutes = 0
+    for offset in range((last - first).days + 1):
+        day = first + timedelta(days=offset)
+        opening, closing = hours[day.weekday()]
+        capacity = n_tables * (closing - opening) // 60
+        summary = days[day]
+        per_day.append({
+            'date': day,
+            **summary,
+            'occupancy_rate': round(100 * summary['booked_minutes'] / capacity, 2) if capacity else 0.0,
+        })
+        open_minutes += capacity
+        booked_minutes += summary['booked_minutes']
+
+    return {
+        'reservations': sum(day['reservations'] for day in per_day),
+        'covers': sum(day['covers'] for day in per_day),
+        'cancellations': sum(day['cancellations'] for day in per_day),
+        'occupancy_rate': round(100 * booked_minutes / open_minutes, 2) if open_minutes else 0.0,
+        'days': per_day,
+    }
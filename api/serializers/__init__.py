@@ -1,7 +1,10 @@
 from .users import UserSerializer, AdminAssignGroupSerializer, RegisterSerializer, CustomTokenObtainPairSerializer, UserUpdateSerializer, AdminUserSerializer, ChangePasswordSerializer
 from .tableSaloons import TableSaloonSerializer
-from .reservations import ReservationSerializer
-from .menus import MenuSerializer
+from .reservations import ReservationSerializer, AvailabilityQuerySerializer, ReservationBulkItemSerializer
+from .menus import MenuSerializer, MenuSearchQuerySerializer
 from .notifications import NotificationSerializer
-from .reports import ReportSerializer
-from .schedule import ScheduleSerializer
\ No newline at end of file
+from .reports import ReportSerializer, PeriodQuerySerializer, HeatmapQuerySerializer, INVALID_PERIOD_MESSAGE
+from .schedule import ScheduleSerializer
+from .waitlists import WaitlistEntrySerializer
+from .reservationSeries import ReservationSeriesSerializer
+from .reportJobs import ReportJobSerializer, ReportJobRequestSerializer
@@ -16,3 +16,19 @@ class MenuSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().update(instance, validated_data)
+
+
+class MenuSearchQuerySerializer(serializers.Serializer):
+    """Paramètres de recherche du catalogue (tous facultatifs)."""
+    q = serializers.CharField(required=False, max_length=200, help_text="Texte recherché dans le nom et la description")
+    country = serializers.CharField(required=False, max_length=100)
+    min_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    min_rate = serializers.IntegerField(required=False, min_value=0)
+    limit = serializers.IntegerField(required=False, min_value=1)
+    offset = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, data):
+        if "min_price" in data and "max_price" in data and data["max_price"] < data["min_price"]:
+            raise serializers.ValidationError({"max_price": "Le prix maximum doit être supérieur au prix minimum."})
+        return data
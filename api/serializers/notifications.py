@@ -9,4 +9,7 @@ class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
-        read_only_fields = ['user_email', 'reservation_details']
+        read_only_fields = [
+            'user_email', 'reservation_details', 'kind',
+            'delivery_status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error', 'read_at', 'coalesced'
+        ]
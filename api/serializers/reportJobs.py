@@ -0,0 +1,33 @@
+from django.urls import reverse
+from rest_framework import serializers
+from api.models import ReportJob
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'report', 'format', 'status', 'progress', 'error',
+            'created_at', 'started_at', 'finished_at', 'status_url', 'download_url'
+        ]
+        read_only_fields = fields
+
+    def build_url(self, name, job):
+        url = reverse(name, kwargs={'job_id': job.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_status_url(self, job):
+        return self.build_url('reports-job-status', job)
+
+    def get_download_url(self, job):
+        if job.status != ReportJob.STATUS_DONE:
+            return None
+        return self.build_url('reports-job-download', job)
+
+
+class ReportJobRequestSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(choices=list(ReportJob.FORMATS), default=ReportJob.FORMAT_CSV)
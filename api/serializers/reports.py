@@ -1,6 +1,9 @@
 from rest_framework import serializers
+from api.analytics import refresh_report
 from api.models import Report
 
+INVALID_PERIOD_MESSAGE = "Période invalide. Formats acceptés : AAAA, AAAA-MM, AAAA-MM-JJ ou AAAA-MM-JJ/AAAA-MM-JJ."
+
 class ReportSerializer(serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
 
@@ -8,3 +11,54 @@ class ReportSerializer(serializers.ModelSerializer):
         model = Report
         fields = '__all__'
         read_only_fields = ['user_email']
+        # Calculés à partir des réservations de la période s'ils ne sont pas fournis
+        extra_kwargs = {
+            'occupancy_rate': {'required': False},
+            'pics_activity': {'required': False},
+        }
+
+    def validate(self, data):
+        if self.instance is None and ('occupancy_rate' not in data or 'pics_activity' not in data):
+            try:
+                Report(period=data.get('period', '')).period_bounds()
+            except ValueError:
+                raise serializers.ValidationError({"period": INVALID_PERIOD_MESSAGE})
+        return data
+
+    def create(self, validated_data):
+        if 'occupancy_rate' not in validated_data or 'pics_activity' not in validated_data:
+            report = Report(period=validated_data['period'])
+            refresh_report(report)
+            validated_data.setdefault('occupancy_rate', report.occupancy_rate)
+            validated_data.setdefault('pics_activity', report.pics_activity)
+            validated_data.setdefault('nb_annulation', report.nb_annulation)
+        return super().create(validated_data)
+
+
+class PeriodQuerySerializer(serializers.Serializer):
+    """Plage de dates (bornes incluses) passée en paramètres de requête."""
+    # Calcul fait dans la requête : au-delà, passer par un rapport généré en arrière-plan
+    MAX_DAYS = 366
+
+    start_date = serializers.DateField(help_text="Premier jour (inclus)")
+    end_date = serializers.DateField(help_text=f"Dernier jour (inclus), au plus {MAX_DAYS} jours après le premier")
+
+    def validate(self, data):
+        if data["end_date"] < data["start_date"]:
+            raise serializers.ValidationError({"end_date": "La date de fin doit être postérieure à la date de début."})
+        if (data["end_date"] - data["start_date"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({
+                "end_date": (
+                    f"Période limitée à {self.MAX_DAYS} jours. Pour une période plus longue, créez un rapport "
+                    "avec POST /api/reports/?async=true : il est calculé en arrière-plan."
+                )
+            })
+        return data
+
+
+class HeatmapQuerySerializer(PeriodQuerySerializer):
+    """Paramètres de la heatmap jour de semaine × heure."""
+    table_saloon_id = serializers.IntegerField(required=False)
+    type = serializers.ChoiceField(choices=["table", "saloon"], required=False)
+    resolution = serializers.ChoiceField(choices=["hour", "quarter"], default="hour",
+                                         help_text="hour : 7×24, quarter : 7×96 (quarts d'heure)")
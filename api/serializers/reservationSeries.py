@@ -0,0 +1,57 @@
+from django.utils import timezone
+from rest_framework import serializers
+from api.models import ReservationSeries, TableSaloon
+from .tableSaloons import TableSaloonSerializer
+
+# Limite de sécurité pour une série bornée par un nombre d'occurrences
+MAX_OCCURRENCES = 104
+
+
+class ReservationSeriesSerializer(serializers.ModelSerializer):
+    table_saloon = TableSaloonSerializer(read_only=True)
+    table_saloon_id = serializers.PrimaryKeyRelatedField(
+        queryset=TableSaloon.objects.all(), source='table_saloon', write_only=True
+    )
+    user_email = serializers.CharField(source='user.email', read_only=True)
+
+    class Meta:
+        model = ReservationSeries
+        fields = [
+            'id', 'frequency', 'first_date', 'until', 'count', 'start', 'end', 'people_count',
+            'status', 'materialized_until', 'created_at', 'user', 'user_email',
+            'table_saloon', 'table_saloon_id'
+        ]
+        read_only_fields = ['status', 'materialized_until', 'created_at', 'user', 'user_email', 'table_saloon']
+
+    def validate(self, data):
+        if data["end"] <= data["start"]:
+            raise serializers.ValidationError(
+                {"end": "L'heure de fin doit être supérieure à l'heure de début."}
+            )
+
+        if data["first_date"] < timezone.localdate():
+            raise serializers.ValidationError(
+                {"first_date": "La série ne peut pas commencer dans le passé."}
+            )
+
+        until, count = data.get("until"), data.get("count")
+        if until is None and count is None:
+            raise serializers.ValidationError(
+                {"until": "Indiquez une date de fin (until) ou un nombre d'occurrences (count)."}
+            )
+        if until is not None and until < data["first_date"]:
+            raise serializers.ValidationError(
+                {"until": "La date de fin doit être postérieure à la première date."}
+            )
+        if count is not None and not 1 <= count <= MAX_OCCURRENCES:
+            raise serializers.ValidationError(
+                {"count": f"Le nombre d'occurrences doit être compris entre 1 et {MAX_OCCURRENCES}."}
+            )
+
+        table_saloon = data["table_saloon"]
+        if data["people_count"] > table_saloon.capacity:
+            raise serializers.ValidationError(
+                {"people_count": f"Le nombre de personnes ({data['people_count']}) dépasse la capacité "
+                                f"de la table/salon ({table_saloon.capacity})."}
+            )
+        return data
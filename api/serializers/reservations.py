@@ -1,11 +1,19 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from api.models import Reservation, TableSaloon
+from api.models.reservations import is_overlap_violation
+from api.availability import rank_tables
 from .tableSaloons import TableSaloonSerializer
 
 class ReservationSerializer(serializers.ModelSerializer):
     table_saloon = TableSaloonSerializer(read_only=True)
     table_saloon_id = serializers.PrimaryKeyRelatedField(
-        queryset=TableSaloon.objects.all(), source='table_saloon', write_only=True
+        queryset=TableSaloon.objects.all(), source='table_saloon', write_only=True, required=False,
+        help_text="Omettre pour laisser le serveur choisir la meilleure table/salon libre."
+    )
+    table_type = serializers.ChoiceField(
+        choices=["table", "saloon"], write_only=True, required=False,
+        help_text="Type souhaité lorsque la table/salon est choisie par le serveur."
     )
     user_email = serializers.CharField(source='user.email', read_only=True)
 
@@ -13,9 +21,9 @@ class ReservationSerializer(serializers.ModelSerializer):
         model = Reservation
         fields = [
             'id', 'date', 'start', 'end', 'people_count', 'status',
-            'user', 'table_saloon', 'table_saloon_id', 'user_email'
+            'user', 'table_saloon', 'table_saloon_id', 'table_type', 'user_email', 'series'
         ]
-        read_only_fields = ['user', 'status', 'table_saloon', 'user_email']  # Ajouter user comme read_only
+        read_only_fields = ['user', 'status', 'table_saloon', 'user_email', 'series']  # Ajouter user comme read_only
 
     def validate(self, data):
         start = data.get("start")
@@ -34,18 +42,84 @@ class ReservationSerializer(serializers.ModelSerializer):
                 {"people_count": f"Le nombre de personnes ({people_count}) dépasse la capacité "
                                 f"de la table/salon ({table_saloon.capacity})."}
             )
+        # Le chevauchement n'est pas vérifié ici : la contrainte d'exclusion
+        # de la base le refuse lors de l'INSERT/UPDATE (voir save()).
+        return data
+
+    def create(self, validated_data):
+        table_type = validated_data.pop('table_type', None)
+        if validated_data.get('table_saloon') is not None:
+            return super().create(validated_data)
+        return self.create_with_best_table(validated_data, table_type)
+
+    def update(self, instance, validated_data):
+        validated_data.pop('table_type', None)
+        return super().update(instance, validated_data)
+
+    def create_with_best_table(self, validated_data, table_type=None):
+        """
+        Allocation mode: try the free tables/saloons best fit first. Each
+        candidate row is locked with SELECT ... FOR UPDATE SKIP LOCKED, so
+        concurrent allocations move on to the next table instead of waiting,
+        and the exclusion constraint remains the final arbiter.
+        """
+        candidates = rank_tables(
+            validated_data['date'], validated_data['start'], validated_data['end'],
+            validated_data['people_count'], table_type
+        )
+        for candidate in candidates:
+            table = TableSaloon.objects.select_for_update(skip_locked=True).filter(pk=candidate.pk).first()
+            if table is None:
+                continue
+            try:
+                with transaction.atomic():
+                    return super().create(dict(validated_data, table_saloon=table))
+            except IntegrityError as exc:
+                if not is_overlap_violation(exc):
+                    raise
+        raise serializers.ValidationError(
+            {"table_saloon_id": ["Aucune table/salon disponible pour ce créneau."]}
+        )
+
+    def save(self, **kwargs):
+        """
+        Save inside a savepoint and turn an overlap rejected by the database
+        exclusion constraint into the usual 400 validation error.
+        """
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as exc:
+            if not is_overlap_violation(exc):
+                raise
+            raise serializers.ValidationError(
+                {"table_saloon_id": ["La table/salon est déjà réservée sur cet intervalle."]}
+            )
+
 
-        if table_saloon and date and start and end:
-            overlapping = Reservation.objects.filter(
-                table_saloon=table_saloon,
-                date=date,
-                status__in=["pending", "completed"],
-                start__lt=end,
-                end__gt=start
-            ).exclude(pk=self.instance.pk if self.instance else None)
-            if overlapping.exists():
-                raise serializers.ValidationError(
-                    {"table_saloon_id": "La table/salon est déjà réservée sur cet intervalle."}
-                )
-
-        return data
\ No newline at end of file
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """Paramètres de recherche des créneaux libres."""
+    date = serializers.DateField()
+    people = serializers.IntegerField(min_value=1)
+    duration = serializers.IntegerField(min_value=15, max_value=24 * 60, default=120,
+                                        help_text="Durée souhaitée en minutes")
+    type = serializers.ChoiceField(choices=["table", "saloon"], required=False)
+
+
+class ReservationBulkItemSerializer(serializers.Serializer):
+    """
+    Élément d'une création en masse. La table est passée par identifiant :
+    les tables du lot sont chargées en une seule requête par la vue.
+    """
+    date = serializers.DateField()
+    start = serializers.TimeField()
+    end = serializers.TimeField()
+    people_count = serializers.IntegerField(min_value=1)
+    table_saloon_id = serializers.IntegerField()
+
+    def validate(self, data):
+        if data["end"] <= data["start"]:
+            raise serializers.ValidationError(
+                {"end": "L'heure de fin doit être supérieure à l'heure de début."}
+            )
+        return data
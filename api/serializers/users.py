@@ -4,6 +4,7 @@ from api.models import User
 from django.contrib.auth.models import Group
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
+from api.roles import ROLES_CLAIM
 
 # --- Custom serializer for login with email ---
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -44,6 +45,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['first_name'] = user.first_name
         token['last_name'] = user.last_name
         token['is_staff'] = user.is_staff
+        # Groupes embarqués dans le token : les permissions n'ont plus à les requêter (voir api/roles.py)
+        token[ROLES_CLAIM] = list(user.groups.values_list('name', flat=True))
         
         return token
 
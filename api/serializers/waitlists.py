@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from api.models import WaitlistEntry, TableSaloon
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    table_saloon_id = serializers.PrimaryKeyRelatedField(
+        queryset=TableSaloon.objects.all(), source='table_saloon', required=False, allow_null=True
+    )
+    user_email = serializers.CharField(source='user.email', read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'date', 'start', 'end', 'people_count', 'table_type', 'table_saloon_id',
+            'status', 'created_at', 'reservation', 'user', 'user_email'
+        ]
+        read_only_fields = ['status', 'created_at', 'reservation', 'user', 'user_email']
+
+    def validate(self, data):
+        if data["end"] <= data["start"]:
+            raise serializers.ValidationError(
+                {"end": "L'heure de fin doit être supérieure à l'heure de début."}
+            )
+
+        table_saloon = data.get("table_saloon")
+        if table_saloon and data["people_count"] > table_saloon.capacity:
+            raise serializers.ValidationError(
+                {"people_count": f"Le nombre de personnes ({data['people_count']}) dépasse la capacité "
+                                f"de la table/salon ({table_saloon.capacity})."}
+            )
+        if not table_saloon and not TableSaloon.objects.filter(capacity__gte=data["people_count"]).exists():
+            raise serializers.ValidationError(
+                {"people_count": "Aucune table/salon ne peut accueillir autant de personnes."}
+            )
+        return data
@@ -1,7 +1,13 @@
 from django.contrib.auth.models import Group, Permission
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
+from api import events, rollups
+from api import unread
+from api.menuCache import bump_menu_version
+from api.models import Menu, Notification, Reservation, Schedule, TableSaloon, User
+from api.reportCache import bump_catalog_version
+
 
 @receiver(post_migrate)
 def ensure_permissions_and_groups(sender, **kwargs):
@@ -35,4 +41,103 @@ def ensure_permissions_and_groups(sender, **kwargs):
 
     # === Manager's group ===
     manager_group, _ = Group.objects.get_or_create(name="Manager")
-    manager_group.permissions.set(Permission.objects.all())
\ No newline at end of file
+    manager_group.permissions.set(Permission.objects.all())
+
+
+# === Agrégat journalier des réservations (DailyReservationRollup) ===
+
+@receiver(post_init, sender=Reservation)
+def remember_reservation_state(sender, instance, **kwargs):
+    """Mémorise la contribution d'une réservation chargée depuis la base."""
+    if instance.pk is not None:
+        rollups.snapshot(instance)
+
+
+@receiver(pre_save, sender=Reservation)
+@receiver(pre_delete, sender=Reservation)
+def load_reservation_state(sender, instance, **kwargs):
+    rollups.ensure_snapshot(instance)
+
+
+@receiver(post_save, sender=Reservation)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.record_saved(instance, created)
+    events.publish_reservations([instance])
+
+
+@receiver(post_delete, sender=Reservation)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    rollups.record_deleted(instance)
+    events.publish_reservations([instance], deleted=True)
+
+
+# === Version du catalogue pour le cache des rapports (api/reportCache.py) ===
+
+@receiver(post_save, sender=TableSaloon)
+@receiver(post_delete, sender=TableSaloon)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def invalidate_report_cache(sender, **kwargs):
+    bump_catalog_version()
+
+
+# === Compteur de notifications non lues (UnreadNotificationCounter) ===
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.read_at is None:
+        unread.adjust_unread({instance.user_id: 1})
+
+
+@receiver(pre_delete, sender=Notification)
+def load_notification_read_state(sender, instance, **kwargs):
+    """L'instance peut être périmée (lue entre-temps via mark_read) : relit l'état en base."""
+    instance._stored_read_at = (
+        Notification.objects.filter(pk=instance.pk).values_list('read_at', flat=True).first()
+    )
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if getattr(instance, '_stored_read_at', instance.read_at) is None:
+        unread.adjust_unread({instance.user_id: -1})
+
+
+# === Flux SSE des disponibilités (api/events.py) ===
+
+@receiver(post_save, sender=TableSaloon)
+def publish_table_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        events.publish_table(instance)
+
+
+@receiver(post_delete, sender=TableSaloon)
+def publish_table_deletion(sender, instance, **kwargs):
+    events.publish_table(instance, deleted=True)
+
+
+# === Version du catalogue des menus (ETag et cache de /api/menus/) ===
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+def bump_menu_catalog(sender, raw=False, **kwargs):
+    if not raw:
+        bump_menu_version()
+
+
+@receiver(pre_save, sender=User)
+def remember_stored_email(sender, instance, raw=False, update_fields=None, **kwargs):
+    """L'email du propriétaire figure dans le corps des menus mis en cache (user_email)."""
+    if raw or instance.pk is None or (update_fields is not None and 'email' not in update_fields):
+        instance._stored_email = None
+        return
+    instance._stored_email = User.objects.filter(pk=instance.pk).values_list('email', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def bump_menu_catalog_on_email_change(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored_email', None)
+    if not created and stored is not None and stored != instance.email and instance.menus.exists():
+        bump_menu_version()
@@ -1,3 +1,1572 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from io import BytesIO, StringIO
+from urllib.parse import parse_qs, urlsplit
+from unittest import mock
+import time as timer
+from datetime import date, time, timedelta
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from api import events, partitions, rollups
+from api.analytics import demand_heatmap
+from api.availability import DAY_SECONDS, IntervalIndex
+from api.models import (
+    DailyReservationRollup, Menu, Notification, NotificationLedger, Report, ReportJob, Reservation, ReservationSeries,
+    TableSaloon, User, WaitlistEntry,
+)
+from api.models.reservations import is_overlap_violation
+from api.notificationBackends import NotificationBackend
+from api.notificationDelivery import deliver_batch
+from api.menuCache import menu_catalog_version
+from api.notify import notify
+from api.reportJobs import claim_jobs, requeue_stale_jobs, run_report_job
+from api.management.commands import send_reservation_reminders
+from api.rollups import period_summary
+from api.serializers import CustomTokenObtainPairSerializer
+from api.unread import unread_count
+
+
+class ReservationListQueryCountTests(APITestCase):
+    """
+    Pin the number of SQL queries of every reservation listing endpoint:
+    it must not grow with the page size (no N+1 on table_saloon / user).
+    """
+    PAGE_SIZES = (2, 15)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(email="manager@test.local", password="x")
+        cls.manager.groups.add(Group.objects.get_or_create(name="Manager")[0])
+        cls.client_user = User.objects.create_user(email="client@test.local", password="x")
+        cls.superuser = User.objects.create_superuser(email="admin@test.local", password="x")
+
+        users = [cls.client_user, cls.manager, cls.superuser]
+        today = timezone.now().date()
+        reservations = []
+        for i in range(30):
+            table = TableSaloon.objects.create(name=f"Table {i}", capacity=4, type="table")
+            for day in (today, today + timedelta(days=1)):
+                reservations.append(Reservation(
+                    date=day, start=time(12), end=time(14), people_count=2,
+                    user=users[len(reservations) % len(users)], table_saloon=table,
+                ))
+        Reservation.objects.bulk_create(reservations)
+        for reservation in Reservation.objects.all():
+            Notification.objects.create(
+                type="email", message="Rappel", user=reservation.user, reservation=reservation
+            )
+
+    def assertListQueries(self, user, url, expected, token=None):
+        self.client.force_authenticate(user, token=token)
+        for page_size in self.PAGE_SIZES:
+            with self.subTest(url=url, user=user.email, limit=page_size):
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url, {"limit": page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_superuser_listings(self):
+        # COUNT + SELECT avec jointures
+        for url in (
+            "/api/reservations/",
+            "/api/reservations/my_reservations/",
+            "/api/reservations/upcoming/",
+            "/api/reservations/today/",
+            "/api/reservations/active/",
+            "/api/notifications/",
+        ):
+            self.assertListQueries(self.superuser, url, 2)
+
+    def test_manager_listings(self):
+        # Une seule résolution des groupes par requête + COUNT + SELECT
+        for url in (
+            "/api/reservations/",
+            "/api/reservations/upcoming/",
+            "/api/reservations/today/",
+            "/api/reservations/active/",
+            "/api/notifications/",
+        ):
+            self.assertListQueries(self.manager, url, 3)
+
+    @override_settings(ROLES_FROM_TOKEN=True)
+    def test_manager_listings_with_roles_claim(self):
+        # Les groupes sont lus dans le token : aucune requête sur auth_group
+        token = CustomTokenObtainPairSerializer.get_token(self.manager).access_token
+        for url in (
+            "/api/reservations/",
+            "/api/reservations/today/",
+            "/api/notifications/",
+        ):
+            self.assertListQueries(self.manager, url, 2, token=token)
+
+    def test_roles_claim_is_ignored_by_default(self):
+        # Sans ROLES_FROM_TOKEN, un manager rétrogradé perd ses droits immédiatement
+        token = CustomTokenObtainPairSerializer.get_token(self.manager).access_token
+        self.manager.groups.clear()
+        self.client.force_authenticate(self.manager, token=token)
+        response = self.client.get("/api/reservations/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], Reservation.objects.filter(user=self.manager).count())
+        self.assertLess(response.data["count"], Reservation.objects.count())
+
+    def test_client_listings(self):
+        for url in (
+            "/api/reservations/",
+            "/api/reservations/my_reservations/",
+            "/api/reservations/upcoming/",
+            "/api/reservations/active/",
+        ):
+            self.assertListQueries(self.client_user, url, 3)
+        self.assertListQueries(self.client_user, "/api/notifications/", 3)
+
+
+class FailingBackend(NotificationBackend):
+    def send(self, notification):
+        raise ConnectionError("SMTP indisponible")
+
+
+class SlowBackend(NotificationBackend):
+    """Compte les envois simultanés."""
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def send(self, notification):
+        with self.lock:
+            SlowBackend.in_flight += 1
+            SlowBackend.max_in_flight = max(SlowBackend.max_in_flight, SlowBackend.in_flight)
+        timer.sleep(0.02)
+        with self.lock:
+            SlowBackend.in_flight -= 1
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class NotificationOutboxTests(TestCase):
+    """Livraison des notifications en attente par deliver_notifications."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="client@test.local", password="x")
+
+    def notify(self, count=1, type="email"):
+        return [
+            Notification.objects.create(type=type, message=f"Rappel {i}", user=self.user)
+            for i in range(count)
+        ]
+
+    def test_pending_email_is_delivered_once(self):
+        notification, = self.notify()
+        call_command("deliver_notifications", "--once", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["client@test.local"])
+        self.assertEqual(mail.outbox[0].body, "Rappel 0")
+        notification.refresh_from_db()
+        self.assertEqual(notification.delivery_status, Notification.DELIVERY_SENT)
+        self.assertIsNotNone(notification.sent_at)
+
+        # Déjà envoyée : rien n'est réclamé au passage suivant
+        self.assertEqual(deliver_batch(), (0, 0, 0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_sms_channel_uses_its_backend(self):
+        notification, = self.notify(type="sms")
+        with self.assertLogs("api.notificationBackends", level="INFO"):
+            self.assertEqual(deliver_batch(), (1, 1, 0, 0))
+        self.assertEqual(mail.outbox, [])
+        notification.refresh_from_db()
+        self.assertEqual(notification.delivery_status, Notification.DELIVERY_SENT)
+
+    @override_settings(NOTIFICATION_BACKENDS={"email": "api.tests.FailingBackend", "sms": "api.tests.FailingBackend"})
+    def test_failures_are_retried_with_backoff_then_abandoned(self):
+        notification, = self.notify()
+        self.assertEqual(deliver_batch(), (1, 0, 1, 0))
+        notification.refresh_from_db()
+        self.assertEqual(notification.delivery_status, Notification.DELIVERY_PENDING)
+        self.assertEqual(notification.attempts, 1)
+        self.assertIn("SMTP indisponible", notification.last_error)
+        first_delay = notification.next_attempt_at - timezone.now()
+        self.assertGreater(first_delay, timedelta(seconds=20))
+
+        # Pas encore échue : non réclamée
+        self.assertEqual(deliver_batch(), (0, 0, 0, 0))
+
+        for attempt in range(2, Notification.MAX_ATTEMPTS + 1):
+            Notification.objects.filter(pk=notification.pk).update(next_attempt_at=timezone.now())
+            deliver_batch()
+            notification.refresh_from_db()
+            self.assertEqual(notification.attempts, attempt)
+        self.assertEqual(notification.delivery_status, Notification.DELIVERY_FAILED)
+
+    @override_settings(NOTIFICATION_BACKENDS={"email": "api.tests.SlowBackend", "sms": "api.tests.SlowBackend"})
+    def test_concurrency_is_bounded(self):
+        self.notify(count=12)
+        SlowBackend.max_in_flight = 0
+        self.assertEqual(deliver_batch(limit=50, concurrency=3), (12, 12, 0, 0))
+        self.assertLessEqual(SlowBackend.max_in_flight, 3)
+        self.assertGreater(SlowBackend.max_in_flight, 1)
+
+    def test_expired_lease_is_reclaimed(self):
+        notification, = self.notify()
+        Notification.objects.filter(pk=notification.pk).update(
+            delivery_status=Notification.DELIVERY_SENDING, next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(deliver_batch(), (1, 1, 0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_delivers_immediately(self):
+        notification, = self.notify()
+        self.assertTrue(notification.send())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(notification.delivery_status, Notification.DELIVERY_SENT)
+
+
+class ReminderCommandTests(TestCase):
+    """send_reservation_reminders : un seul rappel par réservation en attente du jour."""
+
+    def test_reminders_are_created_once(self):
+        user = User.objects.create_user(email="client@test.local", password="x", first_name="Ana")
+        table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        pending = Reservation.objects.create(
+            date=tomorrow, start=time(12), end=time(14), people_count=2, user=user, table_saloon=table
+        )
+        Reservation.objects.create(
+            date=tomorrow, start=time(19), end=time(21), people_count=2, user=user, table_saloon=table,
+            status=Reservation.STATUS_CANCELED,
+        )
+        Reservation.objects.create(
+            date=tomorrow + timedelta(days=1), start=time(12), end=time(14), people_count=2, user=user,
+            table_saloon=table,
+        )
+
+        # Verrou consultatif + lecture des réservations + registre + bulk_create + compteurs
+        # de non lues, dans une transaction (SAVEPOINT / RELEASE sous TestCase)
+        out = StringIO()
+        with self.assertNumQueries(7):
+            call_command("send_reservation_reminders", stdout=out)
+        call_command("send_reservation_reminders", stdout=out)
+        # Seuls les rappels réellement créés sont comptés (message et compteur de non lues)
+        self.assertEqual([line.split()[1] for line in out.getvalue().splitlines()], ["1", "0"])
+        self.assertEqual(unread_count(user), 1)
+
+        reminders = Notification.objects.filter(kind=Notification.KIND_REMINDER)
+        self.assertEqual(list(reminders.values_list("reservation_id", flat=True)), [pending.pk])
+        self.assertIn("Bonjour Ana", reminders.get().message)
+        self.assertEqual(reminders.get().delivery_status, Notification.DELIVERY_PENDING)
+
+    def test_reminder_key_is_enforced_by_the_database(self):
+        user = User.objects.create_user(email="client@test.local", password="x")
+        reservation = Reservation.objects.create(
+            date=timezone.localdate() + timedelta(days=1), start=time(12), end=time(14), people_count=2, user=user,
+        )
+        call_command("send_reservation_reminders", stdout=StringIO())
+        # Autre auteur que la commande : le doublon est refusé par la base
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            NotificationLedger.objects.create(reservation=reservation, kind=Notification.KIND_REMINDER)
+        self.assertEqual(NotificationLedger.objects.get().reservation, reservation)
+
+    def test_flush_counts_only_inserted_reminders(self):
+        user = User.objects.create_user(email="client@test.local", password="x")
+        first, second = (
+            Reservation.objects.create(
+                date=timezone.localdate() + timedelta(days=1), start=time(hour), end=time(hour + 1), people_count=2,
+                user=user,
+            )
+            for hour in (12, 19)
+        )
+        # Rappel enregistré par un autre auteur entre la lecture et l'insertion
+        NotificationLedger.objects.create(reservation=first, kind=Notification.KIND_REMINDER)
+        batch = [
+            Notification(type="email", kind=Notification.KIND_REMINDER, message="Rappel", reservation=reservation,
+                         user=user)
+            for reservation in (first, second)
+        ]
+        self.assertEqual(send_reservation_reminders.Command.flush(batch), 1)
+        self.assertEqual(list(Notification.objects.values_list("reservation_id", flat=True)), [second.pk])
+        self.assertEqual(unread_count(user), 1)
+
+
+class NotificationReadStateTests(APITestCase):
+    """Etat lu / non lu et compteur dénormalisé par utilisateur."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="client@test.local", password="x")
+        cls.other = User.objects.create_user(email="other@test.local", password="x")
+        for user, count in ((cls.user, 3), (cls.other, 2)):
+            for i in range(count):
+                Notification.objects.create(type="email", message=f"Message {i}", user=user)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def unread(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/notifications/unread_count/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["unread"]
+
+    def test_counter_follows_creation_reading_and_deletion(self):
+        self.assertEqual(self.unread(), 3)
+
+        notification = Notification.objects.filter(user=self.user).first()
+        response = self.client.post(f"/api/notifications/{notification.pk}/read/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data["read_at"])
+        self.assertEqual(self.unread(), 2)
+        # Déjà lue : le compteur ne bouge pas
+        self.client.post(f"/api/notifications/{notification.pk}/read/")
+        self.assertEqual(self.unread(), 2)
+
+        Notification.objects.filter(user=self.user, read_at__isnull=True).first().delete()
+        notification.delete()
+        self.assertEqual(self.unread(), 1)
+
+    def test_mark_all_read_only_touches_current_user(self):
+        response = self.client.post("/api/notifications/mark_all_read/")
+        self.assertEqual(response.data, {"marked_read": 3})
+        self.assertEqual(self.unread(), 0)
+        self.assertFalse(Notification.objects.filter(user=self.user, read_at__isnull=True).exists())
+
+        response = self.client.get("/api/notifications/", {"unread": "true"})
+        self.assertEqual(response.data["count"], 0)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.unread(), 2)
+
+    def test_feed_is_most_recent_first(self):
+        response = self.client.get("/api/notifications/")
+        dates = [item["sending_date"] for item in response.data["results"]]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+
+class AvailabilityStreamTests(APITransactionTestCase):
+    """
+    Flux SSE des disponibilités (/api/tablesaloons/events/). Hors transaction
+    de test, pour vérifier que la connexion à la base est rendue pendant le flux.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="client@test.local", password="x")
+        self.table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        self.client.force_authenticate(self.user)
+
+    def open_stream(self, **params):
+        response = self.client.get("/api/tablesaloons/events/", params, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        # Aucune connexion à la base n'est gardée pendant la diffusion
+        self.assertIsNone(connection.connection)
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), b"retry: 3000\n\n")
+        self.addCleanup(self.close_stream, response)
+        return stream
+
+    @staticmethod
+    def close_stream(response):
+        # Fermer la réponse envoie request_finished : la connexion de test doit survivre
+        with mock.patch.object(connection, "close_if_unusable_or_obsolete"):
+            response.close()
+
+    def test_reservation_and_table_changes_are_pushed(self):
+        stream = self.open_stream(date=timezone.localdate().isoformat())
+        with transaction.atomic():
+            reservation = Reservation.objects.create(
+                date=timezone.localdate(), start=time(12), end=time(14), people_count=2,
+                user=self.user, table_saloon=self.table,
+            )
+        # Autre jour : filtré
+        with transaction.atomic():
+            Reservation.objects.create(
+                date=timezone.localdate() + timedelta(days=1), start=time(12), end=time(14), people_count=2,
+                user=self.user, table_saloon=self.table,
+            )
+        with transaction.atomic():
+            self.table.update_availability(False)
+
+        self.assertEqual(
+            next(stream).decode(),
+            f'id: 1\nevent: reservation\ndata: {{"id":{reservation.pk},"table":{self.table.pk},'
+            f'"date":"{reservation.date.isoformat()}","start":"12:00","end":"14:00","status":"pending"}}\n\n',
+        )
+        self.assertIn('event: table\ndata: {"id":%d,"status":"unavailable"' % self.table.pk, next(stream).decode())
+
+    def test_slow_client_gets_a_single_resync(self):
+        stream = self.open_stream()
+        with transaction.atomic():
+            for _ in range(events.SUBSCRIBER_QUEUE_SIZE + 5):
+                self.table.save()
+        self.assertIn(b"event: resync", next(stream))
+
+    def test_invalid_date(self):
+        response = self.client.get("/api/tablesaloons/events/", {"date": "demain"})
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationCoalescingTests(TestCase):
+    """Regroupement des notifications en attente et limite de débit par utilisateur."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="client@test.local", password="x")
+        table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        cls.reservation = Reservation.objects.create(
+            date=timezone.localdate() + timedelta(days=1), start=time(12), end=time(14), people_count=2,
+            user=cls.user, table_saloon=table,
+        )
+
+    def test_notifications_are_merged_within_the_window(self):
+        first = notify(self.user, "email", "Réservation modifiée (1)", reservation=self.reservation)
+        second = notify(self.user, "email", "Réservation modifiée (2)", reservation=self.reservation)
+        self.assertEqual(first.pk, second.pk)
+        # Autre canal : notification distincte
+        notify(self.user, "sms", "Réservation modifiée", reservation=self.reservation)
+
+        merged = Notification.objects.get(pk=first.pk)
+        self.assertEqual(merged.message, "Réservation modifiée (2)")
+        self.assertEqual(merged.coalesced, 1)
+        self.assertGreater(merged.next_attempt_at, timezone.now())
+        self.assertEqual(unread_count(self.user), 2)
+
+        # Fenêtre écoulée : la notification part et une nouvelle est créée
+        Notification.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_batch(), (1, 1, 0, 0))
+        third = notify(self.user, "email", "Réservation modifiée (3)", reservation=self.reservation)
+        self.assertNotEqual(third.pk, first.pk)
+
+    @override_settings(NOTIFICATION_RATE_BURST=2, NOTIFICATION_RATE_PER_HOUR=60)
+    def test_send_rate_is_limited_per_user(self):
+        other = User.objects.create_user(email="other@test.local", password="x")
+        for i in range(4):
+            Notification.objects.create(type="sms", message=f"Message {i}", user=self.user)
+        Notification.objects.create(type="sms", message="Message", user=other)
+
+        with self.assertLogs("api.notificationBackends", level="INFO"):
+            self.assertEqual(deliver_batch(), (3, 3, 0, 0))
+        deferred = Notification.objects.filter(user=self.user, delivery_status=Notification.DELIVERY_PENDING)
+        self.assertEqual(deferred.count(), 2)
+        # Un jeton par minute : report d'environ une minute, sans tentative comptée
+        for notification in deferred:
+            self.assertEqual(notification.attempts, 0)
+            self.assertAlmostEqual(
+                (notification.next_attempt_at - timezone.now()).total_seconds(), 60, delta=5
+            )
+        self.assertEqual(deliver_batch(), (0, 0, 0, 0))
+
+
+class NotificationPartitionTests(TestCase):
+    """manage_notification_partitions : partitions mensuelles et rétention."""
+
+    def test_old_partitions_are_archived_and_dropped(self):
+        user = User.objects.create_user(email="client@test.local", password="x")
+        old = Notification.objects.create(
+            type="email", message="Ancienne", user=user, sending_date=timezone.now() - timedelta(days=800)
+        )
+        recent = Notification.objects.create(type="email", message="Récente", user=user)
+        self.assertEqual(unread_count(user), 2)
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            out = StringIO()
+            call_command("manage_notification_partitions", "--retention-months", "12", "--archive-dir", archive_dir, stdout=out)
+
+            name = partitions.partition_name(partitions.month_start(old.sending_date))
+            self.assertIn(f"Partition {name} créée", out.getvalue())
+            with gzip.open(os.path.join(archive_dir, f"{name}.csv.gz"), "rt") as archive:
+                lines = archive.read().splitlines()
+            self.assertEqual(len(lines), 2)
+            self.assertIn("Ancienne", lines[1])
+
+        self.assertNotIn(name, partitions.monthly_partitions().values())
+        self.assertEqual(list(Notification.objects.values_list("pk", flat=True)), [recent.pk])
+        self.assertEqual(unread_count(user), 1)
+        # Les mois à venir existent déjà : rien à créer au passage suivant
+        self.assertEqual(partitions.ensure_partitions(), [])
+
+
+class MenuCatalogCacheTests(APITestCase):
+    """ETag / Last-Modified et corps pré-rendu de /api/menus/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="chef@test.local", password="x")
+        for i in range(5):
+            Menu.objects.create(name=f"Burger {i}", description="Boeuf", price=12, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_catalog_is_served_without_querying_menus(self):
+        response = self.client.get("/api/menus/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # Corps pré-rendu : seule la version du catalogue est lue
+        with self.assertNumQueries(1):
+            cached = self.client.get("/api/menus/")
+        self.assertEqual(cached.content, response.content)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/menus/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get("/api/menus/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304
+        )
+
+        Menu.objects.filter(name="Burger 0").get().delete()
+        response = self.client.get("/api/menus/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_owner_email_change_invalidates_the_catalog(self):
+        etag = self.client.get("/api/menus/")["ETag"]
+        # Connexion : seul last_login change, le catalogue reste valide
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=["last_login"])
+        self.assertEqual(self.client.get("/api/menus/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.email = "chef@nouveau.local"
+        self.user.save()
+        response = self.client.get("/api/menus/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["user_email"], "chef@nouveau.local")
+
+    def test_detail(self):
+        menu = Menu.objects.get(name="Burger 1")
+        self.client.force_authenticate(self.user)
+        response = self.client.get(f"/api/menus/{menu.pk}/")
+        self.assertEqual(response.json()["name"], "Burger 1")
+        self.assertEqual(
+            self.client.get(f"/api/menus/{menu.pk}/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+        )
+        menu.price = 14
+        menu.save()
+        response = self.client.get(f"/api/menus/{menu.pk}/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.json()["price"], "14.00")
+        self.assertEqual(self.client.get("/api/menus/0/").status_code, 404)
+
+        # Supprimé : 404 même avec l'ETag de l'ancienne ou de la nouvelle version
+        etag, pk = response["ETag"], menu.pk
+        menu.delete()
+        current = f'"menu-{pk}-v{menu_catalog_version()[0]}"'
+        for validator in (etag, current):
+            response = self.client.get(f"/api/menus/{pk}/", HTTP_IF_NONE_MATCH=validator)
+            self.assertEqual(response.status_code, 404)
+
+
+class MenuSearchTests(APITestCase):
+    """Recherche plein texte / trigrammes et facettes de /api/menus/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email="chef@test.local", password="x")
+        for name, description, price, rate, country in (
+            ("Classic Cheeseburger", "Cheddar and pickles", 12, 4, "France"),
+            ("Smoked BBQ Burger", "Brisket with cheese sauce", 18, 5, "USA"),
+            ("Veggie Burger", "Black beans", 10, 3, "France"),
+            ("Shackburger", "Cheese, lettuce, tomato", 15, 5, "USA"),
+        ):
+            Menu.objects.create(
+                name=name, description=description, price=price, rate=rate, country=country, user=user
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, **params):
+        response = self.client.get("/api/menus/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_search_with_facets(self):
+        data = self.search(q="cheese")
+        names = [menu["name"] for menu in data["results"]]
+        self.assertEqual(data["count"], 3)
+        # Correspondance dans le nom (poids A) avant la description (poids B)
+        self.assertEqual(names[0], "Classic Cheeseburger")
+        self.assertEqual(data["facets"]["country"], [{"country": "USA", "count": 2}, {"country": "France", "count": 1}])
+
+        # Les facettes ignorent le filtre pays lui-même
+        data = self.search(q="cheese", country="France")
+        self.assertEqual([menu["name"] for menu in data["results"]], ["Classic Cheeseburger"])
+        self.assertEqual(len(data["facets"]["country"]), 2)
+
+    def test_typos_filters_and_pagination(self):
+        self.assertEqual(self.search(q="shakburger")["results"][0]["name"], "Shackburger")
+
+        data = self.search(min_price=11, max_price=16, min_rate=4, limit=1)
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNotNone(data["next"])
+
+        response = self.client.get("/api/menus/", {"min_price": 20, "max_price": 10})
+        self.assertEqual(response.status_code, 400)
+        # Sans paramètre : la liste complète, non paginée
+        self.assertEqual(len(self.client.get("/api/menus/").json()), 4)
+
+    @override_settings(MENU_SEARCH_CACHE_SECONDS=120)
+    def test_equivalent_queries_share_one_cache_entry(self):
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            first = self.client.get("/api/menus/?min_price=11&max_price=16&limit=10")
+            second = self.client.get("/api/menus/?max_price=16.00&min_price=11.0&utm_source=x")
+            cache_set.assert_called_once()
+            self.assertEqual(cache_set.call_args.args[2], 120)
+            # Autre page : autre entrée
+            self.search(min_price=11, max_price=16, offset=1)
+            self.assertEqual(cache_set.call_count, 2)
+        self.assertEqual(first.json()["count"], 2)
+        self.assertEqual(second.json()["results"], first.json()["results"])
+
+
+class WaitlistPromotionTests(APITestCase):
+    """Une annulation promeut la première demande en attente qui tient dans le créneau libéré."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.holder = User.objects.create_user(email="holder@test.local", password="x")
+        cls.first = User.objects.create_user(email="first@test.local", password="x")
+        cls.second = User.objects.create_user(email="second@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        cls.day = timezone.now().date() + timedelta(days=1)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        self.reservation = Reservation.objects.create(
+            date=self.day, start=time(12), end=time(14), people_count=2,
+            user=self.holder, table_saloon=self.table,
+        )
+
+    def wait(self, user, start, end, people_count=2):
+        return WaitlistEntry.objects.create(
+            date=self.day, start=start, end=end, people_count=people_count, user=user, table_type="table"
+        )
+
+    def test_cancel_promotes_the_oldest_fitting_request(self):
+        too_big = self.wait(self.first, time(12), time(14), people_count=6)
+        first = self.wait(self.first, time(12), time(13))
+        overlapping = self.wait(self.second, time(12, 30), time(13, 30))
+        second = self.wait(self.second, time(13), time(14))
+
+        response = self.client.post(f"/api/reservations/{self.reservation.pk}/cancel/")
+        self.assertEqual(response.status_code, 200)
+
+        for entry in (too_big, first, overlapping, second):
+            entry.refresh_from_db()
+        self.assertEqual(too_big.status, WaitlistEntry.STATUS_WAITING)
+        self.assertEqual(overlapping.status, WaitlistEntry.STATUS_WAITING)
+        self.assertEqual(first.status, WaitlistEntry.STATUS_PROMOTED)
+        self.assertEqual(second.status, WaitlistEntry.STATUS_PROMOTED)
+
+        promoted = first.reservation
+        self.assertEqual((promoted.user, promoted.table_saloon), (self.first, self.table))
+        self.assertEqual((promoted.start, promoted.end), (time(12), time(13)))
+        self.assertEqual(promoted.status, Reservation.STATUS_PENDING)
+        self.assertTrue(Notification.objects.filter(user=self.first, reservation=promoted).exists())
+        self.assertTrue(Notification.objects.filter(user=self.second, reservation=second.reservation).exists())
+
+    def test_nothing_is_promoted_while_the_slot_is_taken(self):
+        entry = self.wait(self.first, time(12), time(13))
+        self.reservation.people_count = 3
+        self.reservation.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistEntry.STATUS_WAITING)
+        self.assertFalse(Reservation.objects.filter(user=self.first).exists())
+
+
+class ReportPeriodLimitTests(APITestCase):
+    """Les calculs synchrones sur une plage de dates sont limités à un an."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_longer_ranges_are_refused(self):
+        # 2024 : 366 jours, bornes incluses
+        response = self.client.get("/api/reports/heatmap/", {"start_date": "2024-01-01", "end_date": "2024-12-31"})
+        self.assertEqual(response.status_code, 200)
+        for url in ("/api/reports/heatmap/", "/api/reports/archive/"):
+            response = self.client.get(url, {"start_date": "2024-01-01", "end_date": "2025-01-01"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("async=true", str(response.data["end_date"][0]))
+
+
+class IntervalIndexTests(SimpleTestCase):
+    """Index des intervalles occupés d'une table pour un jour (secondes depuis minuit)."""
+
+    def test_overlapping_and_touching_intervals_are_merged(self):
+        index = IntervalIndex([(3600, 7200), (10800, 14400), (7000, 8000), (14400, 15000)])
+        self.assertEqual(list(index), [(3600, 8000), (10800, 15000)])
+        # Un intervalle qui couvre les deux les fusionne en un seul
+        index.add(7500, 11000)
+        self.assertEqual(list(index), [(3600, 15000)])
+
+    def test_overlaps_excludes_bounds(self):
+        index = IntervalIndex([(3600, 7200)])
+        self.assertFalse(index.overlaps(0, 3600))
+        self.assertFalse(index.overlaps(7200, 9000))
+        self.assertTrue(index.overlaps(7199, 9000))
+        self.assertTrue(index.overlaps(0, DAY_SECONDS))
+
+    def test_free_slots_edges(self):
+        index = IntervalIndex([(0, 3600), (7200, 9000), (9600, 20000)])
+        # Intervalles à cheval sur l'ouverture et la fermeture
+        self.assertEqual(index.free_slots(1800, 12000), [(3600, 7200), (9000, 9600)])
+        # Durée minimale : la fenêtre de 10 minutes ne suffit plus
+        self.assertEqual(index.free_slots(1800, 12000, min_length=1800), [(3600, 7200)])
+        # Jour entièrement libre / entièrement occupé
+        self.assertEqual(IntervalIndex().free_slots(0, DAY_SECONDS), [(0, DAY_SECONDS)])
+        self.assertEqual(IntervalIndex([(0, DAY_SECONDS)]).free_slots(3600, 7200), [])
+
+
+class AvailabilityEndpointTests(APITestCase):
+    """Créneaux libres de /api/reservations/availability/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.small = TableSaloon.objects.create(name="Table 2", capacity=2, type="table")
+        cls.large = TableSaloon.objects.create(name="Table 6", capacity=6, type="table")
+        TableSaloon.objects.create(name="Table 8", capacity=8, type="table", status="unavailable")
+        cls.day = timezone.now().date() + timedelta(days=1)
+        for start, end, status in ((time(12), time(14), Reservation.STATUS_PENDING),
+                                   (time(19), time(21), Reservation.STATUS_CANCELED)):
+            Reservation.objects.create(
+                date=cls.day, start=start, end=end, people_count=4, user=cls.admin,
+                table_saloon=cls.large, status=status,
+            )
+
+    def test_free_slots_of_fitting_tables(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(
+            "/api/reservations/availability/", {"date": self.day, "people": 3, "duration": 90}
+        )
+        self.assertEqual(response.status_code, 200)
+        tables = response.data["tables"]
+        # Table trop petite et table indisponible exclues ; réservation annulée ignorée
+        self.assertEqual([table["id"] for table in tables], [self.large.id])
+        self.assertEqual(
+            [(slot["start"], slot["end"]) for slot in tables[0]["slots"]],
+            [(time(0), time(12)), (time(14), time(23, 59, 59))],
+        )
+
+
+class ReservationOverlapConstraintTests(APITestCase):
+    """Le chevauchement est refusé par la contrainte d'exclusion et rendu en 400."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        cls.day = timezone.now().date() + timedelta(days=1)
+        cls.existing = Reservation.objects.create(
+            date=cls.day, start=time(12), end=time(14), people_count=2, user=cls.admin, table_saloon=cls.table
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def book(self, start, end):
+        return self.client.post("/api/reservations/", {
+            "date": self.day, "start": start, "end": end, "people_count": 2, "table_saloon_id": self.table.id,
+        })
+
+    def test_overlap_is_a_400(self):
+        response = self.book("13:00", "15:00")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"table_saloon_id": ["La table/salon est déjà réservée sur cet intervalle."]})
+        self.assertEqual(Reservation.objects.count(), 1)
+
+        # Bornes jointives : intervalles semi-ouverts [start, end)
+        self.assertEqual(self.book("14:00", "15:00").status_code, 201)
+        # Une réservation annulée ne bloque plus le créneau
+        self.existing.status = Reservation.STATUS_CANCELED
+        self.existing.save()
+        self.assertEqual(self.book("12:30", "13:30").status_code, 201)
+
+    def test_update_into_an_overlap_is_a_400(self):
+        other = Reservation.objects.create(
+            date=self.day, start=time(18), end=time(20), people_count=2, user=self.admin, table_saloon=self.table
+        )
+        response = self.client.patch(f"/api/reservations/{other.pk}/", {"start": "13:00"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("table_saloon_id", response.data)
+        other.refresh_from_db()
+        self.assertEqual(other.start, time(18))
+
+    def test_orm_writes_are_rejected_too(self):
+        with self.assertRaises(IntegrityError) as caught, transaction.atomic():
+            Reservation.objects.create(
+                date=self.day, start=time(11), end=time(12, 30), people_count=2, user=self.admin,
+                table_saloon=self.table,
+            )
+        self.assertTrue(is_overlap_violation(caught.exception))
+
+
+class BenchmarkCommandTests(TestCase):
+    """benchmark_reservations : temps avant / après index, sans laisser de données."""
+
+    def test_benchmark_reports_every_query_and_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_reservations", "--rows", "400", "--tables", "5", "--users", "10", stdout=out)
+
+        summary = out.getvalue().split("=== Résumé (Execution Time, ms) ===")[1].splitlines()[1:]
+        labels = [line[:28].strip() for line in summary if " -> " in line]
+        self.assertEqual(labels, [
+            "overlap (write path)", "availability (day index)", "today", "upcoming", "active",
+            "my_reservations", "upcoming (client)",
+        ])
+        self.assertIn("données de test annulées", out.getvalue())
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(User.objects.filter(email__endswith="@benchmark.local").exists())
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Reservation._meta.db_table)
+        for index in Reservation._meta.indexes:
+            self.assertIn(index.name, constraints)
+
+
+class ReservationBulkTests(APITestCase):
+    """POST /api/reservations/bulk/ : validation par lot et résultat par élément."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        cls.other_table = TableSaloon.objects.create(name="Table 2", capacity=2, type="table")
+        cls.day = timezone.now().date() + timedelta(days=1)
+        Reservation.objects.create(
+            date=cls.day, start=time(12), end=time(14), people_count=2, user=cls.admin, table_saloon=cls.table
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def item(self, start, end, people_count=2, table=None):
+        return {
+            "date": str(self.day), "start": start, "end": end, "people_count": people_count,
+            "table_saloon_id": (table or self.table).id,
+        }
+
+    def bulk(self, items):
+        return self.client.post("/api/reservations/bulk/", items, format="json")
+
+    def test_all_valid_is_a_201(self):
+        # Tables, réservations du jour, bulk_create, agrégats journaliers et version
+        # des rapports, dans un SAVEPOINT : aucune requête par élément
+        with self.assertNumQueries(7):
+            response = self.bulk([self.item("14:00", "16:00"), self.item("19:00", "21:00"),
+                                  self.item("12:00", "14:00", table=self.other_table)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result["status"] for result in response.data], ["created"] * 3)
+        self.assertEqual(Reservation.objects.count(), 4)
+
+    def test_partial_success_is_a_207(self):
+        response = self.bulk([
+            self.item("13:00", "15:00"),                      # chevauche la réservation existante
+            self.item("19:00", "21:00"),
+            self.item("20:00", "22:00"),                      # chevauche l'élément précédent du lot
+            self.item("19:00", "21:00", people_count=3, table=self.other_table),
+            self.item("21:00", "20:00"),
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result["index"] for result in response.data], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            [result["status"] for result in response.data], ["error", "created", "error", "error", "error"]
+        )
+        self.assertIn("table_saloon_id", response.data[0]["errors"])
+        self.assertIn("table_saloon_id", response.data[2]["errors"])
+        self.assertIn("people_count", response.data[3]["errors"])
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_nothing_valid_is_a_400(self):
+        self.assertEqual(self.bulk([]).status_code, 400)
+        response = self.bulk([self.item("12:30", "13:30"), dict(self.item("10:00", "11:00"), table_saloon_id=0)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result["status"] for result in response.data], ["error", "error"])
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_concurrent_booking_is_a_409_and_creates_nothing(self):
+        # Lecture « avant » la réservation concurrente : l'index en mémoire ne la voit pas
+        empty_index = lambda *args, **kwargs: defaultdict(IntervalIndex)  # noqa: E731
+        with mock.patch("api.views.reservations.build_day_index", side_effect=empty_index):
+            response = self.bulk([self.item("16:00", "17:00"), self.item("13:00", "15:00")])
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("error", response.data)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+
+class BestFitAllocationTests(APITestCase):
+    """Sans table_saloon_id, le serveur choisit la plus petite table libre qui convient."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.day = timezone.now().date() + timedelta(days=1)
+        cls.two = TableSaloon.objects.create(name="Table 2", capacity=2, type="table")
+        cls.four_open = TableSaloon.objects.create(name="Table 4 A", capacity=4, type="table")
+        cls.four_tight = TableSaloon.objects.create(name="Table 4 B", capacity=4, type="table")
+        cls.eight = TableSaloon.objects.create(name="Table 8", capacity=8, type="table")
+        cls.saloon = TableSaloon.objects.create(name="Salon", capacity=4, type="saloon")
+        TableSaloon.objects.create(name="Table 3", capacity=3, type="table", status="unavailable")
+        # 4 B n'est libre que de 19h à 21h : le réserver fragmente le moins la soirée
+        for start, end in ((time(12), time(19)), (time(21), time(23))):
+            Reservation.objects.create(
+                date=cls.day, start=start, end=end, people_count=2, user=cls.admin, table_saloon=cls.four_tight
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def book(self, people_count, **extra):
+        response = self.client.post("/api/reservations/", {
+            "date": self.day, "start": "19:00", "end": "21:00", "people_count": people_count, **extra,
+        })
+        return response
+
+    def test_smallest_then_tightest_free_table(self):
+        response = self.book(3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["table_saloon"]["id"], self.four_tight.id)
+        self.assertEqual(self.book(3).data["table_saloon"]["id"], self.four_open.id)
+        # Type demandé : le salon de 4 reste libre pour une demande sans type
+        self.assertEqual(self.book(3, table_type="table").data["table_saloon"]["id"], self.eight.id)
+        self.assertEqual(self.book(2).data["table_saloon"]["id"], self.two.id)
+        self.assertEqual(self.book(2).data["table_saloon"]["id"], self.saloon.id)
+
+        response = self.book(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("table_saloon_id", response.data)
+
+    def test_overlap_on_a_stale_candidate_moves_to_the_next(self):
+        # Classement établi avant qu'une réservation concurrente ne prenne la première table
+        with mock.patch("api.serializers.reservations.rank_tables", return_value=[self.four_tight, self.four_open]):
+            Reservation.objects.create(
+                date=self.day, start=time(19), end=time(21), people_count=2, user=self.admin,
+                table_saloon=self.four_tight,
+            )
+            response = self.book(3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["table_saloon"]["id"], self.four_open.id)
+
+
+class BestFitLockingTests(APITransactionTestCase):
+    """Une table verrouillée par une allocation concurrente est sautée (SKIP LOCKED), sans attente."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        self.day = timezone.now().date() + timedelta(days=1)
+        self.best = TableSaloon.objects.create(name="Table 2", capacity=2, type="table")
+        self.next = TableSaloon.objects.create(name="Table 4", capacity=4, type="table")
+        self.client.force_authenticate(self.admin)
+
+    def test_locked_table_is_skipped(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    TableSaloon.objects.select_for_update().get(pk=self.best.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            started = timer.perf_counter()
+            response = self.client.post("/api/reservations/", {
+                "date": self.day, "start": "19:00", "end": "21:00", "people_count": 2,
+            })
+            self.assertLess(timer.perf_counter() - started, 5)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["table_saloon"]["id"], self.next.id)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Pagination par curseur (?pagination=cursor) de /api/reservations/ et /api/notifications/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(email="admin@test.local", password="x")
+        table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        today = timezone.now().date()
+        # Mêmes (date, start) sur plusieurs tables : l'id départage
+        for day in range(3):
+            for hour in (12, 19):
+                for other in range(2 if hour == 19 else 1):
+                    Reservation.objects.create(
+                        date=today + timedelta(days=day), start=time(hour), end=time(hour + 2), people_count=2,
+                        user=cls.user, table_saloon=table if not other else TableSaloon.objects.create(
+                            name=f"Table {day}-{hour}", capacity=4, type="table"
+                        ),
+                    )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_round_trip(self):
+        expected = list(Reservation.objects.order_by("date", "start", "id").values_list("id", flat=True))
+        self.assertEqual(len(expected), 9)
+
+        seen, pages = [], []
+        url = "/api/reservations/?pagination=cursor&limit=4"
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn("count", data)
+            pages.append(data)
+            seen += [item["id"] for item in data["results"]]
+            url = data["next"]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        # Retour en arrière depuis la dernière page : la page précédente à l'identique
+        previous = self.client.get(pages[2]["previous"]).json()
+        self.assertEqual(previous["results"], pages[1]["results"])
+        self.assertEqual(previous["next"], pages[1]["next"])
+
+    def test_notification_feed_keeps_its_order_in_cursor_mode(self):
+        now = timezone.now()
+        # Même sending_date pour deux notifications : l'id départage
+        for minutes in (30, 10, 10, 0, 20):
+            Notification.objects.create(
+                type="email", message="Message", user=self.user, sending_date=now - timedelta(minutes=minutes)
+            )
+        offset_ids = [item["id"] for item in self.client.get("/api/notifications/?limit=10").json()["results"]]
+
+        first = self.client.get("/api/notifications/?pagination=cursor&limit=2").json()
+        self.assertEqual([item["id"] for item in first["results"]], offset_ids[:2])
+        self.assertIsNone(first["previous"])
+        seen, url = [], "/api/notifications/?pagination=cursor&limit=2"
+        while url:
+            data = self.client.get(url).json()
+            seen += [item["id"] for item in data["results"]]
+            url = data["next"]
+        self.assertEqual(seen, offset_ids)
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(self.client.get(second["previous"]).json()["results"], first["results"])
+
+    def test_tampered_cursor_is_a_400(self):
+        valid = self.client.get("/api/reservations/?pagination=cursor&limit=4").json()["next"]
+        token = parse_qs(urlsplit(valid).query)["cursor"][0]
+        payload = base64.urlsafe_b64decode(token.encode())
+        tampered = (
+            "not-a-cursor",
+            token[:-4],
+            base64.urlsafe_b64encode(payload.replace(b'"p": [', b'"p": [1, ')).decode(),
+            base64.urlsafe_b64encode(b'{"p": ["2026-01-01", "12:00:00", 99999999999999999999]}').decode(),
+            base64.urlsafe_b64encode(b'{"p": ["yesterday", "noon", 1]}').decode(),
+        )
+        for cursor in tampered:
+            response = self.client.get("/api/reservations/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data, {"detail": "Cursor invalide."})
+        response = self.client.get("/api/notifications/", {"cursor": tampered[-1]})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReservationSeriesTests(APITestCase):
+    """Séries récurrentes : fenêtre glissante, conflits ignorés et annulation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        cls.first_date = timezone.localdate() + timedelta(days=1)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def create_series(self, **extra):
+        response = self.client.post("/api/reservations/series/", {
+            "frequency": "weekly", "first_date": self.first_date, "start": "19:00", "end": "21:00",
+            "people_count": 2, "table_saloon_id": self.table.id, **extra,
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def test_rolling_window_and_conflicts(self):
+        taken = self.first_date + timedelta(days=7)
+        Reservation.objects.create(
+            date=taken, start=time(20), end=time(22), people_count=2, user=self.admin, table_saloon=self.table
+        )
+        data = self.create_series(count=10)
+        # Fenêtre de 28 jours : J+1, J+8 (déjà prise), J+15, J+22
+        self.assertEqual(data["created"], 3)
+        self.assertEqual(data["skipped_dates"], [taken])
+        series = ReservationSeries.objects.get(pk=data["id"])
+        self.assertEqual(series.materialized_until, self.first_date + timedelta(days=21))
+
+        out = StringIO()
+        call_command("materialize_reservation_series", "--days", "120", stdout=out)
+        self.assertIn("✔ 6 occurrence(s) créée(s), 0 ignorée(s)", out.getvalue())
+        dates = list(series.occurrences.order_by("date").values_list("date", flat=True))
+        self.assertEqual(len(dates), 9)
+        self.assertEqual(dates[-1], self.first_date + timedelta(days=63))
+        # Déjà à jour : rien de plus
+        call_command("materialize_reservation_series", "--days", "120", stdout=out)
+        self.assertEqual(series.occurrences.count(), 9)
+
+    def test_materialization_queries_do_not_grow_with_the_series(self):
+        def materialize_queries(count, hour):
+            series = ReservationSeries.objects.create(
+                first_date=self.first_date, count=count, start=time(hour), end=time(hour + 1),
+                people_count=2, user=self.admin, table_saloon=self.table,
+            )
+            with CaptureQueriesContext(connection) as queries:
+                created, _ = series.materialize(horizon=self.first_date + timedelta(days=400))
+            self.assertEqual(len(created), count)
+            return len(queries)
+
+        self.assertEqual(materialize_queries(52, hour=12), materialize_queries(4, hour=14))
+
+    def test_cancel_series(self):
+        data = self.create_series(until=self.first_date + timedelta(days=14))
+        series = ReservationSeries.objects.get(pk=data["id"])
+        self.assertEqual(series.occurrences.count(), 3)
+        done = series.occurrences.order_by("date").first()
+        done.status = Reservation.STATUS_COMPLETED
+        done.save()
+        waiting = WaitlistEntry.objects.create(
+            date=self.first_date + timedelta(days=7), start=time(19), end=time(20), people_count=2, user=self.admin,
+        )
+
+        response = self.client.post(f"/api/reservations/series/{series.pk}/cancel/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], ReservationSeries.STATUS_CANCELED)
+        statuses = list(series.occurrences.order_by("date").values_list("status", flat=True))
+        self.assertEqual(
+            statuses, [Reservation.STATUS_COMPLETED, Reservation.STATUS_CANCELED, Reservation.STATUS_CANCELED]
+        )
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, WaitlistEntry.STATUS_PROMOTED)
+
+        self.assertEqual(self.client.post(f"/api/reservations/series/{series.pk}/cancel/").status_code, 400)
+        # Série annulée : plus aucune occurrence créée
+        call_command("materialize_reservation_series", "--days", "120", stdout=StringIO())
+        self.assertEqual(series.occurrences.count(), 3)
+
+
+class ReportExportTests(APITestCase):
+    """Exports CSV et NDJSON de toutes les réservations de la période d'un rapport."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table, terrasse", capacity=4, type="table")
+        cls.report = Report.objects.create(period="2030-03", occupancy_rate=0, pics_activity="", user=cls.admin)
+        cls.first = Reservation.objects.create(
+            date=date(2030, 3, 1), start=time(12), end=time(14), people_count=2, user=cls.admin, table_saloon=cls.table
+        )
+        cls.second = Reservation.objects.create(
+            date=date(2030, 3, 31), start=time(19, 30), end=time(21), people_count=3, user=cls.admin,
+            status=Reservation.STATUS_CANCELED,
+        )
+        # Hors période
+        Reservation.objects.create(
+            date=date(2030, 4, 1), start=time(12), end=time(14), people_count=2, user=cls.admin, table_saloon=cls.table
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def export(self, kind):
+        response = self.client.get(f"/api/reports/{self.report.pk}/export/{kind}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, content = self.export("csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows, [
+            ["id", "date", "start", "end", "people_count", "status", "user_email", "table_saloon_id", "table_saloon_name"],
+            [str(self.first.pk), "2030-03-01", "12:00:00", "14:00:00", "2", "pending", "admin@test.local",
+             str(self.table.pk), "Table, terrasse"],
+            [str(self.second.pk), "2030-03-31", "19:30:00", "21:00:00", "3", "canceled", "admin@test.local", "", ""],
+        ])
+
+    def test_ndjson(self):
+        response, content = self.export("json")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([line["id"] for line in lines], [self.first.pk, self.second.pk])
+        self.assertEqual(lines[0], {
+            "id": self.first.pk, "date": "2030-03-01", "start": "12:00:00", "end": "14:00:00", "people_count": 2,
+            "status": "pending", "user_email": "admin@test.local", "table_saloon_id": self.table.pk,
+            "table_saloon_name": "Table, terrasse",
+        })
+        self.assertIsNone(lines[1]["table_saloon_id"])
+
+
+class ReservationArchiveTests(APITestCase):
+    """Archive .npz par colonnes (endpoint et commande export_reservation_archive)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        cls.reservations = [
+            Reservation.objects.create(
+                date=date(2030, 3, day), start=time(hour, 30), end=time(hour + 2), people_count=day,
+                user=cls.admin, table_saloon=table, status=status,
+            )
+            for day, hour, table, status in (
+                (1, 12, cls.table, Reservation.STATUS_PENDING),
+                (2, 19, None, Reservation.STATUS_CANCELED),
+                (3, 12, cls.table, Reservation.STATUS_COMPLETED),
+            )
+        ]
+        Reservation.objects.create(
+            date=date(2030, 4, 1), start=time(12), end=time(14), people_count=2, user=cls.admin, table_saloon=cls.table
+        )
+
+    def check_archive(self, archive):
+        self.assertEqual(list(archive["id"]), [reservation.pk for reservation in self.reservations])
+        self.assertEqual(
+            list(archive["date"].astype("datetime64[D]").astype(str)), ["2030-03-01", "2030-03-02", "2030-03-03"]
+        )
+        self.assertEqual(list(archive["start"]), [12 * 60 + 30, 19 * 60 + 30, 12 * 60 + 30])
+        self.assertEqual(list(archive["end"]), [14 * 60, 21 * 60, 14 * 60])
+        self.assertEqual(list(archive["people_count"]), [1, 2, 3])
+        self.assertEqual(
+            [str(archive["status_labels"][code]) for code in archive["status"]], ["pending", "canceled", "completed"]
+        )
+        self.assertEqual(list(archive["table_saloon_id"]), [self.table.pk, -1, self.table.pk])
+        self.assertEqual(dict(zip(archive["table_ids"], archive["table_names"])), {self.table.pk: "Table 1"})
+        self.assertEqual(list(archive["period"]), ["2030-03-01", "2030-03-31"])
+
+    def test_endpoint(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/reports/archive/", {"start_date": "2030-03-01", "end_date": "2030-03-31"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="reservations-2030-03-01-2030-03-31.npz"', response["Content-Disposition"])
+        with np.load(BytesIO(b"".join(response.streaming_content))) as archive:
+            self.check_archive(archive)
+
+    def test_endpoint_is_for_managers_only(self):
+        self.client.force_authenticate(User.objects.create_user(email="client@test.local", password="x"))
+        response = self.client.get("/api/reports/archive/", {"start_date": "2030-03-01", "end_date": "2030-03-31"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_command_reads_in_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "history")
+            out = StringIO()
+            call_command(
+                "export_reservation_archive", "--from", "2030-03-01", "--to", "2030-03-31",
+                "--output", output, "--chunk-size", "2", stdout=out,
+            )
+            self.assertIn("✔ 3 réservation(s) archivée(s)", out.getvalue())
+            with np.load(output + ".npz") as archive:
+                self.check_archive(archive)
+
+
+class DailyRollupTests(TestCase):
+    """Agrégat journalier maintenu par les signaux, identique à une reconstruction complète."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="client@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=6, type="table")
+        cls.other_table = TableSaloon.objects.create(name="Table 2", capacity=6, type="table")
+        cls.day = date(2030, 3, 1)
+
+    def rollup(self):
+        return {
+            (row.date, row.table_saloon_id, row.status): (row.count, row.covers, row.booked_minutes)
+            for row in DailyReservationRollup.objects.all()
+            if row.count or row.covers or row.booked_minutes
+        }
+
+    def reserve(self, start, end, people_count=2, table=None, day=None):
+        return Reservation.objects.create(
+            date=day or self.day, start=start, end=end, people_count=people_count, user=self.user,
+            table_saloon=table or self.table,
+        )
+
+    def test_deltas_on_create_status_change_and_delete(self):
+        lunch = self.reserve(time(12), time(14), people_count=4)
+        dinner = self.reserve(time(19), time(20, 30))
+        pending = (self.day, self.table.pk, Reservation.STATUS_PENDING)
+        canceled = (self.day, self.table.pk, Reservation.STATUS_CANCELED)
+        self.assertEqual(self.rollup(), {pending: (2, 6, 210)})
+
+        dinner.status = Reservation.STATUS_CANCELED
+        dinner.save()
+        self.assertEqual(self.rollup(), {pending: (1, 4, 120), canceled: (1, 2, 90)})
+
+        # Instance chargée avec des champs différés : l'ancien état est relu avant la sauvegarde
+        moved = Reservation.objects.only("id", "people_count").get(pk=lunch.pk)
+        moved.people_count = 5
+        moved.save(update_fields=["people_count"])
+        self.assertEqual(self.rollup(), {pending: (1, 5, 120), canceled: (1, 2, 90)})
+
+        lunch.refresh_from_db()
+        lunch.table_saloon = self.other_table
+        lunch.date = self.day + timedelta(days=1)
+        lunch.save()
+        self.assertEqual(self.rollup(), {
+            (self.day + timedelta(days=1), self.other_table.pk, Reservation.STATUS_PENDING): (1, 5, 120),
+            canceled: (1, 2, 90),
+        })
+
+        lunch.delete()
+        dinner.delete()
+        self.assertEqual(self.rollup(), {})
+
+    def test_bulk_status_change(self):
+        for hour in (12, 14, 16):
+            self.reserve(time(hour), time(hour + 1))
+        updated = rollups.record_status_change(
+            Reservation.objects.filter(start__gte=time(14)), Reservation.STATUS_COMPLETED
+        )
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.rollup(), {
+            (self.day, self.table.pk, Reservation.STATUS_PENDING): (1, 2, 60),
+            (self.day, self.table.pk, Reservation.STATUS_COMPLETED): (2, 4, 120),
+        })
+
+    def test_rebuild_matches_incremental_rollup(self):
+        reservations = [
+            self.reserve(time(hour), time(hour + 1, 15), people_count=1 + hour % 4, table=table, day=day)
+            for day in (self.day, self.day + timedelta(days=1))
+            for table in (self.table, self.other_table)
+            for hour in (11, 13, 19)
+        ]
+        reservations[1].status = Reservation.STATUS_CANCELED
+        reservations[1].save()
+        reservations[4].delete()
+        rollups.record_status_change(Reservation.objects.filter(start=time(19)), Reservation.STATUS_COMPLETED)
+        incremental = self.rollup()
+
+        DailyReservationRollup.objects.update(count=0, covers=0, booked_minutes=0)
+        out = StringIO()
+        call_command("rebuild_reservation_rollups", stdout=out)
+        self.assertIn(f"✔ {len(incremental)} ligne(s)", out.getvalue())
+        self.assertEqual(self.rollup(), incremental)
+
+        # Reconstruction partielle : les autres dates ne bougent pas
+        DailyReservationRollup.objects.filter(date=self.day).update(count=99)
+        rollups.rebuild(self.day, self.day)
+        self.assertEqual(self.rollup(), incremental)
+
+
+class ReportJobTests(APITestCase):
+    """File de jobs de rapports : prise en charge, exécution et suivi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.report = Report.objects.create(period="2030-03", occupancy_rate=0, pics_activity="", user=cls.admin)
+        table = TableSaloon.objects.create(name="Table 1", capacity=4, type="table")
+        for day in (1, 2):
+            Reservation.objects.create(
+                date=date(2030, 3, day), start=time(12), end=time(14), people_count=2, user=cls.admin,
+                table_saloon=table,
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(jobs_dir.cleanup)
+        self.enterContext(override_settings(REPORT_JOBS_DIR=jobs_dir.name))
+
+    def test_claim_is_oldest_first_and_exclusive(self):
+        jobs = [ReportJob.objects.create(report=self.report) for _ in range(3)]
+        self.assertEqual(claim_jobs(2), [jobs[0].pk, jobs[1].pk])
+        self.assertEqual(claim_jobs(2), [jobs[2].pk])
+        self.assertEqual(claim_jobs(2), [])
+        self.assertEqual(set(ReportJob.objects.values_list("status", flat=True)), {ReportJob.STATUS_RUNNING})
+
+        # Worker arrêté brutalement : le job redevient disponible
+        ReportJob.objects.filter(pk=jobs[0].pk).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), 1)
+        self.assertEqual(claim_jobs(2), [jobs[0].pk])
+
+    def test_status_and_download(self):
+        response = self.client.post(f"/api/reports/{self.report.pk}/jobs/", {"format": "csv"})
+        self.assertEqual(response.status_code, 202)
+        status_url = response["Location"]
+        self.assertEqual(response.data["status"], ReportJob.STATUS_QUEUED)
+        self.assertIsNone(response.data["download_url"])
+        job_id = response.data["id"]
+        self.assertEqual(self.client.get(f"/api/reports/jobs/{job_id}/download/").status_code, 409)
+
+        self.assertEqual(claim_jobs(1), [job_id])
+        self.assertEqual(self.client.get(status_url).data["status"], ReportJob.STATUS_RUNNING)
+        # Exécuté ici plutôt que dans le pool de run_report_worker
+        with mock.patch("api.reportJobs.close_old_connections"):
+            self.assertEqual(run_report_job(job_id), ReportJob.STATUS_DONE)
+
+        data = self.client.get(status_url).data
+        self.assertEqual((data["status"], data["progress"]), (ReportJob.STATUS_DONE, 100))
+        response = self.client.get(data["download_url"])
+        self.assertEqual(response.status_code, 200)
+        # En-tête + deux réservations
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 3)
+        self.report.refresh_from_db()
+        self.assertGreater(self.report.occupancy_rate, 0)
+
+    def test_failure_is_recorded(self):
+        job = ReportJob.objects.create(report=self.report)
+        claim_jobs(1)
+        with mock.patch("api.reportJobs.close_old_connections"), \
+                mock.patch("api.reportJobs.refresh_report", side_effect=RuntimeError("boom")):
+            self.assertEqual(run_report_job(job.pk), ReportJob.STATUS_FAILED)
+        data = self.client.get(f"/api/reports/jobs/{job.pk}/").data
+        self.assertEqual((data["status"], data["error"]), (ReportJob.STATUS_FAILED, "RuntimeError: boom"))
+
+
+class DemandHeatmapTests(APITestCase):
+    """Heatmap jour de semaine × heure (ou quart d'heure) de /api/reports/heatmap/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=6, type="table")
+        cls.other_table = TableSaloon.objects.create(name="Table 2", capacity=6, type="table")
+        cls.saloon = TableSaloon.objects.create(name="Salon", capacity=6, type="saloon")
+        monday, sunday = date(2030, 3, 4), date(2030, 3, 10)
+        for day, start, people_count, table, status in (
+            (monday, time(12), 2, cls.table, Reservation.STATUS_PENDING),
+            (monday, time(12, 30), 3, cls.other_table, Reservation.STATUS_COMPLETED),
+            (monday, time(12, 15), 4, cls.table, Reservation.STATUS_CANCELED),
+            (sunday, time(19, 45), 5, cls.saloon, Reservation.STATUS_PENDING),
+            # Hors période
+            (date(2030, 3, 11), time(12), 2, cls.table, Reservation.STATUS_PENDING),
+        ):
+            Reservation.objects.create(
+                date=day, start=start, end=time(start.hour + 1), people_count=people_count, user=cls.admin,
+                table_saloon=table, status=status,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def heatmap(self, **params):
+        response = self.client.get(
+            "/api/reports/heatmap/", {"start_date": "2030-03-04", "end_date": "2030-03-10", **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_hourly_buckets(self):
+        data = self.heatmap()
+        self.assertEqual(data["weekdays"][0], "monday")
+        self.assertEqual(len(data["slots"]), 24)
+        self.assertEqual((len(data["bookings"]), len(data["bookings"][0])), (7, 24))
+        # Lundi 12h : deux réservations actives (5 couverts) et une annulation
+        self.assertEqual(data["bookings"][0][12], 2)
+        self.assertEqual(data["covers"][0][12], 5)
+        self.assertEqual(data["cancellations"][0][12], 1)
+        self.assertEqual(data["bookings"][6][19], 1)
+        self.assertEqual(sum(map(sum, data["bookings"])), 3)
+        # Un seul agrégat groupé, calculé par la base
+        with self.assertNumQueries(1):
+            self.assertEqual(demand_heatmap(date(2030, 3, 4), date(2030, 3, 10))["bookings"], data["bookings"])
+
+    def test_quarter_hour_buckets_and_filters(self):
+        data = self.heatmap(resolution="quarter")
+        self.assertEqual(len(data["slots"]), 96)
+        self.assertEqual(data["slots"][49], "12:15")
+        self.assertEqual((data["bookings"][0][48], data["bookings"][0][50]), (1, 1))
+        self.assertEqual(data["cancellations"][0][49], 1)
+        self.assertEqual(data["covers"][6][19 * 4 + 3], 5)
+
+        self.assertEqual(sum(map(sum, self.heatmap(type="saloon")["bookings"])), 1)
+        data = self.heatmap(table_saloon_id=self.table.pk)
+        self.assertEqual(sum(map(sum, data["bookings"])), 1)
+        self.assertEqual(sum(map(sum, data["cancellations"])), 1)
+
+    def test_managers_only(self):
+        self.client.force_authenticate(User.objects.create_user(email="client@test.local", password="x"))
+        response = self.client.get("/api/reports/heatmap/", {"start_date": "2030-03-04", "end_date": "2030-03-10"})
+        self.assertEqual(response.status_code, 403)
+
+
+class ReportCacheTests(APITestCase):
+    """Résultats de rapports en cache jusqu'à une écriture sur une date de leur période."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.local", password="x")
+        cls.table = TableSaloon.objects.create(name="Table 1", capacity=6, type="table")
+        cls.report = Report.objects.create(period="2030-03", occupancy_rate=0, pics_activity="", user=cls.admin)
+        cls.reservation = Reservation.objects.create(
+            date=date(2030, 3, 4), start=time(12), end=time(14), people_count=2, user=cls.admin,
+            table_saloon=cls.table,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def summary(self):
+        with mock.patch("api.views.reports.period_summary", wraps=period_summary) as compute:
+            response = self.client.get(f"/api/reports/{self.report.pk}/summary/")
+        self.assertEqual(response.status_code, 200)
+        return response.data, compute.called
+
+    def test_writes_on_the_period_invalidate_only_that_period(self):
+        data, computed = self.summary()
+        self.assertTrue(computed)
+        self.assertEqual((data["reservations"], data["covers"]), (1, 2))
+        self.assertFalse(self.summary()[1])
+
+        # Écriture hors période : le résultat reste en cache
+        Reservation.objects.create(
+            date=date(2030, 4, 1), start=time(12), end=time(14), people_count=2, user=self.admin,
+            table_saloon=self.table,
+        )
+        self.assertFalse(self.summary()[1])
+
+        Reservation.objects.create(
+            date=date(2030, 3, 20), start=time(19), end=time(21), people_count=4, user=self.admin,
+            table_saloon=self.table,
+        )
+        data, computed = self.summary()
+        self.assertTrue(computed)
+        self.assertEqual((data["reservations"], data["covers"]), (2, 6))
+
+        self.client.post(f"/api/reservations/{self.reservation.pk}/cancel/")
+        data, computed = self.summary()
+        self.assertTrue(computed)
+        self.assertEqual((data["reservations"], data["cancellations"]), (1, 1))
+
+    def test_catalog_changes_invalidate_every_period(self):
+        before = self.summary()[0]["occupancy_rate"]
+        self.assertGreater(before, 0)
+        TableSaloon.objects.create(name="Table 2", capacity=4, type="table")
+        data, computed = self.summary()
+        self.assertTrue(computed)
+        # Deux tables : le taux d'occupation est divisé par deux
+        self.assertAlmostEqual(data["occupancy_rate"], before / 2, places=1)
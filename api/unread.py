@@ -0,0 +1,57 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import Notification, UnreadNotificationCounter
+
+
+def adjust_unread(deltas):
+    """
+    Apply {user_id: delta} to the unread counters. Increments are a single
+    INSERT ... ON CONFLICT DO UPDATE (safe under concurrent writers);
+    decrements only UPDATE existing rows, so a notification deleted along
+    with its user never recreates the counter.
+    """
+    for user_id, delta in deltas.items():
+        if delta < 0:
+            UnreadNotificationCounter.objects.filter(user_id=user_id).update(unread=F('unread') + delta)
+    rows = [(user_id, delta) for user_id, delta in deltas.items() if delta > 0]
+    if not rows:
+        return
+    table = connection.ops.quote_name(UnreadNotificationCounter._meta.db_table)
+    placeholders = ', '.join(['(%s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, unread) VALUES {placeholders}
+            ON CONFLICT (user_id) DO UPDATE SET unread = {table}.unread + EXCLUDED.unread
+            """,
+            [value for row in rows for value in row],
+        )
+
+
+def record_created(notifications):
+    """Après un bulk_create de notifications (pas de signal post_save)."""
+    adjust_unread(Counter(n.user_id for n in notifications if n.read_at is None))
+
+
+def unread_count(user):
+    """Nombre de notifications non lues, lu dans le compteur (une requête par clé primaire)."""
+    return (
+        UnreadNotificationCounter.objects.filter(user_id=user.pk).values_list('unread', flat=True).first() or 0
+    )
+
+
+def mark_read(user, queryset=None):
+    """
+    Mark the unread notifications of `user` (optionally restricted to
+    `queryset`) as read with a single UPDATE, and decrement the counter by
+    the number of rows it changed. Returns that number.
+    """
+    queryset = Notification.objects.all() if queryset is None else queryset
+    with transaction.atomic():
+        updated = queryset.filter(user_id=user.pk, read_at__isnull=True).update(read_at=timezone.now())
+        adjust_unread({user.pk: -updated})
+    return updated
@@ -20,6 +20,7 @@ from api.views import (
     MenuListCreateView,
     MenuDetailView,
     table_saloons_list,
+    table_saloons_events,
     table_saloon_detail
 )
 from django.urls import path
@@ -57,6 +58,7 @@ urlpatterns = [
 
     # TableSaloon endpoints
     path('tablesaloons/', table_saloons_list, name='tablesaloons-list-create'),
+    path('tablesaloons/events/', table_saloons_events, name='tablesaloons-events'),
     path('tablesaloons/<int:pk>/', table_saloon_detail, name='tablesaloons-detail'),
 ]
 
@@ -7,7 +7,7 @@ from .users import (UserListView, UserDetailView, RegisterView, AdminAssignGroup
     DemoteFromManagerView,
     ChangePasswordView,
     DeactivateAccountView )
-from .tableSaloons import table_saloon_detail, table_saloons_list
+from .tableSaloons import table_saloon_detail, table_saloons_events, table_saloons_list
 from .reservations import ReservationViewSet
 from .menus import MenuDetailView, MenuListCreateView
 from .notifications import NotificationViewSet
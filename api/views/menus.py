@@ -1,3 +1,7 @@
+import hashlib
+
+from django.conf import settings
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -5,10 +9,15 @@ from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 
+from api.menuCache import cached_menu_response
+from api.menuSearch import country_facets, search_menus
 from api.models import Menu
-from api.serializers import MenuSerializer
+from api.serializers import MenuSerializer, MenuSearchQuerySerializer
 from api.permissions import IsManagerOrAdmin
 
+# Paramètres qui font passer GET /api/menus/ en mode recherche
+SEARCH_PARAMS = frozenset(MenuSearchQuerySerializer().fields)
+
 
 class MenuListCreateView(APIView):
     """
@@ -16,11 +25,49 @@ class MenuListCreateView(APIView):
     POST : Crée un menu (Manager/Admin uniquement).
     """
 
-    @swagger_auto_schema(responses={200: MenuSerializer(many=True)})
+    @swagger_auto_schema(query_serializer=MenuSearchQuerySerializer,
+                         responses={200: MenuSerializer(many=True), 304: 'Not Modified'})
     def get(self, request):
-        menus = Menu.objects.all()
-        serializer = MenuSerializer(menus, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        """
+        Sans paramètre : liste complète servie depuis le corps pré-rendu de la
+        version courante du catalogue, avec ETag / Last-Modified (304 si inchangée).
+        Avec q, country, min_price, max_price, min_rate, limit ou offset :
+        recherche paginée classée par pertinence, avec le nombre de résultats
+        par pays (`facets`), mise en cache de la même façon.
+        """
+        if SEARCH_PARAMS.isdisjoint(request.query_params):
+            def render():
+                menus = Menu.objects.select_related('user')
+                return MenuSerializer(menus, many=True, context={'request': request}).data
+
+            return cached_menu_response(request, 'menus', render)
+
+        params = MenuSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        paginator = LimitOffsetPagination()
+
+        def render_search():
+            page = paginator.paginate_queryset(search_menus(params.validated_data), request, view=self)
+            data = paginator.get_paginated_response(
+                MenuSerializer(page, many=True, context={'request': request}).data
+            ).data
+            data['facets'] = {'country': country_facets(params.validated_data)}
+            return data
+
+        # Clé normalisée : filtres validés (ordre et écriture des paramètres
+        # indifférents, paramètres inconnus ignorés) et pagination effective ;
+        # l'hôte aussi, les liens next/previous étant des URL absolues.
+        filters = sorted(
+            (name, str(value)) for name, value in params.validated_data.items()
+            if name not in ('limit', 'offset')
+        )
+        fingerprint = hashlib.md5(repr((
+            request.get_host(), filters, paginator.get_limit(request), paginator.get_offset(request),
+        )).encode()).hexdigest()
+        return cached_menu_response(
+            request, f'menus-search-{fingerprint}', render_search, timeout=settings.MENU_SEARCH_CACHE_SECONDS
+        )
 
     @swagger_auto_schema(request_body=MenuSerializer, responses={201: MenuSerializer})
     def post(self, request):
@@ -45,11 +92,15 @@ class MenuDetailView(APIView):
     def get_object(self, pk):
         return get_object_or_404(Menu, pk=pk)
 
-    @swagger_auto_schema(responses={200: MenuSerializer})
+    @swagger_auto_schema(responses={200: MenuSerializer, 304: 'Not Modified'})
     def get(self, request, pk):
-        menu = self.get_object(pk)
-        serializer = MenuSerializer(menu, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def render():
+            menu = self.get_object(pk)
+            return MenuSerializer(menu, context={'request': request}).data
+
+        return cached_menu_response(
+            request, f'menu-{pk}', render, exists=lambda: Menu.objects.filter(pk=pk).exists()
+        )
 
     @swagger_auto_schema(request_body=MenuSerializer, responses={200: MenuSerializer})
     def put(self, request, pk):
@@ -1,7 +1,14 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from api.models import Notification
+from api.notify import notify
+from api.pagination import NotificationPagination
+from api.roles import is_manager_or_superuser
 from api.serializers import NotificationSerializer
+from api.unread import mark_read, unread_count
 
 class NotificationViewSet(viewsets.ModelViewSet):
     """
@@ -15,6 +22,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
         """
@@ -23,22 +31,39 @@ class NotificationViewSet(viewsets.ModelViewSet):
         - Clients see only their own notifications.
         """
         user = self.request.user
-        if user.is_superuser or user.groups.filter(name__in=['Manager']).exists():
-            return Notification.objects.all()
+        # The serializer reads user.email and nests the reservation with its table and user
+        queryset = Notification.objects.select_related(
+            'user', 'reservation__table_saloon', 'reservation__user'
+        ).order_by('-sending_date', '-id')
+        # ?unread=true : seulement les notifications non lues
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(read_at__isnull=True)
+        if is_manager_or_superuser(self.request):
+            return queryset
         # Clients can only see notifications linked to them
-        return Notification.objects.filter(user_id=user.id)
+        return queryset.filter(user_id=user.id)
 
     def perform_create(self, serializer):
         """
         Automatically assign the current authenticated user as the notification owner.
+        Goes through notify(): repeated notifications on the same reservation
+        within the coalescing window are merged into the pending one.
         """
-        serializer.save(user=self.request.user)
+        data = serializer.validated_data
+        serializer.instance = notify(
+            self.request.user, data['type'], data['message'], reservation=data.get('reservation')
+        )
 
     # --- Swagger documentation ---
-    @swagger_auto_schema(responses={200: NotificationSerializer(many=True)})
+    @swagger_auto_schema(
+        manual_parameters=[openapi.Parameter(
+            'unread', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description="Only unread notifications"
+        )],
+        responses={200: NotificationSerializer(many=True)}
+    )
     def list(self, request, *args, **kwargs):
         """
-        List all notifications.
+        List all notifications, most recent first.
         Managers/Admins see all, Clients see only their own.
         """
         return super().list(request, *args, **kwargs)
@@ -75,3 +100,35 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Accessible to Managers/Admins or superusers.
         """
         return super().destroy(request, *args, **kwargs)
+
+    # --- Lu / non lu (notifications de l'utilisateur courant) ---
+    @swagger_auto_schema(method='get', responses={200: openapi.Schema(
+        type=openapi.TYPE_OBJECT, properties={'unread': openapi.Schema(type=openapi.TYPE_INTEGER)}
+    )})
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """
+        Number of unread notifications of the current user, read from a
+        per-user counter (no COUNT(*) on notifications): cheap to poll.
+        """
+        return Response({"unread": unread_count(request.user)})
+
+    @swagger_auto_schema(method='post', request_body=None, responses={200: 'Number of notifications marked as read'})
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every unread notification of the current user as read, in a single UPDATE."""
+        return Response({"marked_read": mark_read(request.user)})
+
+    @swagger_auto_schema(method='post', request_body=None, responses={200: NotificationSerializer})
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Mark one of the current user's notifications as read."""
+        notification = self.get_object()
+        if notification.user_id != request.user.id:
+            return Response(
+                {"error": "Seul le destinataire peut marquer cette notification comme lue."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        mark_read(request.user, Notification.objects.filter(pk=notification.pk))
+        notification.refresh_from_db(fields=['read_at'])
+        return Response(self.get_serializer(notification).data)
@@ -1,7 +1,21 @@
-from rest_framework import viewsets, permissions
+import os
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.db import transaction
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from api.models import Report
-from api.serializers import ReportSerializer
+from api.analytics import cached_demand_heatmap, refresh_report
+from api.archive import write_archive
+from api.reportCache import cached_report
+from api.rollups import period_summary
+from api.models import Report, ReportJob
+from api.permissions import IsManagerOrSuperUser
+from api.roles import is_manager_or_superuser
+from api.serializers import ReportSerializer, ReportJobSerializer, ReportJobRequestSerializer, PeriodQuerySerializer, HeatmapQuerySerializer, INVALID_PERIOD_MESSAGE
 
 class ReportViewSet(viewsets.ModelViewSet):
     """
@@ -20,11 +34,17 @@ class ReportViewSet(viewsets.ModelViewSet):
         """
         Restrict access to users in the 'Manager' or 'Admin' groups, or superusers.
         """
-        user = self.request.user
-        if user.is_superuser or user.groups.filter(name__in=['Manager']).exists():
+        if is_manager_or_superuser(self.request):
             return Report.objects.all()
         return Report.objects.none()  # no access for other users
 
+    def _period_or_400(self, report):
+        """Bornes de la période du rapport, ou la réponse 400 si la période est invalide."""
+        try:
+            return report.period_bounds(), None
+        except ValueError:
+            return None, Response({"error": INVALID_PERIOD_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
     def perform_create(self, serializer):
         """
         Optionally associate the creator as the user for the report.
@@ -48,13 +68,40 @@ class ReportViewSet(viewsets.ModelViewSet):
         """
         return super().retrieve(request, *args, **kwargs)
 
-    @swagger_auto_schema(request_body=ReportSerializer, responses={201: ReportSerializer})
+    @swagger_auto_schema(
+        request_body=ReportSerializer,
+        manual_parameters=[openapi.Parameter(
+            'async', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+            description="Queue the computation as a background job (202) instead of computing it in the request"
+        )],
+        responses={201: ReportSerializer, 202: ReportJobSerializer}
+    )
     def create(self, request, *args, **kwargs):
         """
         Create a new report.
+        With ?async=true the statistics and the export file are computed by
+        run_report_worker: the response is 202 with the job to poll.
         Accessible only to Managers or superusers.
         """
-        return super().create(request, *args, **kwargs)
+        if request.query_params.get('async') not in ('1', 'true'):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Valeurs provisoires, remplacées par le worker
+        placeholders = {
+            field: value for field, value in (('occupancy_rate', 0), ('pics_activity', ''))
+            if field not in serializer.validated_data
+        }
+        with transaction.atomic():
+            report = serializer.save(user=request.user, **placeholders)
+            job = ReportJob.objects.create(report=report, requested_by=request.user)
+        job_data = ReportJobSerializer(job, context=self.get_serializer_context()).data
+        return Response(
+            {"report": serializer.data, "job": job_data},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": job_data["status_url"]}
+        )
 
     @swagger_auto_schema(request_body=ReportSerializer, responses={200: ReportSerializer})
     def update(self, request, *args, **kwargs):
@@ -71,3 +118,172 @@ class ReportViewSet(viewsets.ModelViewSet):
         Accessible only to Managers or superusers.
         """
         return super().destroy(request, *args, **kwargs)
+
+    # --- Statistiques ---
+    @swagger_auto_schema(method='post', request_body=None, responses={200: ReportSerializer, 400: 'Invalid period'})
+    @action(detail=True, methods=['post'])
+    def compute(self, request, pk=None):
+        """
+        Recompute occupancy rate, peak activity hours and number of
+        cancellations from the reservations of the report period.
+        """
+        report = self.get_object()
+        _, error = self._period_or_400(report)
+        if error:
+            return error
+        stats = refresh_report(report)
+        report.save(update_fields=['occupancy_rate', 'nb_annulation', 'pics_activity'])
+        data = self.get_serializer(report).data
+        data['activity_per_hour'] = stats['per_hour']
+        return Response(data)
+
+    @swagger_auto_schema(method='get', responses={200: 'Daily covers, cancellations and occupancy', 400: 'Invalid period'})
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """
+        Covers, cancellations and occupancy of the report period, per day and
+        in total, read from the daily rollup instead of the reservations.
+        Cached until a reservation of the period changes.
+        """
+        report = self.get_object()
+        bounds, error = self._period_or_400(report)
+        if error:
+            return error
+        first, last = bounds
+        summary = cached_report('summary', first, last, lambda: period_summary(first, last))
+        return Response({"period": report.period, **summary})
+
+    @swagger_auto_schema(method='get', query_serializer=HeatmapQuerySerializer,
+                         responses={200: 'Day of week × hour matrices', 403: 'Forbidden'})
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsManagerOrSuperUser])
+    def heatmap(self, request):
+        """
+        Demand heatmap of a date range: bookings, covers and cancellations by
+        day of week (Monday first) × start hour or quarter-hour.
+        Computed with one grouped query and cached per (range, table filter)
+        until a reservation of the range changes.
+        Accessible only to Managers or superusers.
+        """
+        params = HeatmapQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        heatmap = cached_demand_heatmap(
+            data['start_date'], data['end_date'],
+            table_id=data.get('table_saloon_id'), table_type=data.get('type'), resolution=data['resolution'],
+        )
+        return Response({"start_date": data['start_date'], "end_date": data['end_date'], **heatmap})
+
+    @swagger_auto_schema(method='get', query_serializer=PeriodQuerySerializer,
+                         responses={200: 'Compressed .npz archive', 403: 'Forbidden'})
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsManagerOrSuperUser])
+    def archive(self, request):
+        """
+        Reservation history of a date range as a compressed, column-oriented
+        NumPy archive (.npz): one array per column, status and table
+        dictionary-encoded. Read with numpy.load().
+        Accessible only to Managers or superusers.
+        """
+        params = PeriodQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        first, last = params.validated_data['start_date'], params.validated_data['end_date']
+
+        # Fichier temporaire supprimé à la fermeture de la réponse
+        output = tempfile.TemporaryFile()
+        write_archive(first, last, output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"reservations-{first}-{last}.npz",
+            content_type='application/octet-stream',
+        )
+
+    # --- Jobs en arrière-plan ---
+    def get_jobs_queryset(self):
+        return ReportJob.objects.filter(report__in=self.get_queryset())
+
+    @swagger_auto_schema(method='get', responses={200: ReportJobSerializer(many=True)})
+    @swagger_auto_schema(method='post', request_body=ReportJobRequestSerializer, responses={202: ReportJobSerializer})
+    @action(detail=True, methods=['get', 'post'])
+    def jobs(self, request, pk=None):
+        """
+        GET: background jobs of the report, most recent first.
+        POST: queue a new job (statistics + CSV or NDJSON export file),
+        processed by the run_report_worker command.
+        """
+        report = self.get_object()
+        if request.method == 'GET':
+            jobs = report.jobs.order_by('-created_at')
+            return Response(ReportJobSerializer(jobs, many=True, context=self.get_serializer_context()).data)
+
+        params = ReportJobRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        _, error = self._period_or_400(report)
+        if error:
+            return error
+        job = ReportJob.objects.create(report=report, format=params.validated_data['format'], requested_by=request.user)
+        data = ReportJobSerializer(job, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": data["status_url"]})
+
+    @swagger_auto_schema(method='get', responses={200: ReportJobSerializer, 404: 'Not found'})
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9]+)', url_name='job-status')
+    def job_status(self, request, job_id=None):
+        """
+        Poll a background job: status, progress (0-100) and, once done,
+        the download link of the generated file.
+        """
+        job = self.get_jobs_queryset().filter(pk=job_id).first()
+        if job is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ReportJobSerializer(job, context=self.get_serializer_context()).data)
+
+    @swagger_auto_schema(method='get', responses={200: 'Generated file', 404: 'Not found', 409: 'Job not finished'})
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9]+)/download', url_name='job-download')
+    def job_download(self, request, job_id=None):
+        """Download the file produced by a finished background job."""
+        job = self.get_jobs_queryset().filter(pk=job_id).first()
+        if job is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != ReportJob.STATUS_DONE:
+            return Response(
+                {"error": f"Le job n'est pas terminé (statut : {job.status})."},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not os.path.exists(job.result_path):
+            return Response({"error": "Le fichier du rapport n'existe plus."}, status=status.HTTP_410_GONE)
+        content_type, _ = ReportJob.FORMATS[job.format]
+        return FileResponse(
+            open(job.result_path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(job.result_path),
+            content_type=content_type,
+        )
+
+    # --- Export ---
+    def _export(self, generator_name, content_type, extension):
+        report = self.get_object()
+        _, error = self._period_or_400(report)
+        if error:
+            return error
+        response = StreamingHttpResponse(getattr(report, generator_name)(), content_type=content_type)
+        filename = f"report-{report.pk}-{report.period.replace('/', '_')}.{extension}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @swagger_auto_schema(method='get', responses={200: 'CSV file'})
+    @action(detail=True, methods=['get'], url_path='export/csv')
+    def export_csv(self, request, pk=None):
+        """
+        Stream every reservation of the report period as CSV.
+        Rows are read through a server-side cursor, in constant memory.
+        """
+        return self._export('generate_csv', 'text/csv', 'csv')
+
+    @swagger_auto_schema(method='get', responses={200: 'NDJSON file'})
+    @action(detail=True, methods=['get'], url_path='export/json')
+    def export_json(self, request, pk=None):
+        """
+        Stream every reservation of the report period as newline-delimited JSON.
+        Rows are read through a server-side cursor, in constant memory.
+        """
+        return self._export('generate_json', 'application/x-ndjson', 'ndjson')
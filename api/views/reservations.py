@@ -1,10 +1,26 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import DjangoModelPermissions
 from rest_framework.decorators import action
+from rest_framework.pagination import LimitOffsetPagination
 from drf_yasg.utils import swagger_auto_schema
-from api.models import Reservation
-from api.serializers import ReservationSerializer
+from api import rollups
+from api.availability import build_day_index, from_seconds, opening_hours, to_seconds
+from api.models import Reservation, ReservationSeries, TableSaloon, WaitlistEntry
+from api.pagination import ReservationPagination
+from api.roles import has_full_access
+from api.waitlist import promote_waitlist
+from api.serializers import (
+    ReservationSerializer, AvailabilityQuerySerializer, ReservationBulkItemSerializer, WaitlistEntrySerializer,
+    ReservationSeriesSerializer
+)
+from api.models.reservations import is_overlap_violation
+
+# Nombre maximal de réservations acceptées par appel à /bulk/
+BULK_MAX_ITEMS = 200
 
 class ReservationViewSet(viewsets.ModelViewSet):
     """
@@ -16,9 +32,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
     - delete_reservation: supprimer définitivement une réservation (staff/superuser seulement)
     - view_reservation: voir les réservations
     """
-    queryset = Reservation.objects.all()
+    # Le sérialiseur imbrique table_saloon et lit user.email : on les charge en jointure
+    queryset = Reservation.objects.select_related('table_saloon', 'user')
     serializer_class = ReservationSerializer
     permission_classes = [DjangoModelPermissions]
+    pagination_class = ReservationPagination
 
     def get_queryset(self):
         """
@@ -31,9 +49,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         # Les superusers, staff et managers voient toutes les réservations
-        if (self.request.user.is_staff or 
-            self.request.user.is_superuser or 
-            self.request.user.groups.filter(name='Manager').exists()):
+        if has_full_access(self.request):
             return queryset
         
         # Les utilisateurs normaux ne voient que leurs réservations
@@ -64,6 +80,18 @@ class ReservationViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def perform_destroy(self, instance):
+        """
+        Delete the reservation and, in the same transaction, hand the freed
+        slot to the waitlist.
+        """
+        with transaction.atomic():
+            was_active = instance.status in Reservation.ACTIVE_STATUSES
+            table_saloon, date = instance.table_saloon, instance.date
+            instance.delete()
+            if was_active:
+                promote_waitlist(table_saloon, date)
+
     # Actions personnalisées
     @swagger_auto_schema(method='post', responses={200: ReservationSerializer})
     @action(detail=True, methods=['post'], permission_classes=[DjangoModelPermissions])
@@ -75,10 +103,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         reservation = self.get_object()
         
         # Vérifier les permissions spécifiques
-        if not (request.user.is_staff or 
-                request.user.is_superuser or 
-                request.user.groups.filter(name='Manager').exists() or
-                reservation.user == request.user):
+        if not (reservation.user_id == request.user.id or has_full_access(request)):
             return Response(
                 {"error": "Vous n'avez pas la permission d'annuler cette réservation."},
                 status=status.HTTP_403_FORBIDDEN
@@ -98,8 +123,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = Reservation.STATUS_CANCELED
-        reservation.save()
+        # Le créneau libéré est immédiatement proposé à la liste d'attente
+        with transaction.atomic():
+            reservation.status = Reservation.STATUS_CANCELED
+            reservation.save()
+            promote_waitlist(reservation.table_saloon, reservation.date)
         
         serializer = self.get_serializer(reservation)
         return Response(serializer.data)
@@ -114,7 +142,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Response([])
             
-        reservations = Reservation.objects.filter(user_id=request.user.id)
+        reservations = self.get_queryset().filter(user_id=request.user.id)
         page = self.paginate_queryset(reservations)
         
         if page is not None:
@@ -136,17 +164,12 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Response([])
             
-        reservations = Reservation.objects.filter(
+        # get_queryset() restreint déjà les non-staff/non-managers à leurs réservations
+        reservations = self.get_queryset().filter(
             date__gte=timezone.now().date(),
             status__in=[Reservation.STATUS_PENDING, Reservation.STATUS_COMPLETED]
         )
         
-        # Filtrage supplémentaire pour les non-staff/non-managers
-        if not (request.user.is_staff or 
-                request.user.is_superuser or 
-                request.user.groups.filter(name='Manager').exists()):
-            reservations = reservations.filter(user_id=request.user.id)
-        
         page = self.paginate_queryset(reservations)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -167,17 +190,12 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Response([])
             
-        reservations = Reservation.objects.filter(
+        # get_queryset() restreint déjà les non-staff/non-managers à leurs réservations
+        reservations = self.get_queryset().filter(
             date=timezone.now().date(),
             status__in=[Reservation.STATUS_PENDING, Reservation.STATUS_COMPLETED]
         )
         
-        # Filtrage supplémentaire pour les non-staff/non-managers
-        if not (request.user.is_staff or 
-                request.user.is_superuser or 
-                request.user.groups.filter(name='Manager').exists()):
-            reservations = reservations.filter(user_id=request.user.id)
-        
         page = self.paginate_queryset(reservations)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -196,20 +214,271 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Response([])
             
-        reservations = Reservation.objects.filter(
+        # get_queryset() restreint déjà les non-staff/non-managers à leurs réservations
+        reservations = self.get_queryset().filter(
             status__in=[Reservation.STATUS_PENDING, Reservation.STATUS_COMPLETED]
         )
         
-        # Filtrage supplémentaire pour les non-staff/non-managers
-        if not (request.user.is_staff or 
-                request.user.is_superuser or 
-                request.user.groups.filter(name='Manager').exists()):
-            reservations = reservations.filter(user_id=request.user.id)
-        
         page = self.paginate_queryset(reservations)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(reservations, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @swagger_auto_schema(query_serializer=AvailabilityQuerySerializer)
+    @action(detail=False, methods=['get'], permission_classes=[DjangoModelPermissions])
+    def availability(self, request):
+        """
+        List the free slots of every available table/saloon that fits `people`
+        on `date`, for a booking of `duration` minutes.
+        Reservations of the day are loaded once and searched in memory.
+        """
+        params = AvailabilityQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        date = params.validated_data['date']
+        people = params.validated_data['people']
+        duration = params.validated_data['duration'] * 60
+
+        tables = TableSaloon.objects.filter(capacity__gte=people, status="available")
+        if 'type' in params.validated_data:
+            tables = tables.filter(type=params.validated_data['type'])
+        tables = list(tables.order_by('capacity', 'id'))
+
+        opening, closing = opening_hours(date)
+        index = build_day_index(date, table_ids=[table.id for table in tables])
+
+        results = []
+        for table in tables:
+            slots = index[table.id].free_slots(opening, closing, min_length=duration)
+            if not slots:
+                continue
+            results.append({
+                "id": table.id,
+                "name": table.name,
+                "type": table.type,
+                "capacity": table.capacity,
+                "slots": [
+                    {"start": from_seconds(start), "end": from_seconds(end)}
+                    for start, end in slots
+                ],
+            })
+
+        return Response({
+            "date": date,
+            "people": people,
+            "duration": params.validated_data['duration'],
+            "tables": results,
+        })
+
+    @swagger_auto_schema(method='post', request_body=ReservationBulkItemSerializer(many=True))
+    @action(detail=False, methods=['post'], permission_classes=[DjangoModelPermissions])
+    def bulk(self, request):
+        """
+        Create several reservations in one call.
+        Tables are loaded in one query, overlaps are checked with one query per
+        date plus in-memory checks between the new items, and valid items are
+        inserted with a single bulk_create. Returns one result per item.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Une liste non vide de réservations est attendue."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"error": f"Au plus {BULK_MAX_ITEMS} réservations par appel."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [None] * len(items)
+        valid = []
+        for position, item in enumerate(items):
+            serializer = ReservationBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((position, serializer.validated_data))
+            else:
+                results[position] = {"index": position, "status": "error", "errors": serializer.errors}
+
+        tables = TableSaloon.objects.in_bulk({data['table_saloon_id'] for _, data in valid})
+
+        # Une requête par date pour toutes les tables concernées
+        tables_by_date = defaultdict(set)
+        for _, data in valid:
+            tables_by_date[data['date']].add(data['table_saloon_id'])
+        indexes = {
+            day: build_day_index(day, table_ids=table_ids)
+            for day, table_ids in tables_by_date.items()
+        }
+
+        to_create = []
+        for position, data in valid:
+            table = tables.get(data['table_saloon_id'])
+            error = None
+            if table is None:
+                error = {"table_saloon_id": ["Table/salon introuvable."]}
+            elif data['people_count'] > table.capacity:
+                error = {"people_count": [
+                    f"Le nombre de personnes ({data['people_count']}) dépasse la capacité "
+                    f"de la table/salon ({table.capacity})."
+                ]}
+            else:
+                index = indexes[data['date']][table.id]
+                start, end = to_seconds(data['start']), to_seconds(data['end'])
+                if index.overlaps(start, end):
+                    error = {"table_saloon_id": ["La table/salon est déjà réservée sur cet intervalle."]}
+                else:
+                    index.add(start, end)
+
+            if error:
+                results[position] = {"index": position, "status": "error", "errors": error}
+                continue
+            to_create.append((position, Reservation(
+                date=data['date'],
+                start=data['start'],
+                end=data['end'],
+                people_count=data['people_count'],
+                user=request.user,
+                table_saloon=table,
+            )))
+
+        if to_create:
+            try:
+                with transaction.atomic():
+                    Reservation.objects.bulk_create([reservation for _, reservation in to_create])
+                    rollups.record_created([reservation for _, reservation in to_create])
+            except IntegrityError as exc:
+                # Une réservation concurrente a pris l'un des créneaux entre la lecture et l'insertion
+                if not is_overlap_violation(exc):
+                    raise
+                return Response(
+                    {"error": "Un des créneaux vient d'être réservé. Aucune réservation n'a été créée, réessayez."},
+                    status=status.HTTP_409_CONFLICT
+                )
+            for position, reservation in to_create:
+                results[position] = {
+                    "index": position,
+                    "status": "created",
+                    "reservation": self.get_serializer(reservation).data,
+                }
+
+        if not to_create:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(to_create) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response(results, status=response_status)
+
+    @swagger_auto_schema(method='get', responses={200: WaitlistEntrySerializer(many=True)})
+    @swagger_auto_schema(method='post', request_body=WaitlistEntrySerializer, responses={201: WaitlistEntrySerializer})
+    @action(detail=False, methods=['get', 'post'], permission_classes=[DjangoModelPermissions])
+    def waitlist(self, request):
+        """
+        GET: list waitlist entries (own entries, or all for staff/managers).
+        POST: join the waitlist for a slot that is currently full. The request
+        is promoted to a reservation as soon as a cancellation frees a
+        matching table/saloon.
+        """
+        if request.method == 'POST':
+            serializer = WaitlistEntrySerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        entries = WaitlistEntry.objects.select_related('user')
+        if not has_full_access(request):
+            entries = entries.filter(user_id=request.user.id)
+        if request.query_params.get('status'):
+            entries = entries.filter(status=request.query_params['status'])
+
+        page = self.paginate_queryset(entries)
+        if page is not None:
+            serializer = WaitlistEntrySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = WaitlistEntrySerializer(entries, many=True)
+        return Response(serializer.data)
+
+    @swagger_auto_schema(method='delete', responses={204: 'No Content'})
+    @action(detail=False, methods=['delete'], url_path=r'waitlist/(?P<entry_id>[0-9]+)',
+            url_name='waitlist-leave', permission_classes=[DjangoModelPermissions])
+    def leave_waitlist(self, request, entry_id=None):
+        """
+        Leave the waitlist (the entry is kept with the 'canceled' status).
+        """
+        entries = WaitlistEntry.objects.filter(status=WaitlistEntry.STATUS_WAITING)
+        if not has_full_access(request):
+            entries = entries.filter(user_id=request.user.id)
+
+        updated = entries.filter(pk=entry_id).update(status=WaitlistEntry.STATUS_CANCELED)
+        if not updated:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @swagger_auto_schema(method='get', responses={200: ReservationSeriesSerializer(many=True)})
+    @swagger_auto_schema(method='post', request_body=ReservationSeriesSerializer, responses={201: ReservationSeriesSerializer})
+    @action(detail=False, methods=['get', 'post'], permission_classes=[DjangoModelPermissions])
+    def series(self, request):
+        """
+        GET: list recurring reservations (own series, or all for staff/managers).
+        POST: create a weekly/biweekly series. Only the occurrences of the
+        rolling window are created now, checked against existing reservations
+        with a single query; conflicting dates are skipped and reported.
+        """
+        if request.method == 'POST':
+            serializer = ReservationSeriesSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                series = serializer.save(user=request.user)
+                created, skipped = series.materialize()
+            return Response({
+                **ReservationSeriesSerializer(series).data,
+                "created": len(created),
+                "skipped_dates": skipped,
+            }, status=status.HTTP_201_CREATED)
+
+        queryset = ReservationSeries.objects.select_related('user', 'table_saloon').order_by('-created_at')
+        if not has_full_access(request):
+            queryset = queryset.filter(user_id=request.user.id)
+
+        # Pas de mode curseur ici : les séries ne sont pas ordonnées par (date, start, id)
+        paginator = LimitOffsetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ReservationSeriesSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(method='post', responses={200: ReservationSeriesSerializer})
+    @action(detail=False, methods=['post'], url_path=r'series/(?P<series_id>[0-9]+)/cancel',
+            url_name='series-cancel', permission_classes=[DjangoModelPermissions])
+    def cancel_series(self, request, series_id=None):
+        """
+        Cancel a series and its upcoming occurrences with a single UPDATE.
+        Freed slots are offered to the waitlist.
+        """
+        queryset = ReservationSeries.objects.select_related('user', 'table_saloon')
+        if not has_full_access(request):
+            queryset = queryset.filter(user_id=request.user.id)
+        series = queryset.filter(pk=series_id).first()
+        if series is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        if series.status == ReservationSeries.STATUS_CANCELED:
+            return Response(
+                {"error": "Cette série est déjà annulée."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            series.status = ReservationSeries.STATUS_CANCELED
+            series.save(update_fields=['status'])
+            upcoming = series.occurrences.filter(
+                date__gte=timezone.localdate(), status=Reservation.STATUS_PENDING
+            )
+            dates = list(upcoming.values_list('date', flat=True))
+            rollups.record_status_change(upcoming, Reservation.STATUS_CANCELED)
+            for date in dates:
+                promote_waitlist(series.table_saloon, date)
+
+        return Response(ReservationSeriesSerializer(series).data)
@@ -1,9 +1,19 @@
-from rest_framework.decorators import api_view, permission_classes
+import datetime
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from api.events import async_event_stream, event_stream
 from api.models import TableSaloon
+from api.renderers import EventStreamRenderer
+from api.roles import is_manager_or_superuser
 from api.serializers import TableSaloonSerializer
 
 @swagger_auto_schema(method='GET', responses={200: TableSaloonSerializer(many=True)})
@@ -21,7 +31,7 @@ def table_saloons_list(request):
 
     elif request.method == 'POST':
         # Only Manager/Admin or superuser can create
-        if not request.user.groups.filter(name__in=['Manager']).exists() and not request.user.is_superuser and not request.user.is_authenticated:
+        if not is_manager_or_superuser(request):
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = TableSaloonSerializer(data=request.data)
@@ -51,7 +61,7 @@ def table_saloon_detail(request, pk):
         return Response(serializer.data)
 
     elif request.method == 'PUT':
-        if not request.user.groups.filter(name__in=['Manager']).exists() and not request.user.is_superuser:
+        if not is_manager_or_superuser(request):
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = TableSaloonSerializer(table, data=request.data)
@@ -61,8 +71,49 @@ def table_saloon_detail(request, pk):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
-        if not request.user.groups.filter(name__in=['Manager']).exists() and not request.user.is_superuser:
+        if not is_manager_or_superuser(request):
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
 
         table.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@swagger_auto_schema(
+    method='GET',
+    manual_parameters=[openapi.Parameter(
+        'date', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE,
+        description="Ne diffuser que les réservations de ce jour (les événements de table sont toujours envoyés)",
+    )],
+    responses={200: 'text/event-stream'},
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def table_saloons_events(request):
+    """
+    Server-Sent Events stream of availability changes, replacing the polling
+    of the table and reservation lists. Events:
+    - `reservation`: {id, table, date, start, end, status}
+    - `reservation_deleted`: {id, table, date}
+    - `table`: {id, status, capacity, type} (status null when deleted)
+    - `resync`: the client fell behind, reload the full state.
+    """
+    date = request.query_params.get('date')
+    if date:
+        try:
+            date = datetime.date.fromisoformat(date)
+        except ValueError:
+            return Response({"error": "Format de date invalide (AAAA-MM-JJ)."}, status=status.HTTP_400_BAD_REQUEST)
+        date = date.isoformat()
+
+    # Le flux ne lit plus la base : la connexion ouverte par l'authentification est
+    # rendue tout de suite, sinon chaque client la garderait jusqu'à sa déconnexion.
+    if not connection.in_atomic_block:
+        connection.close()
+
+    # Sous ASGI le flux est asynchrone et n'occupe aucun thread
+    stream = async_event_stream if isinstance(request._request, ASGIRequest) else event_stream
+    response = StreamingHttpResponse(stream(date or None), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
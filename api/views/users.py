@@ -5,6 +5,7 @@ from drf_yasg.utils import swagger_auto_schema
 
 from api.models import User
 from api.permissions import IsManagerOrSuperUser, IsSuperUser
+from api.roles import is_manager
 from api.serializers import (
     RegisterSerializer, 
     UserSerializer, 
@@ -154,7 +155,7 @@ class UserListView(generics.ListAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne montrer que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -183,7 +184,7 @@ class UserRetrieveView(generics.RetrieveAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne peut voir que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -212,7 +213,7 @@ class UserUpdateView(generics.UpdateAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne peut modifier que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -240,7 +241,7 @@ class UserUpdateView(generics.UpdateAPIView):
         current_user = self.request.user
         
         # Restrictions pour les managers
-        if current_user.groups.filter(name='Manager').exists() and not current_user.is_superuser:
+        if is_manager(self.request) and not current_user.is_superuser:
             # Un manager ne peut pas modifier le statut superuser
             if 'is_superuser' in serializer.validated_data:
                 raise permissions.PermissionDenied(
@@ -265,7 +266,7 @@ class AdminAssignGroupView(generics.UpdateAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne peut modifier que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -317,7 +318,7 @@ class AdminUserActivationView(generics.UpdateAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne peut modifier que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -332,7 +333,7 @@ class AdminUserActivationView(generics.UpdateAPIView):
         current_user = request.user
         
         # Empêcher la désactivation d'un superuser par un manager
-        if user.is_superuser and current_user.groups.filter(name='Manager').exists() and not current_user.is_superuser:
+        if user.is_superuser and is_manager(self.request) and not current_user.is_superuser:
             raise permissions.PermissionDenied(
                 "Les managers ne peuvent pas désactiver un superutilisateur."
             )
@@ -428,7 +429,7 @@ class PromoteToManagerView(generics.UpdateAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne peut promouvoir que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -444,7 +445,7 @@ class PromoteToManagerView(generics.UpdateAPIView):
         current_user = self.request.user
         
         # Vérifier qu'un manager ne peut pas promouvoir un superuser
-        if user.is_superuser and current_user.groups.filter(name='Manager').exists() and not current_user.is_superuser:
+        if user.is_superuser and is_manager(self.request) and not current_user.is_superuser:
             raise permissions.PermissionDenied(
                 "Les managers ne peuvent pas promouvoir un superutilisateur."
             )
@@ -474,7 +475,7 @@ class DemoteFromManagerView(generics.UpdateAPIView):
         queryset = super().get_queryset()
         
         # Si c'est un manager (pas superuser), ne peut rétrograder que les non-superusers
-        if self.request.user.groups.filter(name='Manager').exists() and not self.request.user.is_superuser:
+        if is_manager(self.request) and not self.request.user.is_superuser:
             queryset = queryset.filter(is_superuser=False)
         
         return queryset
@@ -490,13 +491,13 @@ class DemoteFromManagerView(generics.UpdateAPIView):
         current_user = self.request.user
         
         # Empêcher un manager de se rétrograder lui-même
-        if user == current_user and current_user.groups.filter(name='Manager').exists() and not current_user.is_superuser:
+        if user == current_user and is_manager(self.request) and not current_user.is_superuser:
             raise permissions.PermissionDenied(
                 "Vous ne pouvez pas vous rétrograder vous-même."
             )
         
         # Vérifier qu'un manager ne peut pas rétrograder un superuser
-        if user.is_superuser and current_user.groups.filter(name='Manager').exists() and not current_user.is_superuser:
+        if user.is_superuser and is_manager(self.request) and not current_user.is_superuser:
             raise permissions.PermissionDenied(
                 "Les managers ne peuvent pas rétrograder un superutilisateur."
             )
@@ -0,0 +1,72 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from api.availability import build_day_index, to_seconds
+from api.models import Reservation, WaitlistEntry
+from api.models.reservations import is_overlap_violation
+from api.notify import notify
+
+
+def promote_waitlist(table_saloon, date):
+    """
+    Give the free time of `table_saloon` on `date` to the waiting requests
+    that fit, first come first served. Meant to run in the transaction that
+    freed the slot (cancel/delete): each promoted request becomes a pending
+    reservation and its user gets a Notification.
+    Returns the created reservations.
+    """
+    if table_saloon is None or table_saloon.status != "available":
+        return []
+
+    index = build_day_index(date, table_ids=[table_saloon.id])[table_saloon.id]
+    # Index partiel waitlist_waiting_idx ; les lignes déjà verrouillées par une
+    # autre promotion concurrente sont ignorées. Seules les demandes sont
+    # verrouillées, pas les utilisateurs joints par select_related.
+    candidates = (
+        WaitlistEntry.objects.select_for_update(skip_locked=True, of=('self',))
+        .filter(
+            status=WaitlistEntry.STATUS_WAITING,
+            date=date,
+            people_count__lte=table_saloon.capacity,
+        )
+        .filter(Q(table_saloon__isnull=True) | Q(table_saloon=table_saloon))
+        .filter(Q(table_type="") | Q(table_type=table_saloon.type))
+        .select_related('user')
+        .order_by('created_at')
+    )
+
+    promoted = []
+    for entry in candidates:
+        start, end = to_seconds(entry.start), to_seconds(entry.end)
+        if index.overlaps(start, end):
+            continue
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    date=entry.date,
+                    start=entry.start,
+                    end=entry.end,
+                    people_count=entry.people_count,
+                    user=entry.user,
+                    table_saloon=table_saloon,
+                )
+        except IntegrityError as exc:
+            if not is_overlap_violation(exc):
+                raise
+            continue
+
+        index.add(start, end)
+        entry.status = WaitlistEntry.STATUS_PROMOTED
+        entry.reservation = reservation
+        entry.save(update_fields=['status', 'reservation'])
+        notify(
+            entry.user,
+            "email",
+            (
+                f"Une place s'est libérée : votre réservation du {entry.date} "
+                f"de {entry.start:%H:%M} à {entry.end:%H:%M} est confirmée ({table_saloon.name})."
+            ),
+            reservation=reservation,
+        )
+        promoted.append(reservation)
+    return promoted
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     
@@ -240,4 +241,30 @@ de la revendication d'expiration d'un jeton glissant n'est pas dépassé, celui-
 utilisé pour prouver l'authentification. De plus, tant que l'horodatage de sa revendication 
 d'expiration de rafraîchissement n'est pas dépassé, il peut également être soumis à une vue 
 de rafraîchissement pour obtenir une autre copie de lui-même avec une revendication d'expiration 
-renouvelée."""
\ No newline at end of file
+renouvelée."""
+
+# Lire les rôles (groupes) dans le claim "roles" du token plutôt qu'en base
+# (désactivé par défaut, ROLES_FROM_TOKEN=1 pour l'activer). Un changement de
+# groupe n'est alors pris en compte qu'au prochain login (au plus
+# REFRESH_TOKEN_LIFETIME, le claim étant recopié au refresh).
+ROLES_FROM_TOKEN = os.getenv('ROLES_FROM_TOKEN') == '1'
+
+# Durée de vie des résultats de recherche de menus mis en cache (une entrée par combinaison de filtres)
+MENU_SEARCH_CACHE_SECONDS = int(os.getenv('MENU_SEARCH_CACHE_SECONDS', 300))
+
+# Fichiers produits par run_report_worker (téléchargés via /api/reports/jobs/<id>/download/)
+REPORT_JOBS_DIR = os.getenv('REPORT_JOBS_DIR', str(BASE_DIR / 'report_jobs'))
+
+# Backend de livraison des notifications par canal (voir api/notificationBackends.py)
+NOTIFICATION_BACKENDS = {
+    "email": "api.notificationBackends.EmailBackend",
+    "sms": "api.notificationBackends.LoggingSmsBackend",
+}
+# Fenêtre pendant laquelle les notifications en attente d'un même
+# (utilisateur, réservation, canal) sont fusionnées (0 : pas de regroupement)
+NOTIFICATION_COALESCE_SECONDS = int(os.getenv('NOTIFICATION_COALESCE_SECONDS', 60))
+# Débit d'envoi par utilisateur (seau à jetons) : rafale maximale, puis N envois par heure
+NOTIFICATION_RATE_BURST = int(os.getenv('NOTIFICATION_RATE_BURST', 20))
+NOTIFICATION_RATE_PER_HOUR = int(os.getenv('NOTIFICATION_RATE_PER_HOUR', 60))
+# Mois de notifications conservés par manage_notification_partitions (partitions plus anciennes supprimées)
+NOTIFICATION_RETENTION_MONTHS = int(os.getenv('NOTIFICATION_RETENTION_MONTHS', 12))